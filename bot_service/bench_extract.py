@@ -0,0 +1,76 @@
+import glob
+import os
+import sys
+import time
+
+from bot_service.extract import extract_bs4, extract_description, extract_many
+
+# Сравнивает разбор страниц отелей: эталонный BeautifulSoup(html.parser)
+# против lxml (один процесс и пул процессов) и проверяет, что тексты совпадают побайтно.
+# Корпус — папка с сохранёнными страницами (scraper.save_html_dir) и EDGE_CASES:
+# конструкции, которые libxml2 и html.parser разбирают по-разному.
+#
+#   python -m bot_service.bench_extract data/hotel_pages [processes]
+
+_PAGE = """<html><head><title>Отель &amp; спа</title></head><body>
+<div class="attributes__text">Описание {0} отеля</div>
+<span class="attributes__icon-text">Пляж {0}</span>
+<div class="attrGroup"><div class="attrGroupName">Удобства</div><div class="attrGroupContent">Wi-Fi {0}</div></div>
+</body></html>"""
+EDGE_CASES = {
+    "end_br": _PAGE.format("a</br>b"),
+    "end_br_upper": _PAGE.format("a</BR >b"),
+    "textarea": _PAGE.format("<textarea><b>x</b></textarea>"),
+    "title_in_body": _PAGE.format("<title><b>x</b></title>"),
+    "xmp_entity": _PAGE.format("<xmp>&amp;q</xmp>"),
+    "iframe": _PAGE.format("<iframe><b>x</b></iframe>"),
+    "noembed": _PAGE.format("<noembed><b>x</b></noembed>"),
+    "cdata": _PAGE.format("<![CDATA[zz]]>"),
+    "svg_cdata": _PAGE.format("<svg><![CDATA[zz]]></svg>"),
+    "plaintext": _PAGE.format("<plaintext><b>x</b>"),
+    "unclosed_textarea": _PAGE.format("<textarea>q"),
+}
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def bench(corpus_dir: str, processes: int | None = None) -> dict:
+    paths = sorted(glob.glob(os.path.join(corpus_dir, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        print(f"В {corpus_dir} нет *.html — только EDGE_CASES")
+    paths += [f"edge:{name}" for name in EDGE_CASES]
+    pages += EDGE_CASES.values()
+
+    reference, t_bs4 = _timed(lambda: [extract_bs4(p) for p in pages])
+    single, t_lxml = _timed(lambda: [extract_description(p) for p in pages])
+    parallel, t_pool = _timed(extract_many, pages, processes)
+
+    mismatches = [
+        os.path.basename(path)
+        for path, ref, a, b in zip(paths, reference, single, parallel)
+        if ref.encode("utf-8") != a.encode("utf-8") or ref.encode("utf-8") != b.encode("utf-8")
+    ]
+    size_mb = sum(len(p) for p in pages) / 1024 / 1024
+    print(f"Страниц: {len(pages)} ({size_mb:.1f} МБ)")
+    print(f"  bs4 html.parser : {t_bs4:7.2f} сек ({len(pages) / t_bs4:7.0f} стр/сек)")
+    print(f"  lxml            : {t_lxml:7.2f} сек ({len(pages) / t_lxml:7.0f} стр/сек), x{t_bs4 / t_lxml:.1f}")
+    print(f"  lxml, процессы  : {t_pool:7.2f} сек ({len(pages) / t_pool:7.0f} стр/сек), x{t_bs4 / t_pool:.1f}")
+    if mismatches:
+        print(f"❌ Расхождения с эталоном: {len(mismatches)} — {', '.join(mismatches[:10])}")
+    else:
+        print("✅ Тексты совпадают с эталоном побайтно")
+    return {"pages": len(pages), "bs4": t_bs4, "lxml": t_lxml, "pool": t_pool, "mismatches": mismatches}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m bot_service.bench_extract <corpus_dir> [processes]")
+    bench(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
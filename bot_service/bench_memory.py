@@ -0,0 +1,70 @@
+import dataclasses
+import json
+import sys
+import tracemalloc
+
+from bot_service.models import Tour
+from bot_service.tour_search import _unique_offers, build_filter_query
+from utils.db_pool import get_pool
+
+# Сравнивает память и число аллокаций на запрос: dict на строку (как было)
+# против слотового Tour, построенных из одних и тех же строк sql_filter.
+#
+#   python -m bot_service.bench_memory data/search_params.jsonl
+
+FIELDS = Tour.__slots__
+# поля, которых нет в строке sql_filter (description, reason), — со значениями по умолчанию,
+# как у Tour: иначе dict сравнивался бы с записью меньшего размера
+DEFAULTS = {f.name: f.default for f in dataclasses.fields(Tour) if f.default is not dataclasses.MISSING}
+
+
+def _as_dicts(rows):
+    return [{**DEFAULTS, **dict(zip(FIELDS, row))} for row in rows]
+
+
+def _as_tours(rows):
+    return [Tour.from_row(row) for row in rows]
+
+
+def _measure(build, rows) -> tuple[int, int]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build(rows)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(s.size_diff for s in stats)
+    count = sum(s.count_diff for s in stats)
+    del result
+    return size, count
+
+
+def bench(corpus_path: str, limit: int = 150) -> dict:
+    totals = {"dict": [0, 0], "Tour": [0, 0]}
+    queries = rows_total = 0
+    with open(corpus_path, encoding="utf-8") as f, get_pool().read() as con:
+        for line in f:
+            if not line.strip():
+                continue
+            query, q_params = build_filter_query(json.loads(line), limit)
+            rows = _unique_offers(con, query, q_params, limit)
+            queries += 1
+            rows_total += len(rows)
+            for name, build in (("dict", _as_dicts), ("Tour", _as_tours)):
+                size, count = _measure(build, rows)
+                totals[name][0] += size
+                totals[name][1] += count
+
+    if not queries:
+        print("Корпус пуст")
+        return {}
+    print(f"Запросов: {queries}, строк в среднем: {rows_total / queries:.0f}")
+    for name, (size, count) in totals.items():
+        print(f"{name:>5}: {size / queries / 1024:8.1f} КБ/запрос, {count / queries:8.0f} аллокаций/запрос")
+    return {name: (size / queries, count / queries) for name, (size, count) in totals.items()}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m bot_service.bench_memory <params.jsonl>")
+    bench(sys.argv[1])
@@ -1,89 +1,80 @@
+import asyncio
 import json
+import time
 
-import requests
-from bot_service.tour_search import find_tours, get_city_id_by_name, get_country_id_by_name
+from bot_service import llm_api
+from bot_service.fast_parser import fast_parse
+from bot_service.hotel_features import map_preferences
+from bot_service.tour_search import find_tours
 from utils.config import load_config
-from utils.db_helpers import (
-    get_city_id_by_name,
-    get_country_id_by_name,
-    get_hotel_category_id_by_name,
-    get_resort_id_by_name, get_meal_ids_by_name,
-)
+from utils.db_helpers import resolve_reference_ids
 
 config = load_config()
-LLM_SERVICE_URL = config.get("llm_service", {}).get("url", "http://llm-service:8001/parse")
+# ниже этой уверенности быстрый разбор не доверяем и идём в /parse
+FAST_PARSE_MIN_CONFIDENCE = config.get("fast_parser", {}).get("min_confidence", 0.8)
+# корпус разобранных запросов для data/index_advisor.py (пусто — не пишем)
+PARAMS_LOG = config.get("search", {}).get("params_log")
 
-def parse_user_request_through_service(query: str) -> dict:
+async def parse_user_request_through_service(query: str) -> dict:
     """
     Отправляем запрос в llm_service HTTP API
     """
-    try:
-        resp = requests.post(LLM_SERVICE_URL, json={"query": query}, timeout=60)
-        if resp.status_code == 200:
-            return resp.json()
-        else:
-            return {"error": f"LLM service {resp.status_code}", "details": resp.text}
-    except Exception as e:
-        return {"error": "llm_service_unavailable", "details": str(e)}
+    return await llm_api.parse(query)
 
 
 
-def enrich_with_reference_ids(params):
-    # города / страны
-    if params.get("departure_city") and not params.get("city_id"):
-        cid = get_city_id_by_name(params["departure_city"])
-        if cid:
-            params["city_id"] = cid
-
-    if params.get("country") and not params.get("country_id"):
-        coid = get_country_id_by_name(params["country"])
-        if coid:
-            params["country_id"] = coid
-
-    # курорт (если LLM упомянул)
-    if params.get("resort") and not params.get("resort_id"):
-        rid = get_resort_id_by_name(params["resort"])
-        if rid:
-            params["resort_id"] = rid
+def _enrich(params: dict, user_text: str) -> dict:
+    params = resolve_reference_ids(params)
+    # частые пожелания → признаки hotel_features (фильтр в SQL), в rerank — только остальные
+    params["features"], params["preferences"] = map_preferences(params.get("preferences") or [])
+    params["user_text"] = user_text
+    return params
 
-    # категория отеля
-    if params.get("hotel_category") and not params.get("hotel_category_id"):
-        hid = get_hotel_category_id_by_name(params["hotel_category"])
-        if hid:
-            params["hotel_category_id"] = hid
 
-    # питание
-    if params.get("meal") and not params.get("meal_id"):
-        mid = get_meal_ids_by_name(params["meal"])
-        if mid:
-            params["meal_id"] = mid
+def _append_params_log(line: str) -> None:
+    with open(PARAMS_LOG, "a", encoding="utf-8") as f:
+        f.write(line)
 
-    return params
 
-def process_user_query(user_text: str) -> str:
-    # 1. получаем JSON от llm_service
-    params = parse_user_request_through_service(user_text)
-    print("=== RAW LLM response ===")
+async def process_user_query(user_text: str) -> str:
+    # справочники читаются из SQLite (и раз в check_interval_sec сверяются с версией) —
+    # разбор и обогащение идут в пуле потоков, чтобы не держать event loop
+    loop = asyncio.get_running_loop()
+    # 1. простые запросы разбираем правилами, остальные — через llm_service
+    params, confidence = await loop.run_in_executor(None, fast_parse, user_text)
+    if confidence < FAST_PARSE_MIN_CONFIDENCE or map_preferences(params["preferences"])[1]:
+        fast_params = params
+        params = await parse_user_request_through_service(user_text)
+        print("=== RAW LLM response ===")
+        if "error" in params and fast_params["country"]:
+            # LLM недоступен, но страну правила нашли — ищем хотя бы по разобранному
+            print(f"LLM недоступен ({params['error']}), использую быстрый разбор")
+            params = fast_params
+    else:
+        print(f"=== Fast parse (confidence {confidence}) ===")
     print(params)
-    params = enrich_with_reference_ids(params)
     if "error" in params:
         return f"⚠️ Ошибка LLM-сервиса: {params}"
 
-    params = enrich_with_reference_ids(params)
-    print("=== After enrichment ===")
+    started = time.perf_counter()
+    params = await loop.run_in_executor(None, _enrich, params, user_text)
+    print(f"=== After enrichment ({(time.perf_counter() - started) * 1000:.2f} мс) ===")
     print(json.dumps(params, indent=2, ensure_ascii=False))
+    if PARAMS_LOG:
+        # файл пишется в пуле потоков, ответ его не ждёт
+        loop.run_in_executor(None, _append_params_log, json.dumps(params, ensure_ascii=False) + "\n")
 
     # 2. ищем туры в SQLite
-    tours = find_tours(params)
+    tours = await find_tours(params)
     if not tours:
         return "😔 Не нашлось туров по фильтрам. Попробуй изменить условия."
 
     # 3. собираем красивый ответ
     reply = "🔥 Нашёл подходящие туры:\n\n"
     for t in tours:
-        reply += (f"🏨 {t['hotel_name']} ({t['nights']} ночей)\n"
-                  f"💰 {t['price']} {t['currency']}\n"
-                  f"📅 Заезд: {t['check_in']}\n"
-                  f"🔗 {t['url']}\n"
-                  f"🔎 {t['reason']}\n\n")
+        reply += (f"🏨 {t.hotel_name} ({t.nights} ночей)\n"
+                  f"💰 {t.price} {t.currency}\n"
+                  f"📅 Заезд: {t.check_in}\n"
+                  f"🔗 {t.url}\n"
+                  f"🔎 {t.reason}\n\n")
     return reply
\ No newline at end of file
@@ -1,30 +1,19 @@
-import sqlite3
-from utils.config import load_config, get_db_path
-
-config = load_config()
-DB_PATH = get_db_path(config)
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+from data.ingest import upsert_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
 
 def init_db():
-    con = get_connection()
-    cur = con.cursor()
-    cur.executescript(open("data/migrations.sql").read())
-    con.commit()
-    con.close()
+    with get_pool(create=True).write() as con:
+        apply_migrations(con)
 
 def save_tours(tours, country_id, city_id):
-    con = get_connection()
-    cur = con.cursor()
-    for t in tours:
-        cur.execute("""
-            INSERT INTO tours(api_id, country_id, city_id, resort_id, nights, price, url, check_in, adults, kids)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            t.get("id"), country_id, city_id, t.get("resortId"),
-            t.get("nightCount"), t["price"]["amount"], t.get("detailsPageUrl"),
-            t.get("checkInDate"), t.get("adults", 2), t.get("kids", 0)
-        ))
-    con.commit()
-    con.close()
\ No newline at end of file
+    rows = [
+        {
+            "api_id": t.get("id"), "country_id": country_id, "city_id": city_id,
+            "resort_id": t.get("resortId"), "nights": t.get("nightCount"),
+            "price": t["price"]["amount"], "url": t.get("detailsPageUrl"),
+            "check_in": t.get("checkInDate"), "adults": t.get("adults", 2), "kids": t.get("kids", 0),
+        }
+        for t in tours
+    ]
+    return upsert_tours(rows)
@@ -0,0 +1,130 @@
+import re
+import time
+import zlib
+
+import numpy as np
+
+from utils.config import load_config, resolve_path
+from utils.db_pool import get_pool
+
+config = load_config()
+EMB_CFG = config.get("embeddings", {})
+INDEX_PATH = resolve_path(EMB_CFG.get("path", "data/hotel_vectors.npy"))
+DIM = EMB_CFG.get("dim", 2048)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEncoder:
+    """
+    Локальный CPU-энкодер без моделей: слова, их «основы» (первые 5 букв,
+    чтобы 'пляжем' и 'пляж' совпадали) и биграммы хешируются в вектор
+    фиксированной длины, веса — log(tf) * idf, результат L2-нормирован.
+    """
+
+    def __init__(self, dim: int = DIM, idf: np.ndarray | None = None):
+        self.dim = dim
+        self.idf = idf if idf is not None else np.ones(dim, dtype=np.float32)
+
+    @staticmethod
+    def features(text: str) -> list[str]:
+        words = [w for w in _TOKEN_RE.findall(text.lower().replace("ё", "е")) if len(w) > 1]
+        feats = list(words)
+        feats += [w[:5] + "~" for w in words if len(w) > 5]
+        feats += [f"{a}_{b}" for a, b in zip(words, words[1:])]
+        return feats
+
+    def _buckets(self, text: str) -> dict[int, float]:
+        counts = {}
+        for f in self.features(text):
+            h = zlib.crc32(f.encode("utf-8"))
+            idx = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[idx] = counts.get(idx, 0.0) + sign
+        return counts
+
+    def encode(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for idx, c in self._buckets(text or "").items():
+            vec[idx] = np.sign(c) * (1.0 + np.log(abs(c))) if c else 0.0
+        vec *= self.idf
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def fit_idf(self, texts: list[str]) -> None:
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            df[list(self._buckets(text or ""))] += 1
+        self.idf = np.log((1 + len(texts)) / (1 + df)).astype(np.float32) + 1.0
+
+
+class EmbeddingIndex:
+    """Матрица векторов описаний (memory-mapped) + соответствие hotel_api_id → строка."""
+
+    def __init__(self, matrix: np.ndarray, ids: np.ndarray, encoder: HashingEncoder):
+        self.matrix = matrix
+        self.encoder = encoder
+        self.row_of = {int(a): i for i, a in enumerate(ids)}
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "EmbeddingIndex":
+        matrix = np.load(path, mmap_mode="r")
+        ids = np.load(_sidecar(path, "ids"))
+        idf = np.load(_sidecar(path, "idf"))
+        return cls(matrix, ids, HashingEncoder(matrix.shape[1], idf))
+
+    def scores(self, text: str, api_ids: list) -> np.ndarray:
+        """Косинусное сходство текста с каждым отелем; 0 для отелей без вектора."""
+        query = self.encoder.encode(text)
+        rows = [self.row_of.get(a, -1) for a in api_ids]
+        known = np.array([r >= 0 for r in rows], dtype=bool)
+        out = np.zeros(len(rows), dtype=np.float32)
+        if known.any():
+            idx = np.array([r for r in rows if r >= 0])
+            out[known] = self.matrix[idx] @ query
+        return out
+
+
+def _sidecar(path: str, kind: str) -> str:
+    base = path[:-4] if path.endswith(".npy") else path
+    return f"{base}.{kind}.npy"
+
+
+_index = None
+
+
+def get_index() -> EmbeddingIndex | None:
+    """Лениво загружает индекс; None, если он ещё не построен."""
+    global _index
+    if _index is None:
+        try:
+            _index = EmbeddingIndex.load()
+        except FileNotFoundError:
+            return None
+    return _index
+
+
+def build_index(path: str = INDEX_PATH, dim: int = DIM) -> int:
+    """Офлайн-шаг: кодирует все hotel_descriptions в матрицу и сохраняет на диск."""
+    start = time.perf_counter()
+    with get_pool().read() as con:
+        rows = con.execute("""
+            SELECT hotel_api_id, COALESCE(hotel_name, ''), COALESCE(description, '')
+            FROM hotel_descriptions
+            ORDER BY hotel_api_id
+        """).fetchall()
+
+    texts = [f"{name} {desc}" for _, name, desc in rows]
+    encoder = HashingEncoder(dim)
+    encoder.fit_idf(texts)
+    matrix = np.vstack([encoder.encode(t) for t in texts]) if texts else np.zeros((0, dim), dtype=np.float32)
+
+    np.save(path, matrix.astype(np.float32))
+    np.save(_sidecar(path, "ids"), np.array([r[0] for r in rows], dtype=np.int64))
+    np.save(_sidecar(path, "idf"), encoder.idf)
+    print(f"✅ Индекс описаний: {len(rows)} отелей × {dim} за {time.perf_counter() - start:.1f} сек → {path}")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    build_index()
@@ -0,0 +1,134 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+except ImportError:  # без lxml работает прежний разбор через BeautifulSoup
+    lxml = None
+
+# Извлечение описания отеля со страницы travelata.
+# Основной путь — C-парсер lxml и один проход по дереву, в котором собираются
+# .attributes__text, .attributes__icon-text и .attrGroup; результат побайтно
+# совпадает с разбором BeautifulSoup(html.parser) — см. bot_service/bench_extract.py.
+
+TEXT_CLASS = "attributes__text"
+ICON_CLASS = "attributes__icon-text"
+GROUP_CLASS = "attrGroup"
+GROUP_NAME_CLASS = "attrGroupName"
+GROUP_CONTENT_CLASS = "attrGroupContent"
+
+# get_text() у BeautifulSoup не отдаёт текст скриптов, стилей, шаблонов и комментариев
+_SKIP_TAGS = {"script", "style", "template"}
+# libxml2 не разбирает разметку внутри этих тегов (а xmp/iframe/noembed/noframes — и сущности),
+# html.parser разбирает: если внутри есть такие символы, тексты разойдутся
+_RAW_TEXT_TAGS = {"textarea": "<", "title": "<", "xmp": "<&", "iframe": "<&", "noembed": "<&", "noframes": "<&"}
+# </br> html.parser закрывает как отдельный тег (текст по обе стороны — разные строки),
+# libxml2 выбрасывает — приводим к <br>, который оба разбирают одинаково
+_END_BR_RE = re.compile(r"</br\b[^>]*>", re.IGNORECASE)
+# CDATA html.parser отдаёт текстом, libxml2 выбрасывает; <plaintext> у libxml2 съедает остаток страницы
+_REFERENCE_ONLY_RE = re.compile(r"<!\[CDATA\[|<plaintext\b", re.IGNORECASE)
+
+
+def extract_bs4(html: str) -> str:
+    """Эталонный разбор через BeautifulSoup (html.parser)."""
+    soup = BeautifulSoup(html, "html.parser")
+    parts = []
+
+    # основной блок описания
+    text_block = soup.select_one(".attributes__text")
+    if text_block:
+        parts.append(text_block.get_text(" ", strip=True))
+
+    # иконки (пляж, бар и т.д.)
+    icons = [i.get_text(strip=True) for i in soup.select(".attributes__icon-text")]
+    if icons:
+        parts.append(" | ".join(icons))
+
+    # секции .attrGroup (удобства, пляж, спорт и пр.)
+    for g in soup.select(".attrGroup"):
+        title = g.select_one(".attrGroupName")
+        content = g.select_one(".attrGroupContent")
+        if title and content:
+            parts.append(f"{title.get_text(strip=True)}: {content.get_text(' ', strip=True)}")
+
+    return "\n".join(parts).strip()
+
+
+def _strings(el, out: list) -> list:
+    """Текстовые узлы поддерева в порядке документа — как Tag._all_strings в bs4."""
+    if el.text:
+        out.append(el.text)
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TAGS:
+            _strings(child, out)
+        if child.tail:
+            out.append(child.tail)
+    return out
+
+
+def _text(el, sep: str = "") -> str:
+    return sep.join(s for s in (s.strip() for s in _strings(el, [])) if s)
+
+
+def extract_lxml(html: str) -> str:
+    """Разбор через lxml; ValueError — страница, которую libxml2 разберёт не так, как html.parser."""
+    root = lxml.html.document_fromstring(_END_BR_RE.sub("<br>", html))
+    text_block = None
+    icons = []
+    groups = {}          # attrGroup → [название, содержимое], в порядке документа
+
+    for el in root.iter():
+        raw = _RAW_TEXT_TAGS.get(el.tag) if isinstance(el.tag, str) else None
+        if raw and el.text and any(c in el.text for c in raw):
+            raise ValueError(f"<{el.tag}> с разметкой внутри")
+        cls = el.get("class") if isinstance(el.tag, str) else None
+        if not cls:
+            continue
+        classes = cls.split()
+        if TEXT_CLASS in classes and text_block is None:
+            text_block = el
+        if ICON_CLASS in classes:
+            icons.append(el)
+        if GROUP_CLASS in classes:
+            groups[el] = [None, None]
+        for slot, name in ((0, GROUP_NAME_CLASS), (1, GROUP_CONTENT_CLASS)):
+            if name in classes:
+                # первый такой потомок для каждой объемлющей группы
+                for anc in el.iterancestors():
+                    found = groups.get(anc)
+                    if found is not None and found[slot] is None:
+                        found[slot] = el
+
+    parts = []
+    if text_block is not None:
+        parts.append(_text(text_block, " "))
+    if icons:
+        parts.append(" | ".join(_text(i) for i in icons))
+    for title, content in groups.values():
+        if title is not None and content is not None:
+            parts.append(f"{_text(title)}: {_text(content, ' ')}")
+    return "\n".join(parts).strip()
+
+
+def extract_description(html: str) -> str:
+    """Текстовое описание и атрибуты отеля из HTML."""
+    # \r и NUL html.parser и libxml2 обрабатывают по-разному — такие страницы разбираем эталонно
+    if lxml is None or "\r" in html or "\x00" in html or _REFERENCE_ONLY_RE.search(html):
+        return extract_bs4(html)
+    try:
+        return extract_lxml(html)
+    except (ParserError, ValueError):
+        return extract_bs4(html)
+
+
+def extract_many(pages: list[str], workers: int | None = None, chunksize: int = 16) -> list[str]:
+    """Разбор пачки страниц в пуле процессов (разбор упирается в CPU, а не в сеть)."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pages) < chunksize:
+        return [extract_description(p) for p in pages]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_description, pages, chunksize=chunksize))
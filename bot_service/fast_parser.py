@@ -0,0 +1,340 @@
+import calendar
+import datetime
+import re
+
+from bot_service.hotel_features import map_preferences
+from bot_service.tour_search import month_to_number
+from utils.lookup_index import LookupIndex, canonical
+from utils.reference import get_reference
+
+# Быстрый разбор простых запросов без LLM ("Турция из Москвы 7 ночей всё включено до 1000 €").
+# Возвращает ту же JSON-схему, что и SYSTEM_PROMPT в llm_service, плюс уверенность 0–1:
+# доля значимых слов запроса, которые удалось разобрать правилами.
+
+MONTH_STEMS = {
+    "январ": "январь", "феврал": "февраль", "март": "март", "апрел": "апрель",
+    "ма": "май", "июн": "июнь", "июл": "июль", "август": "август",
+    "сентябр": "сентябрь", "октябр": "октябрь", "ноябр": "ноябрь", "декабр": "декабрь",
+}
+_MONTH = r"(январ|феврал|март|апрел|ма(?=[йяе]\b)|июн|июл|август|сентябр|октябр|ноябр|декабр)\w*"
+_MONTH_RE = re.compile(r"\b" + _MONTH)
+# "с 5 по 15 июня", "5-15 июня"; "с 25 июня по 5 июля"
+_RANGE_RE = re.compile(r"\b(?:с\s+)?(\d{1,2})\s*(?:-|–|по|до)\s*(\d{1,2})\s+" + _MONTH)
+_CROSS_RANGE_RE = re.compile(
+    r"\b(?:с\s+)?(\d{1,2})\s+" + _MONTH + r"\s*(?:-|–|по|до)\s*(\d{1,2})\s+" + _MONTH
+)
+_PERIOD_RE = re.compile(r"\b(?:в\s+)?(начал\w*|середин\w*|конц\w*)\s*$")
+_DAY_RE = re.compile(r"\b(\d{1,2})\s*$")
+_ISO_DATE_RE = re.compile(r"\b(20\d\d)-(\d\d)-(\d\d)\b")
+
+_NIGHTS_RE = re.compile(r"\b(\d{1,2})\s*[- ]?\s*(?:ноч\w*|дн\w*|день|сут\w*)")
+_WEEKS_RE = re.compile(r"\b(?:на\s+)?(неделю|две недели|2 недели)\b")
+_BUDGET_RE = re.compile(
+    r"\b(?:до|за|бюджет|около|не дороже)?\s*(\d[\d\s]*\d|\d)\s*(к|тыс\w*\.?)?\s*"
+    r"(€|евро|eur|\$|usd|долл\w*|₽|руб\w*|р\b)"
+)
+_CATEGORY_RE = re.compile(r"\b([2-5])\s*(?:\*|зв\w*)")
+_ADULTS_RE = re.compile(r"\b(\d)\s*взросл\w*")
+_KIDS_RE = re.compile(r"\b(\d)\s*(?:реб\w*|дет\w*)|\bс\s+(?:ребенком|детьми|ребенк\w*)")
+
+MEAL_PHRASES = [
+    "ультра все включено", "ultra all inclusive", "все включено", "all inclusive",
+    "полупансион", "полный пансион", "завтрак и ужин", "завтраки", "завтрак",
+    "без питания", "breakfast", "half board", "full board",
+]
+
+# мягкие пожелания: разложимые на признаки отеля (bot_service.hotel_features) разбираем сами,
+# остальные отправляют запрос в LLM
+_SOFT_PREFERENCE_RE = re.compile(
+    r"\b(?:детск\w* (?:клуб|бассейн)\w*|подогр\w* бассейн\w*|только для взрослых|без детей|"
+    r"\w+ линии|\w+ линия|пляж\w*|песо\w*|песча\w*|галь\w*|тих(?:ий|ая|ое|ие|ого|ой|ом|ую|их|им|о)\b|тишин\w*|спокой\w*|бассейн\w*|"
+    r"горк\w*|аквапарк\w*|анимац\w*|вид\w* на море|с видом|для детей|детск\w*|мини-клуб\w*|"
+    r"семейн\w*|молодеж\w*|вечерин\w*|спа|spa|хамам\w*|фитнес\w*|нов\w+ отел\w*|уютн\w*|"
+    r"романт\w*|рядом с|недалеко|центр\w*|аэропорт\w*|wi-?fi|собак\w*|животн\w*|"
+    r"sea view|beach|quiet|pool|kids club)"
+)
+
+STOPWORDS = {
+    "хочу", "хотим", "хотелось", "бы", "в", "во", "на", "из", "с", "со", "от", "до", "за", "и",
+    "или", "тур", "туры", "тура", "путевку", "поехать", "поедем", "лететь", "полететь", "слетать",
+    "отдых", "отдохнуть", "отдыхать", "нужен", "нужно", "нас", "мы", "для", "примерно", "около",
+    "бюджет", "дороже", "пожалуйста", "плиз", "вылет", "вылетом", "город", "года", "году",
+}
+
+_WORD_RE = re.compile(r"\w+")
+# отрицание ("не Кемер", "без перелёта", "кроме Хургады") правилами не разобрать — такие запросы идут в LLM
+_NEGATION_RE = re.compile(r"\b(?:не|нет|без|кроме|исключая)\b")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.lower().replace("ё", "е")).strip()
+
+
+def _blank(text: str, start: int, end: int) -> str:
+    """Затирает разобранный фрагмент, чтобы потом посчитать неразобранные слова."""
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+class _NameIndex:
+    """
+    Поиск названий из справочника по словоформам: 'москвы' → 'москва', 'египта' → 'египет';
+    латинское написание ('antalya') — через транслитерированные ключи LookupIndex.
+    """
+
+    def __init__(self, lookup: LookupIndex):
+        self.lookup = lookup
+        self.exact = {}
+        self.stems = {}
+        self.phrases = []
+        for id_, name in lookup.name_of.items():
+            key = _normalize(name)
+            self.exact.setdefault(key, (key, id_))
+            words = _WORD_RE.findall(key)
+            if len(words) > 1:
+                pattern = r"\b" + r"\w*\W+".join(re.escape(self._stem(w)) for w in words) + r"\w*"
+                self.phrases.append((re.compile(pattern), key, id_))
+            elif words:
+                self.stems.setdefault(self._stem(key), []).append((key, id_))
+
+    @staticmethod
+    def _stem(word: str) -> str:
+        if len(word) > 4:
+            return word[:max(4, len(word) - 2)]
+        return word[:-1] if len(word) == 4 else word
+
+    def _match_word(self, word: str):
+        if word in self.exact:
+            return self.exact[word]
+        for cut in range(len(word), 2, -1):
+            for key, id_ in sorted(self.stems.get(word[:cut], ())):
+                limit = len(key) + (1 if len(key) <= 4 else 3)
+                if len(word) <= limit:
+                    return key, id_
+        id_ = self.lookup.canon.get(canonical(word))
+        if id_ is not None:
+            return _normalize(self.lookup.name_of[id_]), id_
+        return None
+
+    def find_all(self, text: str) -> list[tuple[int, int, str, int]]:
+        """Все вхождения: (start, end, name, id) в порядке появления."""
+        found = []
+        for pattern, key, id_ in self.phrases:
+            m = pattern.search(text)
+            if m:
+                found.append((m.start(), m.end(), key, id_))
+        for m in _WORD_RE.finditer(text):
+            word = m.group(0)
+            if word in STOPWORDS or any(s <= m.start() < e for s, e, _, _ in found):
+                continue
+            hit = self._match_word(word)
+            if hit:
+                found.append((m.start(), m.end(), hit[0], hit[1]))
+        return sorted(found)
+
+
+_indexes = {}
+
+
+def _index(kind: str) -> _NameIndex:
+    # пересобираем, когда справочники обновились (get_reference вернул новый снимок)
+    source = getattr(get_reference(), kind)
+    cached = _indexes.get(kind)
+    if cached is None or cached.lookup is not source:
+        cached = _indexes[kind] = _NameIndex(source)
+    return cached
+
+
+def _upcoming_year(month: int) -> int:
+    today = datetime.date.today()
+    return today.year if month >= today.month else today.year + 1
+
+
+def _date(year: int, month: int, day: int) -> str | None:
+    if not 1 <= month <= 12 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return f"{year}-{month:02d}-{day:02d}"
+
+
+def _extract_range(text: str, params: dict) -> tuple[str, bool]:
+    """Диапазон дат заезда; некорректный ("с 5 по 40 июня") остаётся в тексте и уводит запрос в LLM."""
+    m = _CROSS_RANGE_RE.search(text)
+    if m:
+        first_day, first_stem, last_day, last_stem = m.groups()
+    else:
+        m = _RANGE_RE.search(text)
+        if not m:
+            return text, False
+        first_day, last_day, first_stem = m.groups()
+        last_stem = first_stem
+    first_month = month_to_number(MONTH_STEMS[first_stem])
+    last_month = month_to_number(MONTH_STEMS[last_stem])
+    year = _upcoming_year(first_month)
+    last_year = year if last_month >= first_month else year + 1
+    date_from = _date(year, first_month, int(first_day))
+    date_to = _date(last_year, last_month, int(last_day))
+    if not date_from or not date_to or date_from > date_to:
+        # диапазон есть, но кривой: ни одной даты из него не берём, фрагмент остаётся неразобранным
+        return text, True
+    params["month"] = MONTH_STEMS[first_stem]
+    params["check_in_range"] = {"from": date_from, "to": date_to}
+    return _blank(text, m.start(), m.end()), True
+
+
+def _extract_dates(text: str, params: dict) -> str:
+    m = _ISO_DATE_RE.search(text)
+    if m:
+        year, month, day = map(int, m.groups())
+        if not _date(year, month, day):
+            # "2026-13-01", "2026-02-30": дату не угадываем, фрагмент остаётся для LLM
+            return text
+        params["check_in_date"] = m.group(0)
+        params["month"] = list(MONTH_STEMS.values())[month - 1]
+        return _blank(text, m.start(), m.end())
+
+    text, found = _extract_range(text, params)
+    if found:
+        return text
+
+    m = _MONTH_RE.search(text)
+    if not m:
+        return text
+    month_name = MONTH_STEMS[m.group(1)]
+    month = month_to_number(month_name)
+    year = _upcoming_year(month)
+    start = m.start()
+
+    before = text[:m.start()]
+    day = _DAY_RE.search(before)
+    period = _PERIOD_RE.search(before)
+    if day:
+        check_in = _date(year, month, int(day.group(1)))
+        if not check_in:
+            # "31 июня": ни дня, ни месяца не берём, фрагмент остаётся неразобранным
+            return text
+        params["check_in_date"] = check_in
+        start = day.start()
+    elif period:
+        last = calendar.monthrange(year, month)[1]
+        first, final = {"нач": (1, 10), "сер": (11, 20), "кон": (21, last)}[period.group(1)[:3]]
+        params["check_in_range"] = {
+            "from": f"{year}-{month:02d}-{first:02d}",
+            "to": f"{year}-{month:02d}-{final:02d}",
+        }
+        start = period.start()
+    params["month"] = month_name
+    return _blank(text, start, m.end())
+
+
+def _extract_numbers(text: str, params: dict) -> str:
+    m = _NIGHTS_RE.search(text)
+    if m:
+        params["duration_days"] = int(m.group(1))
+        text = _blank(text, m.start(), m.end())
+    else:
+        m = _WEEKS_RE.search(text)
+        if m:
+            params["duration_days"] = 7 if m.group(1) == "неделю" else 14
+            text = _blank(text, m.start(), m.end())
+
+    m = _BUDGET_RE.search(text)
+    if m:
+        amount = int(re.sub(r"\s", "", m.group(1)))
+        if m.group(2):
+            amount *= 1000
+        currency = m.group(3)
+        if currency.startswith(("₽", "руб", "р")):
+            amount = amount / 100          # 1 EUR ≈ 100 RUB, как в SYSTEM_PROMPT
+        elif currency.startswith(("$", "usd", "долл")):
+            amount = amount / 1.1
+        params["budget_eur"] = int(round(amount))
+        text = _blank(text, m.start(), m.end())
+
+    m = _CATEGORY_RE.search(text)
+    if m:
+        params["hotel_category"] = f"{m.group(1)}*"
+        text = _blank(text, m.start(), m.end())
+
+    m = _ADULTS_RE.search(text)
+    if m:
+        params["adults"] = int(m.group(1))
+        text = _blank(text, m.start(), m.end())
+    m = _KIDS_RE.search(text)
+    if m:
+        params["kids"] = int(m.group(1)) if m.group(1) else 1
+        text = _blank(text, m.start(), m.end())
+    return text
+
+
+def _extract_meal(text: str, params: dict) -> str:
+    for phrase in MEAL_PHRASES:
+        pos = text.find(phrase)
+        if pos >= 0:
+            params["meal"] = phrase
+            return _blank(text, pos, pos + len(phrase))
+    # название питания прямо из справочника ("ultra ai", "bb" и т.п.)
+    for name in sorted(get_reference().meal.mapping, key=len, reverse=True):
+        key = _normalize(name)
+        m = re.search(rf"\b{re.escape(key)}\b", text) if len(key) > 1 else None
+        if m:
+            params["meal"] = name
+            return _blank(text, m.start(), m.end())
+    return text
+
+
+def _extract_places(text: str, params: dict) -> str:
+    cities = _index("city").find_all(text)
+    if cities:
+        def after_from(hit):
+            prev = text[:hit[0]].split()
+            return bool(prev) and prev[-1] in ("из", "с", "со", "от")
+        start, end, name, _ = sorted(cities, key=lambda h: (not after_from(h), h[0]))[0]
+        params["departure_city"] = name
+        text = _blank(text, start, end)
+
+    for kind, field in (("country", "country"), ("resort", "resort")):
+        hits = _index(kind).find_all(text)
+        if hits:
+            start, end, name, _ = hits[0]
+            params[field] = name
+            text = _blank(text, start, end)
+    return text
+
+
+def fast_parse(user_text: str) -> tuple[dict, float]:
+    params = {
+        "country": "",
+        "departure_city": "",
+        "resort": "",
+        "hotel_category": "",
+        "meal": "",
+        "check_in_date": "",
+        "check_in_range": {"from": "", "to": ""},
+        "month": "",
+        "duration_days": 0,
+        "budget_eur": 0,
+        "adults": 2,
+        "kids": 0,
+        "preferences": [],
+    }
+    text = _normalize(user_text)
+    soft = list(_SOFT_PREFERENCE_RE.finditer(text))
+    params["preferences"] = [m.group(0) for m in soft]
+    # пожелания, которые ложатся на hotel_features, разобраны — LLM для них не нужен
+    _, rest = map_preferences(params["preferences"])
+    for m in soft:
+        if m.group(0) not in rest:
+            text = _blank(text, m.start(), m.end())
+
+    text = _extract_dates(text, params)
+    text = _extract_numbers(text, params)
+    text = _extract_meal(text, params)
+    text = _extract_places(text, params)
+
+    if not params["country"] or _NEGATION_RE.search(text):
+        return params, 0.0
+    words = _WORD_RE.findall(_normalize(user_text))
+    meaningful = [w for w in words if w not in STOPWORDS]
+    leftover = [w for w in _WORD_RE.findall(text) if w not in STOPWORDS]
+    if not meaningful:
+        return params, 0.0
+    return params, round(1 - len(leftover) / len(meaningful), 2)
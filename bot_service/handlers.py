@@ -8,5 +8,5 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_text = update.message.text
     print(f"✉️ Received from user: {user_text}")
-    response = process_user_query(user_text)
+    response = await process_user_query(user_text)
     await update.message.reply_text(response)
\ No newline at end of file
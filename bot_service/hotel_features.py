@@ -0,0 +1,199 @@
+import re
+import time
+
+from utils.config import load_config
+from utils.db_pool import get_pool
+
+# Признаки отелей, извлечённые из hotel_descriptions офлайн (правилами, без LLM):
+# линия и тип пляжа, расстояния до моря и аэропорта, бассейны, детская инфраструктура
+# и т.д. — в таблицу hotel_features. Частые пожелания ("первая линия", "песчаный пляж",
+# "детский клуб") map_preferences переводит в условия по этим колонкам, и sql_filter
+# фильтрует/сортирует по ним сам, не отправляя такие пожелания в LLM.
+#
+#   python -m bot_service.hotel_features      # после bot_service.parser
+
+config = load_config()
+FEATURES_CFG = config.get("features", {})
+# "score" — кандидаты с совпадениями выше в выдаче; "filter" — только отели со всеми признаками
+FEATURES_MODE = FEATURES_CFG.get("mode", "score")
+
+COLUMNS = (
+    "beach_line", "beach_type", "sea_distance_m", "airport_km", "pools", "heated_pool",
+    "kids_pool", "aquapark", "kids_club", "animation", "adults_only", "quiet", "spa", "wifi",
+)
+
+# --- извлечение из описаний ---
+_LINE_RE = re.compile(r"\b(перв\w*|втор\w*|трет\w*|[123](?:-?[а-я]{1,2})?)\s+(?:берегов\w+\s+)?лини")
+_SAND_RE = re.compile(r"песча\w*|песок|песк\w*|sand")
+_PEBBLE_RE = re.compile(r"галеч\w*|гальк\w*|галька|pebble")
+_PLATFORM_RE = re.compile(r"понтон\w*|платформ\w*|пирс\w*")
+# одно число целиком ("Корпус 2 300 м от моря" — это 300 м, а не 2300) и единица отдельным словом
+_DISTANCE = r"(?<![\d.,])(\d+(?:[.,]\d+)?)\s*(км|м|метр\w*)\b\.?"
+_SEA_RE = re.compile(
+    _DISTANCE + r"\s+(?:от|до)\s+(?:моря|пляжа|берега)|(?:от|до)\s+(?:моря|пляжа|берега)\s*[-–:]?\s*" + _DISTANCE
+)
+_AIRPORT_RE = re.compile(
+    _DISTANCE + r"\s+(?:от|до)\s+аэропорт\w*|(?:от|до)\s+аэропорт\w*\s*[-–:]?\s*" + _DISTANCE
+)
+_POOLS_RE = re.compile(r"\b(\d{1,2})\s+(?:\w+\s+)?бассейн")
+_ANY_POOL_RE = re.compile(r"бассейн|pool")
+_FLAGS = {
+    "heated_pool": re.compile(r"подогр\w* бассейн|бассейн\w* с подогрев|heated pool"),
+    "kids_pool": re.compile(r"детск\w* бассейн"),
+    "aquapark": re.compile(r"аквапарк|водн\w* горк|\bгорк|water ?park|slides"),
+    "kids_club": re.compile(r"детск\w* клуб|мини-?клуб|mini ?club|kids club"),
+    "animation": re.compile(r"анимац|animation"),
+    "adults_only": re.compile(r"только для взрослых|adults? only|\b1[68]\s*\+"),
+    "quiet": re.compile(r"\bтих(?:ий|ая|ое|ие|ого|ой|ом|ую|их|им|о)\b|\bтишин\w*|спокойн\w*|уединен\w*|quiet"),
+    "spa": re.compile(r"\bспа\b|\bspa\b|хамам|саун"),
+    "wifi": re.compile(r"wi-?fi|вай-?фай|интернет"),
+}
+
+
+# отрицание перед признаком ("нет анимации", "не на первой линии", "подальше от аэропорта")
+# или после него ("бассейна нет", "анимация для детей отсутствует") — в пределах фразы
+_NEGATED_BEFORE_RE = re.compile(r"\b(?:не(?!\s+только)|нет|без|подальше|далеко)\b(?:\s+\w+)?\s*$")
+_NEGATED_AFTER_RE = re.compile(r"^\w*\s*(?:\w+\s+){0,2}(?:нет|отсутству\w*|не\s+(?:предусмотрен|предоставля|нужн|надо)\w*)\b")
+
+
+def _negated(text: str, m: re.Match) -> bool:
+    return bool(_NEGATED_BEFORE_RE.search(text, 0, m.start()) or _NEGATED_AFTER_RE.match(text[m.end():]))
+
+
+def _search(pattern: re.Pattern, text: str) -> re.Match | None:
+    """Первое совпадение без отрицания рядом."""
+    return next((m for m in pattern.finditer(text) if not _negated(text, m)), None)
+
+
+def _distance(m: re.Match | None) -> float | None:
+    """Расстояние в метрах из совпадения _SEA_RE/_AIRPORT_RE (число и единица — в одной из двух пар групп)."""
+    if m is None:
+        return None
+    value, unit = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+    value = float(value.replace(" ", "").replace(",", "."))
+    return value * 1000 if unit == "км" else value
+
+
+def extract_features(description: str) -> dict:
+    """Признаки отеля по тексту описания; None — в описании об этом ничего нет."""
+    text = re.sub(r"\s+", " ", description.lower().replace("ё", "е"))
+    features = {}
+
+    m = _search(_LINE_RE, text)
+    features["beach_line"] = {"п": 1, "1": 1, "в": 2, "2": 2, "т": 3, "3": 3}[m.group(1)[0]] if m else None
+
+    sand, pebble = bool(_search(_SAND_RE, text)), bool(_search(_PEBBLE_RE, text))
+    if sand and pebble:
+        features["beach_type"] = "mixed"
+    elif sand or pebble:
+        features["beach_type"] = "sand" if sand else "pebble"
+    else:
+        features["beach_type"] = "platform" if _search(_PLATFORM_RE, text) else None
+
+    sea = _distance(_SEA_RE.search(text))
+    features["sea_distance_m"] = int(sea) if sea is not None else None
+    airport = _distance(_AIRPORT_RE.search(text))
+    features["airport_km"] = round(airport / 1000, 1) if airport is not None else None
+
+    counts = [int(m.group(1)) for m in _POOLS_RE.finditer(text) if not _negated(text, m)]
+    features["pools"] = max(counts) if counts else int(bool(_search(_ANY_POOL_RE, text)))
+
+    for name, pattern in _FLAGS.items():
+        features[name] = int(bool(_search(pattern, text)))
+    # "только для взрослых" — заодно и тихий отель
+    features["quiet"] |= features["adults_only"]
+    return features
+
+
+def build_features() -> int:
+    """Офлайн-шаг: пересчитывает hotel_features по всем hotel_descriptions одной транзакцией."""
+    started = time.perf_counter()
+    with get_pool().read() as con:
+        rows = con.execute(
+            "SELECT hotel_api_id, COALESCE(description, '') FROM hotel_descriptions"
+        ).fetchall()
+
+    values = []
+    for api_id, description in rows:
+        features = extract_features(description)
+        values.append((api_id, *(features[c] for c in COLUMNS)))
+
+    sql = f"""
+        INSERT INTO hotel_features (hotel_api_id, {", ".join(COLUMNS)})
+        VALUES ({", ".join("?" * (len(COLUMNS) + 1))})
+        ON CONFLICT (hotel_api_id) DO UPDATE SET
+            {", ".join(f"{c} = excluded.{c}" for c in COLUMNS)},
+            updated_at = CURRENT_TIMESTAMP
+    """
+    with get_pool().write() as con:
+        con.executemany(sql, values)
+    print(f"✅ Признаки отелей: {len(values)} за {time.perf_counter() - started:.1f} сек")
+    return len(values)
+
+
+# --- пожелания пользователя → условия по hotel_features (алиас f в sql_filter) ---
+# порядок важен: более узкие правила раньше ("детский бассейн" — не просто "бассейн"),
+# совпавший фрагмент пожелания дальше не рассматривается
+PREFERENCE_FEATURES = [
+    ("beach_line_1", re.compile(r"перв\w* (?:берегов\w* )?лини\w*|\b1\W*(?:я|й|ой)? лини\w*|на берегу|first line|beachfront"),
+     "f.beach_line = 1"),
+    ("beach_line_2", re.compile(r"втор\w* (?:берегов\w* )?лини\w*|\b2\W*(?:я|й|ой)? лини\w*|second line"),
+     "f.beach_line <= 2"),
+    ("sand_beach", re.compile(r"песо\w*|песча\w*|sand\w*"), "f.beach_type IN ('sand', 'mixed')"),
+    ("pebble_beach", re.compile(r"галь\w*|галеч\w*|pebble\w*"), "f.beach_type IN ('pebble', 'mixed')"),
+    ("near_sea", re.compile(r"(?:рядом|близко|недалеко) (?:с|от|к) (?:мор|пляж)\w*|у моря|near (?:the )?(?:sea|beach)"),
+     "(f.beach_line = 1 OR f.sea_distance_m <= 300)"),
+    ("near_airport", re.compile(r"аэропорт\w*|airport"), "f.airport_km <= 20"),
+    ("heated_pool", re.compile(r"подогр\w* бассейн\w*|бассейн\w* с подогрев\w*|heated pool"), "f.heated_pool = 1"),
+    ("kids_pool", re.compile(r"детск\w* бассейн\w*"), "f.kids_pool = 1"),
+    ("pool", re.compile(r"бассейн\w*|pool"), "f.pools >= 1"),
+    ("aquapark", re.compile(r"аквапарк\w*|горк\w*|water ?park|slides"), "f.aquapark = 1"),
+    ("kids_club", re.compile(r"детск\w* клуб\w*|мини-?клуб\w*|kids club|mini ?club"), "f.kids_club = 1"),
+    ("adults_only", re.compile(r"только для взрослых|без детей|adults? only|\b1[68]\s*\+"), "f.adults_only = 1"),
+    ("kids", re.compile(r"для детей|с детьми|детск\w*|семейн\w*|family|kids"),
+     "(f.kids_club = 1 OR f.kids_pool = 1 OR f.aquapark = 1)"),
+    ("animation", re.compile(r"анимац\w*|animation"), "f.animation = 1"),
+    ("quiet", re.compile(r"\bтих(?:ий|ая|ое|ие|ого|ой|ом|ую|их|им|о)\b|\bтишин\w*|спокой\w*|уединен\w*|quiet"),
+     "f.quiet = 1"),
+    ("spa", re.compile(r"\bспа\b|\bspa\b|хамам\w*|саун\w*"), "f.spa = 1"),
+    ("wifi", re.compile(r"wi-?fi|вай-?фай|интернет\w*"), "f.wifi = 1"),
+]
+FEATURE_CONDITIONS = {key: condition for key, _, condition in PREFERENCE_FEATURES}
+# слова, которые сами по себе не пожелание ("песчаный пляж" → sand_beach, "пляж" остаётся)
+_FILLER_RE = re.compile(r"\b(?:пляж\w*|beach|отел\w*|hotel|рядом|близко|недалеко|хорош\w*|с|со|и|у|на|от|к)\b")
+
+
+def _match_preference(text: str) -> tuple[list[str], str]:
+    """
+    Признаки из одного пожелания и то, что от него осталось неразобранным.
+    Отрицания ("без анимации", "не первая линия", "подальше от аэропорта") в признаки
+    не переводим — такое пожелание остаётся для rerank.
+    """
+    keys = []
+    for key, pattern, _ in PREFERENCE_FEATURES:
+        m = _search(pattern, text)
+        if m:
+            keys.append(key)
+            text = text[:m.start()] + " " + text[m.end():]
+    return keys, _FILLER_RE.sub(" ", text).strip(" ,.-")
+
+
+def map_preferences(preferences: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Делит пожелания на признаки hotel_features (ключи FEATURE_CONDITIONS)
+    и остальное — только оно идёт в LLM/векторный rerank.
+    """
+    features, rest = [], []
+    for pref in preferences:
+        keys, leftover = _match_preference(re.sub(r"\s+", " ", pref.lower().replace("ё", "е")))
+        features += [k for k in keys if k not in features]
+        if leftover or not keys:
+            rest.append(pref)
+    if features:
+        # одни слова-связки ("пляж" рядом с "песчаный") уже покрыты разобранными признаками
+        rest = [p for p in rest if _FILLER_RE.sub(" ", p.lower()).strip(" ,.-")]
+    return features, rest
+
+
+if __name__ == "__main__":
+    build_features()
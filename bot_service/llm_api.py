@@ -0,0 +1,115 @@
+import time
+
+import httpx
+
+from utils.config import load_config
+
+# Асинхронный клиент llm_service: один httpx.AsyncClient на весь бот,
+# чтобы ожидание LLM не блокировало event loop python-telegram-bot.
+
+config = load_config()
+LLM_URL_PARSE = config["llm_service"]["url_parse"]
+LLM_URL_SUMMARIZE = config["llm_service"]["url_summarize"]
+LLM_URL_SIMILARITY = config["llm_service"]["url_similarity"]
+LLM_URL_SIMILARITY_BATCH = config["llm_service"].get(
+    "url_similarity_batch", f"{LLM_URL_SIMILARITY}_batch"
+)
+LLM_URL_SUMMARIZE_BATCH = config["llm_service"].get(
+    "url_summarize_batch", f"{LLM_URL_SUMMARIZE}_batch"
+)
+MAX_CONNECTIONS = config["llm_service"].get("max_connections", 20)
+
+_client: httpx.AsyncClient | None = None
+# llm_service ответил 503 llm_unavailable (breaker открыт) — до этого момента LLM не зовём
+_llm_down_until = 0.0
+
+
+def llm_available() -> bool:
+    return time.monotonic() >= _llm_down_until
+
+
+def _note_unavailable(resp: httpx.Response) -> None:
+    global _llm_down_until
+    if resp.status_code == 503:
+        try:
+            retry_after = float(resp.headers.get("Retry-After", 0))
+        except ValueError:
+            retry_after = 0.0
+        if retry_after:
+            _llm_down_until = time.monotonic() + retry_after
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+
+async def aclose(*_):
+    """Закрывает пул соединений; подходит как post_shutdown-хук Application."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def parse(query: str) -> dict:
+    if not llm_available():
+        return {"error": "llm_unavailable"}
+    try:
+        resp = await get_client().post(LLM_URL_PARSE, json={"query": query}, timeout=60)
+        if resp.status_code == 200:
+            return resp.json()
+        _note_unavailable(resp)
+        return {"error": f"LLM service {resp.status_code}", "details": resp.text}
+    except Exception as e:
+        return {"error": "llm_service_unavailable", "details": str(e)}
+
+
+async def similarity_batch(query: str, hotels: list[dict]) -> list[float] | None:
+    """Оценки /similarity_batch в порядке hotels; None, если сервис не ответил."""
+    if not llm_available():
+        return None
+    try:
+        payload = {"query": query, "hotels": hotels}
+        resp = await get_client().post(LLM_URL_SIMILARITY_BATCH, json=payload, timeout=180)
+        _note_unavailable(resp)
+        scores = resp.json().get("scores", []) if resp.is_success else []
+    except Exception:
+        scores = []
+    if len(scores) != len(hotels):
+        return None
+    # null — сервис не смог оценить отель: ставим его в конец, не выкидывая
+    return [float(s) if s is not None else 0.0 for s in scores]
+
+
+async def summarize(query: str, hotel: dict) -> str:
+    """Сырой текст /summarize; при ошибке сервиса бросает RuntimeError."""
+    if not llm_available():
+        raise RuntimeError("LLM временно недоступен")
+    resp = await get_client().post(LLM_URL_SUMMARIZE, json={"query": query, "hotel": hotel}, timeout=25)
+    if not resp.is_success:
+        _note_unavailable(resp)
+        raise RuntimeError(f"Ошибка {resp.status_code}")
+    data = resp.json()
+    return data.get("summary") or data.get("response") or resp.text
+
+
+async def summarize_batch(query: str, hotels: list[dict], timeout: float = 60) -> dict[str, str]:
+    """Сырые тексты /summarize_batch по id отеля; при ошибке сервиса бросает RuntimeError."""
+    if not llm_available():
+        raise RuntimeError("LLM временно недоступен")
+    resp = await get_client().post(
+        LLM_URL_SUMMARIZE_BATCH, json={"query": query, "hotels": hotels}, timeout=timeout
+    )
+    if not resp.is_success:
+        _note_unavailable(resp)
+        raise RuntimeError(f"Ошибка {resp.status_code}")
+    return resp.json().get("summaries", {})
@@ -1,12 +1,25 @@
 from utils.config import load_config
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
-from bot_service import handlers
+from bot_service import handlers, llm_api
+from utils.db_pool import get_pool
+from utils.reference import get_reference
 
 config = load_config()
 
 def main():
     token = config["telegram"]["token"]
-    app = Application.builder().token(token).build()
+    # нет файла базы — падаем при старте с понятной ошибкой, а не на первом сообщении
+    get_pool()
+    # справочники (и LookupIndex по ним) загружаются сейчас, а не на первом сообщении
+    get_reference()
+    # concurrent_updates: пока один пользователь ждёт LLM, остальные тоже обслуживаются
+    app = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(True)
+        .post_shutdown(llm_api.aclose)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", handlers.start))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.handle_message))
@@ -1,11 +1,31 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class Tour:
+    """
+    Кандидат поиска: строится прямо из строки sql_filter (поля в порядке SELECT).
+    __slots__ вместо dict на каждую строку — меньше памяти и аллокаций на запрос.
+    description загружается лениво (attach_descriptions) и хранится одной
+    ссылкой на общую строку — туры одного отеля делят её, а не копируют.
+    """
     id: int
     hotel_name: str
     nights: int
     price: int
+    currency: str | None
     url: str
     check_in: str
+    hotel_category_id: int | None = None
+    meal_id: int | None = None
+    resort_id: int | None = None
+    api_id: int | None = None
+    # сколько признаков из params["features"] есть у отеля (hotel_features)
+    feature_score: int = 0
+    # BM25 совпадения описания с пожеланиями (hotel_search), больше — лучше
+    text_score: float = 0.0
+    description: str | None = None
+    reason: str = ""
 
+    @classmethod
+    def from_row(cls, row) -> "Tour":
+        return cls(*row)
@@ -1,108 +1,225 @@
-import sqlite3
+import asyncio
+import os
+import sys
 import time
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
-
-from utils.config import load_config, get_db_path
-
-DB_PATH = get_db_path(load_config())
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from bot_service.extract import extract_description
+from utils.config import load_config
+from utils.db_pool import get_pool
+from utils.rate_limit import AsyncTokenBucket, HostRateLimiter
+
+# Сбор описаний отелей: сначала обычный HTTP-запрос (быстро и без браузера),
+# headless-браузер — только для страниц, где описание дорисовывает JavaScript.
+# Ограничение частоты — на каждый хост отдельно (раздел scraper в config.yaml).
+#
+#   python -m bot_service.parser [limit]
+
+config = load_config()
+SCRAPER_CFG = config.get("scraper", {})
+WORKERS = SCRAPER_CFG.get("workers", 8)
+BROWSER_CONTEXTS = SCRAPER_CFG.get("browser_contexts", 2)
+HTTP_TIMEOUT = SCRAPER_CFG.get("timeout_sec", 30)
+SELECTOR = ".attributes__text"
+SELECTOR_TIMEOUT_MS = SCRAPER_CFG.get("selector_timeout_ms", 15000)
+BATCH_SIZE = SCRAPER_CFG.get("batch_size", 20)
+PARSE_PROCESSES = SCRAPER_CFG.get("parse_processes", min(4, os.cpu_count() or 1))
+# куда складывать скачанные страницы (корпус для bot_service/bench_extract.py); пусто — не сохранять
+SAVE_HTML_DIR = SCRAPER_CFG.get("save_html_dir")
+USER_AGENT = SCRAPER_CFG.get(
+    "user_agent",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+)
+
+limiter = HostRateLimiter(
+    SCRAPER_CFG.get("rate_per_sec", 1.0), SCRAPER_CFG.get("burst", 2),
+    SCRAPER_CFG.get("hosts", {}), bucket_cls=AsyncTokenBucket,
+)
 
 
 def parse_hotel_description(html: str) -> str:
     """Извлекает текстовое описание и атрибуты из HTML."""
-    soup = BeautifulSoup(html, "html.parser")
-    parts = []
-
-    # основной блок описания
-    text_block = soup.select_one(".attributes__text")
-    if text_block:
-        parts.append(text_block.get_text(" ", strip=True))
-
-    # иконки (пляж, бар и т.д.)
-    icons = [i.get_text(strip=True) for i in soup.select(".attributes__icon-text")]
-    if icons:
-        parts.append(" | ".join(icons))
-
-    # секции .attrGroup (удобства, пляж, спорт и пр.)
-    for g in soup.select(".attrGroup"):
-        title = g.select_one(".attrGroupName")
-        content = g.select_one(".attrGroupContent")
-        if title and content:
-            parts.append(f"{title.get_text(strip=True)}: {content.get_text(' ', strip=True)}")
-
-    return "\n".join(parts).strip()
-
-
-def hotel_exists(cur, api_id: int) -> bool:
-    """Проверяет, есть ли отель уже в hotel_descriptions."""
-    cur.execute("SELECT 1 FROM hotel_descriptions WHERE hotel_api_id = ?", (api_id,))
-    return cur.fetchone() is not None
-
-
-def scrape_hotels(batch_size: int = 10):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.row_factory = sqlite3.Row
-
-    # получаем уникальные отели без описаний
-    hotels = cur.execute("""
-        SELECT DISTINCT api_id, hotel_name, url
-        FROM tours
-        WHERE url IS NOT NULL
-        ORDER BY api_id
-    """).fetchall()
-
-    print(f"Всего найдено {len(hotels)} уникальных отелей.")
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                       "AppleWebKit/537.36 (KHTML, like Gecko) "
-                       "Chrome/122.0.0.0 Safari/537.36",
-            locale="ru-RU",
-        )
-        page = context.new_page()
-
-        processed = 0
-        for h in hotels:
-            api_id, name, url = h["api_id"], h["hotel_name"], h["url"]
-
-            # проверяем перед парсингом
-            if hotel_exists(cur, api_id):
-                continue
-
-            print(f"→ [{processed+1}/{len(hotels)}] {api_id}: {name}")
-
+    return extract_description(html)
+
+
+def pending_hotels(limit: int | None = None) -> list[tuple[int, str, str]]:
+    """
+    Отели из tours, которых ещё нет в hotel_descriptions, — одним запросом
+    (разность множеств), а не проверкой каждого отеля по отдельности.
+    """
+    query = """
+        SELECT t.api_id, MIN(t.hotel_name), MIN(t.url)
+        FROM tours AS t
+        WHERE t.url IS NOT NULL AND t.api_id IS NOT NULL
+          AND t.api_id IN (
+              SELECT api_id FROM tours
+              EXCEPT
+              SELECT hotel_api_id FROM hotel_descriptions
+          )
+        GROUP BY t.api_id
+        ORDER BY t.api_id
+    """
+    args = ()
+    if limit:
+        query += " LIMIT ?"
+        args = (limit,)
+    with get_pool().read() as con:
+        return con.execute(query, args).fetchall()
+
+
+class BrowserPool:
+    """
+    Ограниченный пул headless-контекстов Chromium; запускается лениво —
+    если все страницы отдались обычным HTTP, браузер не стартует вовсе.
+    """
+
+    def __init__(self, size: int = BROWSER_CONTEXTS):
+        self.size = size
+        self._contexts = asyncio.Queue()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+        self._playwright = None
+        self._browser = None
+
+    async def _start(self):
+        async with self._start_lock:
+            if self._started:
+                return
+            from playwright.async_api import async_playwright  # нужен только для JS-страниц
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            for _ in range(self.size):
+                context = await self._browser.new_context(user_agent=USER_AGENT, locale="ru-RU")
+                self._contexts.put_nowait(context)
+            self._started = True
+
+    async def render(self, url: str) -> str:
+        await self._start()
+        context = await self._contexts.get()
+        page = await context.new_page()
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            try:
+                await page.wait_for_selector(SELECTOR, timeout=SELECTOR_TIMEOUT_MS)
+            except Exception:
+                pass  # описания нет — разберём то, что успело отрисоваться
+            return await page.content()
+        finally:
+            await page.close()
+            self._contexts.put_nowait(context)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+
+def _save_html(api_id: int, html: str) -> None:
+    if SAVE_HTML_DIR:
+        os.makedirs(SAVE_HTML_DIR, exist_ok=True)
+        with open(os.path.join(SAVE_HTML_DIR, f"{api_id}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+
+
+async def _parse(parse_pool: ProcessPoolExecutor | None, html: str) -> str:
+    if not html:
+        return ""
+    if parse_pool is None:
+        return parse_hotel_description(html)
+    return await asyncio.get_running_loop().run_in_executor(parse_pool, parse_hotel_description, html)
+
+
+async def fetch_description(client: httpx.AsyncClient, browsers: BrowserPool, api_id: int, url: str,
+                            stats: dict, parse_pool: ProcessPoolExecutor | None = None) -> str:
+    await limiter.bucket(url).acquire()
+    html = ""
+    try:
+        resp = await client.get(url)
+        if resp.status_code == 200:
+            html = resp.text
+    except httpx.HTTPError as e:
+        print(f"⚠️ HTTP {api_id}: {e}")
+
+    desc = await _parse(parse_pool, html)
+    if desc:
+        stats["http"] += 1
+    else:
+        # в исходном HTML блока описания нет — его рисует JavaScript
+        await limiter.bucket(url).acquire()
+        html = await browsers.render(url)
+        desc = await _parse(parse_pool, html)
+        stats["browser"] += 1
+    _save_html(api_id, html)
+    return desc
+
+
+def _store(rows: list[tuple]) -> None:
+    with get_pool().write() as con:
+        con.executemany("""
+            INSERT OR IGNORE INTO hotel_descriptions (hotel_api_id, hotel_name, description)
+            VALUES (?, ?, ?)
+        """, rows)
+
+
+async def scrape_hotels_async(limit: int | None = None) -> dict:
+    hotels = pending_hotels(limit)
+    print(f"Отелей без описания: {len(hotels)} (потоков: {WORKERS}, браузерных контекстов: {BROWSER_CONTEXTS})")
+
+    started = time.perf_counter()
+    stats = {"http": 0, "browser": 0, "saved": 0, "empty": 0, "errors": 0}
+    slots = asyncio.Semaphore(WORKERS)
+    browsers = BrowserPool()
+    pending_rows = []
+
+    async def one(api_id, name, url):
+        async with slots:
             try:
-                page.goto(url, wait_until="networkidle", timeout=60000)
-                time.sleep(10)
-                html = page.content()
-                desc = parse_hotel_description(html)
+                desc = await fetch_description(client, browsers, api_id, url, stats, parse_pool)
             except Exception as e:
+                stats["errors"] += 1
                 print(f"⚠️ Ошибка загрузки {api_id}: {e}")
-                continue
-
-            if desc:
-                cur.execute("""
-                    INSERT OR IGNORE INTO hotel_descriptions (hotel_api_id, hotel_name, description)
-                    VALUES (?, ?, ?)
-                """, (api_id, name, desc))
-                con.commit()
-                print(f"✅ Сохранено: {api_id} ({len(desc)} символов)")
-            else:
-                print(f"⚠️ Пустое описание: {api_id}")
-
-            processed += 1
-            if processed % batch_size == 0:
-                print(f"⏸️ Обработано {processed}, маленькая пауза...")
-                time.sleep(5)
-            else:
-                time.sleep(2)
-
-        browser.close()
-    con.close()
+                return
+        if not desc:
+            stats["empty"] += 1
+            print(f"⚠️ Пустое описание: {api_id}")
+            return
+        pending_rows.append((api_id, name, desc))
+        stats["saved"] += 1
+        if len(pending_rows) >= BATCH_SIZE:
+            rows = pending_rows[:]
+            pending_rows.clear()
+            await asyncio.get_running_loop().run_in_executor(None, _store, rows)
+            print(f"✅ Сохранено {stats['saved']}/{len(hotels)}")
+
+    limits = httpx.Limits(max_connections=WORKERS, max_keepalive_connections=WORKERS)
+    headers = {"User-Agent": USER_AGENT, "Accept-Language": "ru-RU,ru;q=0.9"}
+    # разбор HTML упирается в CPU — выносим его из event loop в отдельные процессы
+    parse_pool = ProcessPoolExecutor(PARSE_PROCESSES) if PARSE_PROCESSES > 1 else None
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=limits, headers=headers,
+                                 follow_redirects=True) as client:
+        try:
+            await asyncio.gather(*(one(*h) for h in hotels))
+        finally:
+            await browsers.close()
+            if parse_pool is not None:
+                parse_pool.shutdown()
+    if pending_rows:
+        _store(pending_rows)
+
+    sec = time.perf_counter() - started
+    print(f"🏁 Описаний: {stats['saved']} за {sec:.1f} сек (HTTP: {stats['http']}, браузер: {stats['browser']}, "
+          f"пустых: {stats['empty']}, ошибок: {stats['errors']})")
+    return stats
+
+
+def scrape_hotels(limit: int | None = None) -> dict:
+    return asyncio.run(scrape_hotels_async(limit))
 
 
 if __name__ == "__main__":
-    scrape_hotels(batch_size=20)
\ No newline at end of file
+    scrape_hotels(int(sys.argv[1]) if len(sys.argv) > 1 else None)
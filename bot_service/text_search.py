@@ -0,0 +1,48 @@
+import re
+
+from utils.config import load_config
+
+# Отбор отелей по пожеланиям через FTS5-индекс описаний (data/hotel_search.sql):
+# sql_filter join'ит совпадения с фильтрами туров и сортирует их по BM25,
+# так что rerank видит только отели, в описании которых есть запрошенное.
+#
+#   python -m bot_service.text_search      # переиндексировать описания целиком
+
+config = load_config()
+# false — пожелания в SQL не участвуют, как раньше
+TEXT_MATCH = config.get("search", {}).get("text_match", True)
+# вес названия отеля и описания в bm25(): названия почти не говорят о пляже и бассейнах
+BM25_WEIGHTS = (0.5, 1.0)
+
+_WORD_RE = re.compile(r"\w+")
+# есть почти в каждом описании или ничего не уточняют
+_STOPWORDS = {
+    "на", "в", "во", "с", "со", "и", "у", "к", "от", "до", "для", "по", "не", "the", "a", "with",
+    "отель", "отеля", "отели", "отелем", "hotel", "хороший", "хорошая", "хорошее", "хочу", "чтобы",
+}
+
+
+def _stem(word: str) -> str:
+    """Грубая основа слова под префиксный запрос: 'моря' → 'мор', 'песчаный' → 'песча'."""
+    return word[:min(5, max(3, len(word) - 2))]
+
+
+def match_expression(preferences: list[str]) -> str | None:
+    """
+    FTS5-запрос из пожеланий: слова одного пожелания — через AND, пожелания — через OR
+    ("вид на море", "романтика" → ("вид"* "мор"*) OR ("роман"*)); None — искать нечего.
+    """
+    groups = []
+    for pref in preferences:
+        words = [w for w in _WORD_RE.findall(pref.lower().replace("ё", "е")) if w not in _STOPWORDS and len(w) > 1]
+        if words:
+            groups.append("(" + " ".join(f'"{_stem(w)}"*' for w in words) + ")")
+    return " OR ".join(dict.fromkeys(groups)) or None
+
+
+if __name__ == "__main__":
+    from data.migrate import rebuild_hotel_search
+    from utils.db_pool import get_pool
+
+    with get_pool().write() as con:
+        print(f"✅ Проиндексировано описаний: {rebuild_hotel_search(con)}")
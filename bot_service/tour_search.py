@@ -1,20 +1,57 @@
+import asyncio
 import json
 import re
-import sqlite3
 import datetime
+import sqlite3
 import time
 
-import requests
 from math import fabs
-from utils.config import load_config, get_db_path
-from utils.db_helpers import get_meal_ids_by_name
+from utils.config import load_config
+from utils.db_pool import get_pool
+from utils.db_helpers import get_meal_ids_by_name, get_hotel_category_name_by_id, get_meal_name_by_id
+from utils.rate_limit import AsyncTokenBucket
+from bot_service import llm_api
+from bot_service.models import Tour
+from bot_service.embeddings import get_index
+from bot_service.hotel_features import FEATURE_CONDITIONS, FEATURES_MODE
+from bot_service.text_search import BM25_WEIGHTS, TEXT_MATCH, match_expression
 
 # === Config ===
 config = load_config()
-DB_PATH = get_db_path(config)
-LLM_URL_PARSE = config["llm_service"]["url_parse"]
-LLM_URL_SUMMARIZE = config["llm_service"]["url_summarize"]
-LLM_URL_SIMILARITY = config["llm_service"]["url_similarity"]
+# сколько символов описания отеля читаем из базы (один раз) и сколько отдаём в rerank-prompt
+DESCRIPTION_CHARS = 1500
+RERANK_DESCRIPTION_CHARS = 1000
+# "llm" — каждый кандидат через /similarity_batch;
+# "vector" — локальный индекс описаний, LLM только для первых llm_top_n;
+# "cascade" — дешёвая оценка всех кандидатов, LLM только для первых cascade_top_n, всё в пределах budget_ms
+RERANK_CFG = config.get("rerank", {})
+RERANK_MODE = RERANK_CFG.get("mode", "llm")
+RERANK_LLM_TOP_N = RERANK_CFG.get("llm_top_n", 0)
+CASCADE_TOP_N = RERANK_CFG.get("cascade_top_n", 20)
+RERANK_BUDGET_MS = RERANK_CFG.get("budget_ms", 5000)
+# тайминги и размеры этапов каскада (JSONL, как search.params_log; пусто — не пишем)
+CASCADE_LOG = RERANK_CFG.get("cascade_log")
+# веса дешёвого этапа (в сумме 1, каждая часть — от 0 до 1): цена (0 — самый дорогой кандидат,
+# 1 — самый дешёвый), BM25 описания (нормирован на лучший), доля совпавших из запрошенных
+# категории/питания, векторный индекс (нормирован на разброс среди кандидатов)
+CHEAP_WEIGHTS = {"price": 0.2, "text": 0.35, "match": 0.15, "vector": 0.3}
+# вес оценки LLM на втором этапе; остальное — оценка первого этапа
+CASCADE_LLM_WEIGHT = RERANK_CFG.get("cascade_llm_weight", 0.6)
+# прибавка к оценке rerank за каждый совпавший признак отеля (hotel_features)
+FEATURE_WEIGHT = config.get("features", {}).get("weight", 0.1)
+# /summarize: сколько запросов одновременно, сколько в секунду (под квоты OpenRouter)
+# и сколько секунд ждём всех — опоздавшие получают шаблонное объяснение
+SUMMARY_CFG = config.get("summarize", {})
+# "batch" — один /summarize_batch на весь топ; "concurrent" — /summarize на каждый отель
+SUMMARY_MODE = SUMMARY_CFG.get("mode", "batch")
+SUMMARY_DEADLINE = SUMMARY_CFG.get("deadline_sec", 20)
+# в режиме "batch": отелей в одном запросе /summarize_batch; при нескольких запросах
+# опоздание одного не отнимает объяснения, уже полученные от других
+SUMMARY_BATCH_SIZE = SUMMARY_CFG.get("batch_size", 5)
+_summary_slots = asyncio.Semaphore(SUMMARY_CFG.get("concurrency", 3))
+_summary_bucket = AsyncTokenBucket(
+    SUMMARY_CFG.get("rate_per_sec", 1.0), SUMMARY_CFG.get("burst", 3)
+)
 
 # === Helper functions ===
 def month_to_number(month_str: str) -> int:
@@ -38,38 +75,23 @@ def add_days(date_str: str, days: int) -> str:
     except Exception:
         return date_str
 
-def get_city_id_by_name(city_name: str) -> int | None:
-    if not city_name:
-        return None
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "SELECT id FROM cities WHERE LOWER(name) LIKE ? LIMIT 1",
-        (f"%{city_name.lower()}%",)
-    )
-    row = cur.fetchone()
-    con.close()
-    return row[0] if row else None
-
-def get_country_id_by_name(country_name: str) -> int | None:
-    if not country_name:
-        return None
-    name = country_name.lower().strip()
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "SELECT id FROM countries WHERE LOWER(name) LIKE ? LIMIT 1",
-        (f"%{name}%",),
-    )
-    row = cur.fetchone()
-    con.close()
-    return row[0] if row else None
-
 # === SQL filter ===
-def sql_filter(params, limit=100):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    query = """
+def build_filter_query(params, limit=100, text_match=True):
+    """SQL и параметры для sql_filter (отдельно — чтобы data/index_advisor.py мог сделать EXPLAIN)."""
+    # дубли (отель, дата заезда) отсекает sql_filter, читая выдачу страницами :limit/:offset;
+    # оконная функция в SQL сортировала бы все подходящие строки, а не только первые
+    features = [k for k in params.get("features") or [] if k in FEATURE_CONDITIONS]
+    # признаки отеля (hotel_features): число совпавших — feature_score, NULL (неизвестно) не совпадает
+    feature_score = " + ".join(f"COALESCE({FEATURE_CONDITIONS[k]}, 0)" for k in features) or "0"
+    # оставшиеся пожелания — полнотекстом по описаниям: только упомянутые отели, по убыванию BM25
+    fts_match = match_expression(params.get("preferences") or []) if text_match and TEXT_MATCH else None
+    fts_join = f"""
+            JOIN (
+                SELECT rowid AS hotel_api_id, -bm25(hotel_search, {", ".join(map(str, BM25_WEIGHTS))}) AS text_score
+                FROM hotel_search
+                WHERE hotel_search MATCH :fts_match
+            ) AS m ON m.hotel_api_id = t.api_id""" if fts_match else ""
+    query = f"""
         SELECT t.id,
                t.hotel_name,
                t.nights,
@@ -80,13 +102,14 @@ def sql_filter(params, limit=100):
                t.hotel_category_id,
                t.meal_id,
                t.resort_id,
-               hd.description
+               t.api_id,
+               {feature_score} AS feature_score,
+               {"m.text_score" if fts_match else "0"} AS text_score
         FROM tours AS t
-        LEFT JOIN hotel_descriptions AS hd
-            ON t.api_id = hd.hotel_api_id
+        {"LEFT JOIN hotel_features AS f ON f.hotel_api_id = t.api_id" if features else ""}{fts_join}
         WHERE 1=1
     """
-    q_params = {}
+    q_params = {"fts_match": fts_match} if fts_match else {}
     # --- фильтры ---
     if params.get("country_id"):
         query += " AND t.country_id = :country_id"
@@ -146,64 +169,250 @@ def sql_filter(params, limit=100):
     elif params.get("month"):
         m = month_to_number(params["month"])
         if m:
-            query += " AND CAST(strftime('%m', t.check_in) AS INT) = :month"
+            query += " AND t.check_in_month = :month"
             q_params["month"] = m
 
-    query += " ORDER BY t.price ASC LIMIT :limit"
+    # --- признаки отеля ---
+    if features and FEATURES_MODE == "filter":
+        for k in features:
+            query += f" AND {FEATURE_CONDITIONS[k]}"
+
+    query += f"""
+        ORDER BY {"feature_score DESC, " if features else ""}{"text_score DESC, " if fts_match else ""}t.price, t.id
+        LIMIT :limit OFFSET :offset
+    """
     q_params["limit"] = limit
+    q_params["offset"] = 0
+    return query, q_params
+
+def _unique_offers(con, query, q_params, limit):
+    """
+    Первые limit уникальных (отель, дата заезда) — у каждого самый дешёвый тур.
+    Страница вдвое больше limit (дубли по ночам и городам вылета), следующая — ещё вдвое,
+    так что SQLite сортирует лишь верхушку выдачи (top-N), а не все подходящие туры.
+    """
+    rows, seen = [], set()
+    page, offset = limit * 2, 0
+    while True:
+        batch = con.execute(query, {**q_params, "limit": page, "offset": offset}).fetchall()
+        for row in batch:
+            key = (row[1], row[6])
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append(row)
+            if len(rows) == limit:
+                return rows
+        if len(batch) < page:
+            return rows
+        offset += page
+        page *= 2
+
+def sql_filter(params, limit=100):
+    query, q_params = build_filter_query(params, limit)
+    with get_pool().read() as con:
+        try:
+            rows = _unique_offers(con, query, q_params, limit)
+        except sqlite3.OperationalError as e:
+            if "fts_match" not in q_params:
+                raise
+            # база без hotel_search (SQLite без FTS5, миграция не применена)
+            print(f"⚠️ Полнотекстовый отбор недоступен: {e}")
+            rows = []
+        if not rows and "fts_match" in q_params:
+            # ни одно описание не упоминает пожелания — отдаём в rerank всех кандидатов, как раньше
+            query, q_params = build_filter_query(params, limit, text_match=False)
+            rows = _unique_offers(con, query, q_params, limit)
 
-    cur.execute(query, q_params)
-    rows = cur.fetchall()
-    con.close()
+    return [Tour.from_row(row) for row in rows]
 
-    results = [
+def attach_descriptions(tours, max_chars=DESCRIPTION_CHARS):
+    """
+    Подтягивает описания отелей одним запросом и только для переданных туров —
+    sql_filter их не читает, до LLM доходит лишь часть кандидатов.
+    """
+    pending = [t for t in tours if t.description is None]
+    ids = sorted({t.api_id for t in pending if t.api_id is not None})
+    found = {}
+    if ids:
+        placeholders = ",".join("?" * len(ids))
+        with get_pool().read() as con:
+            found = dict(con.execute(
+                f"SELECT hotel_api_id, substr(description, 1, ?) FROM hotel_descriptions "
+                f"WHERE hotel_api_id IN ({placeholders})",
+                [max_chars, *ids],
+            ).fetchall())
+    for t in pending:
+        t.description = found.get(t.api_id) or ""
+    return tours
+
+async def _attach_descriptions_async(tours):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, attach_descriptions, tours)
+
+# === RAG rerank via LLM similarity ===
+async def _llm_scores(pref_text, tours):
+    """Оценки /similarity_batch для всех туров; None, если сервис не ответил."""
+    if not llm_api.llm_available():
+        return None
+    await _attach_descriptions_async(tours)
+    hotels = [
         {
-            "id": row[0],
-            "hotel_name": row[1],
-            "nights": row[2],
-            "price": row[3],
-            "currency": row[4],
-            "url": row[5],
-            "check_in": row[6],
-            "hotel_category_id": row[7],
-            "meal_id": row[8],
-            "resort_id": row[9],
-            "description": row[10] or "",
+            "id": t.api_id,
+            "context": f"{t.hotel_name} cat:{t.hotel_category_id} meal:{t.meal_id} {t.description[:RERANK_DESCRIPTION_CHARS]}",
         }
-        for row in rows
+        for t in tours
     ]
-    uniq = {}
-    for t in results:
-        k = (t["hotel_name"], t["check_in"])
-        if k not in uniq:
-            uniq[k] = t
-    return list(uniq.values())
+    return await llm_api.similarity_batch(pref_text, hotels)
 
-# === RAG rerank via LLM similarity ===
-def rag_rerank(tours, preferences, duration_days=None, top_k=5):
+def _vector_scores(pref_text, tours):
+    """Оценки по локальному индексу описаний; None, если индекс не построен."""
+    index = get_index()
+    if index is None:
+        return None
+    return index.scores(pref_text, [t.api_id for t in tours]).tolist()
+
+def _default_order(t):
+    """Порядок без оценок rerank: сначала отели с совпавшими признаками и текстом, затем ближайшие и дешёвые."""
+    return (-t.feature_score, -t.text_score, t.check_in, t.price)
+
+def _rank(tours, scores, duration_days=None):
+    scored = []
+    for t, score in zip(tours, scores):
+        score += t.feature_score * FEATURE_WEIGHT
+        if duration_days and t.nights:
+            score -= fabs(t.nights - duration_days) * 0.05
+        scored.append((t, score))
+    best = sorted(scored, key=lambda x: (-x[1], x[0].check_in, x[0].price))
+    return [t for t, _ in best]
+
+async def rag_rerank(tours, preferences, duration_days=None, top_k=5, mode=None):
     if not tours:
         return []
     if not preferences:
-        return sorted(tours, key=lambda t: (t["check_in"], t["price"]))[:top_k]
+        return sorted(tours, key=_default_order)[:top_k]
     pref_text = ", ".join(preferences)
-    scored = []
-    for t in tours:
-        tour_text = f"{t['hotel_name']} cat:{t['hotel_category_id']} meal:{t['meal_id']} {t.get('description','')[:1000]}"
+    mode = mode or RERANK_MODE
+
+    scores = _vector_scores(pref_text, tours) if mode == "vector" else None
+    if scores is None:
+        scores = await _llm_scores(pref_text, tours)
+        if scores is None:
+            # LLM недоступен (breaker открыт, таймаут) — ранжируем без него
+            scores = _vector_scores(pref_text, tours)
+        if scores is None:
+            return sorted(tours, key=_default_order)[:top_k]
+        return _rank(tours, scores, duration_days)[:top_k]
+
+    ranked = _rank(tours, scores, duration_days)
+    if RERANK_LLM_TOP_N:
+        # второй этап: LLM переоценивает только верх векторного списка
+        head = ranked[:RERANK_LLM_TOP_N]
+        llm_scores = await _llm_scores(pref_text, head)
+        if llm_scores is not None:
+            ranked = _rank(head, llm_scores, duration_days) + ranked[RERANK_LLM_TOP_N:]
+    return ranked[:top_k]
+
+# === Cascade rerank ===
+def _matches(value, wanted):
+    if not wanted:
+        return False
+    return value in wanted if isinstance(wanted, list) else value == wanted
+
+def _normalized(values):
+    """Min-max в [0, 1]; все равны — все 1."""
+    lo, hi = min(values), max(values)
+    return [(v - lo) / (hi - lo) if hi > lo else 1.0 for v in values]
+
+def _cheap_scores(tours, params, pref_text):
+    """Этап 1: оценка всех кандидатов без сети — цена, BM25, категория/питание, локальный векторный индекс."""
+    cheap = _normalized([-(t.price or 0) for t in tours])
+    best_text = max(t.text_score for t in tours)
+    vector = _vector_scores(pref_text, tours) if pref_text else None
+    if vector is not None:
+        vector = _normalized(vector)
+    wanted = [w for w in (params.get("hotel_category_id"), params.get("meal_id")) if w]
+    scores = []
+    for i, t in enumerate(tours):
+        score = CHEAP_WEIGHTS["price"] * cheap[i]
+        if best_text > 0:
+            score += CHEAP_WEIGHTS["text"] * t.text_score / best_text
+        if wanted:
+            matched = _matches(t.hotel_category_id, params.get("hotel_category_id")) + _matches(t.meal_id, params.get("meal_id"))
+            score += CHEAP_WEIGHTS["match"] * matched / len(wanted)
+        if vector is not None:
+            score += CHEAP_WEIGHTS["vector"] * vector[i]
+        scores.append(score)
+    return scores
+
+def _blend(cheap, llm):
+    """Этап 2 не отменяет первый: оценка LLM смешивается с ценой, BM25 и остальным."""
+    return [(1 - CASCADE_LLM_WEIGHT) * c + CASCADE_LLM_WEIGHT * s for c, s in zip(cheap, llm)]
+
+def _append_cascade_log(line):
+    with open(CASCADE_LOG, "a", encoding="utf-8") as f:
+        f.write(line)
+
+def _log_cascade(stats):
+    """Печать и запись в cascade_log; файл пишется в пуле потоков, ответ его не ждёт."""
+    print(
+        f"⏱️ Каскад: этап 1 — {stats['stage1_in']} канд. за {stats['stage1_ms']} мс; "
+        f"этап 2 ({stats['stage2']}) — {stats['stage2_in']} канд. за {stats['stage2_ms']} мс; "
+        f"всего {stats['total_ms']} из {stats['budget_ms']} мс"
+    )
+    if CASCADE_LOG:
+        line = json.dumps(stats, ensure_ascii=False) + "\n"
+        return asyncio.get_running_loop().run_in_executor(None, _append_cascade_log, line)
+
+async def cascade_rerank(tours, params, top_k=5, top_n=None, budget_ms=None):
+    """
+    Двухэтапный rerank: дешёвая оценка всех кандидатов, затем /similarity_batch только
+    для первых top_n — если на него ещё остался бюджет времени запроса.
+    """
+    if not tours:
+        return []
+    started = time.perf_counter()
+    top_n = CASCADE_TOP_N if top_n is None else top_n
+    budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+    duration_days = params.get("duration_days")
+    pref_text = ", ".join(params.get("preferences") or [])
+
+    cheap = dict(zip(map(id, tours), _cheap_scores(tours, params, pref_text)))
+    ranked = _rank(tours, [cheap[id(t)] for t in tours], duration_days)
+    stage1_ms = (time.perf_counter() - started) * 1000
+    stats = {
+        "at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "preferences": len(params.get("preferences") or []),
+        "budget_ms": budget_ms,
+        "top_n": top_n,
+        "stage1_in": len(tours),
+        "stage1_ms": round(stage1_ms, 1),
+        "stage2": "skipped",
+        "stage2_in": 0,
+        "stage2_ms": 0,
+    }
+
+    left_sec = (budget_ms - stage1_ms) / 1000
+    if pref_text and top_n and left_sec > 0:
+        # этап 2: LLM уточняет только верх списка и не дольше оставшегося бюджета
+        head = ranked[:top_n]
+        stats["stage2_in"] = len(head)
+        stage2_started = time.perf_counter()
         try:
-            payload = {"query": pref_text, "context": tour_text}
-            resp = requests.post(LLM_URL_SIMILARITY, json=payload, timeout=20)
-            if resp.ok:
-                score = float(resp.json().get("score", 0))
-            else:
-                score = 0.0
-        except Exception:
-            score = 0.0
-        if duration_days and t.get("nights"):
-            score -= fabs(t["nights"] - duration_days) * 0.05
-        scored.append((t, score))
-        time.sleep(2)
-    best = sorted(scored, key=lambda x: (-x[1], x[0]["check_in"], x[0]["price"]))
-    return [t for t, _ in best[:top_k]]
+            llm_scores = await asyncio.wait_for(_llm_scores(pref_text, head), left_sec)
+        except asyncio.TimeoutError:
+            llm_scores, stats["stage2"] = None, "timeout"
+        else:
+            stats["stage2"] = "llm" if llm_scores is not None else "unavailable"
+        if llm_scores is not None:
+            ranked = _rank(head, _blend([cheap[id(t)] for t in head], llm_scores), duration_days) + ranked[top_n:]
+        stats["stage2_ms"] = round((time.perf_counter() - stage2_started) * 1000, 1)
+    elif pref_text and top_n:
+        stats["stage2"] = "budget"
+
+    stats["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _log_cascade(stats)
+    return ranked[:top_k]
 
 # === Summarization ===
 def _clean_summary(raw_text: str) -> str:
@@ -216,38 +425,103 @@ def _clean_summary(raw_text: str) -> str:
         text = " ".join(sents[:3])
     return text.strip()
 
-def summarize_selection_batch(tours, user_query):
-    summarized = []
-    for t in tours:
-        hotel_data = {
-            "hotel": t.get("hotel_name"),
-            "category": t.get("hotel_category_id"),
-            "meal_id": t.get("meal_id"),
-            "description": t.get("description", "")[:1500],
-        }
-        payload = {"query": user_query, "hotel": hotel_data}
-        try:
-            r = requests.post(LLM_URL_SUMMARIZE, json=payload, timeout=25)
-            if r.ok:
-                raw = r.json().get("summary") or r.json().get("response") or r.text
-                reason = _clean_summary(raw)
-            else:
-                reason = f"Ошибка {r.status_code}"
-        except Exception as e:
-            reason = f"Ошибка LLM: {e}"
-        t["reason"] = reason
-        summarized.append(t)
-    return summarized
+def _template_reason(t):
+    """Объяснение без LLM — из категории, питания и цены."""
+    parts = []
+    category = get_hotel_category_name_by_id(t.hotel_category_id)
+    if category:
+        parts.append(f"категория {category}")
+    meal = get_meal_name_by_id(t.meal_id)
+    if meal:
+        parts.append(f"питание «{meal}»")
+    parts.append(f"{t.price} {t.currency or 'RUB'} за {t.nights} ночей")
+    text = ", ".join(parts)
+    return f"{text[0].upper()}{text[1:]}."
+
+def _hotel_payload(t):
+    return {
+        "hotel": t.hotel_name,
+        "category": t.hotel_category_id,
+        "meal_id": t.meal_id,
+        "description": t.description or "",
+    }
+
+async def _summarize_one(t, user_query):
+    async with _summary_slots:
+        await _summary_bucket.acquire()
+        return _clean_summary(await llm_api.summarize(user_query, _hotel_payload(t)))
+
+async def _summarize_concurrent(tours, user_query, deadline):
+    tasks = [asyncio.create_task(_summarize_one(t, user_query)) for t in tours]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏱️ /summarize не уложился в дедлайн для {len(pending)} из {len(tasks)} отелей")
+
+    reasons = []
+    for t, task in zip(tours, tasks):
+        if task in done and task.exception() is None:
+            reasons.append(task.result())
+        else:
+            if task in done:
+                print(f"⚠️ /summarize для {t.hotel_name}: {task.exception()}")
+            reasons.append(None)
+    return reasons
+
+async def _summarize_chunk(hotels, user_query, deadline):
+    async with _summary_slots:
+        await _summary_bucket.acquire()
+        return await llm_api.summarize_batch(user_query, hotels, timeout=deadline)
+
+async def _summarize_batch(tours, user_query, deadline):
+    hotels = [{"id": str(t.id), **_hotel_payload(t)} for t in tours]
+    chunks = [hotels[i:i + SUMMARY_BATCH_SIZE] for i in range(0, len(hotels), SUMMARY_BATCH_SIZE)]
+    # дедлайн общий для ожидания слота, токена и самого запроса
+    tasks = [asyncio.create_task(_summarize_chunk(chunk, user_query, deadline)) for chunk in chunks]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"⏱️ /summarize_batch не уложился в дедлайн для {len(pending)} из {len(tasks)} запросов")
+
+    summaries = {}
+    for task in done:
+        if task.exception() is None:
+            summaries.update(task.result())
+        else:
+            print(f"⚠️ /summarize_batch: {task.exception()!r}")
+    return [_clean_summary(summaries[h["id"]]) if summaries.get(h["id"]) else None for h in hotels]
+
+async def summarize_selection_batch(tours, user_query, deadline=None):
+    if not tours:
+        return []
+    await _attach_descriptions_async(tours)
+    deadline = deadline or SUMMARY_DEADLINE
+    if SUMMARY_MODE == "batch":
+        reasons = await _summarize_batch(tours, user_query, deadline)
+    else:
+        reasons = await _summarize_concurrent(tours, user_query, deadline)
+    # порядок — как у входного списка, т.е. по рангу
+    for t, reason in zip(tours, reasons):
+        t.reason = reason or _template_reason(t)
+    return tours
 
 # === Main entry ===
-def find_tours(params):
-    candidates = sql_filter(params, limit=150)
+async def find_tours(params):
+    # sqlite синхронный — выносим в пул потоков, чтобы не держать event loop
+    loop = asyncio.get_running_loop()
+    candidates = await loop.run_in_executor(None, sql_filter, params, 150)
     if not candidates:
         return []
+    # пожелания, разобранные в признаки (params["features"]), уже учтены в SQL
     prefs = params.get("preferences", [])
-    best = rag_rerank(
-        candidates, prefs, duration_days=params.get("duration_days"), top_k=5
-    )
+    if RERANK_MODE == "cascade":
+        best = await cascade_rerank(candidates, params, top_k=5)
+    else:
+        best = await rag_rerank(
+            candidates, prefs, duration_days=params.get("duration_days"), top_k=5
+        )
     user_query = params.get("user_text", "")
-    best = summarize_selection_batch(best, user_query)
+    best = await summarize_selection_batch(best, user_query)
     return best
\ No newline at end of file
@@ -2,18 +2,12 @@ import os
 import sqlite3
 
 DB_PATH = "travelata.db"
-MIGRATIONS_FILE = "migrations.sql"
 
 def init_db():
+    from data.migrate import apply_migrations
 
     con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-
-    with open(MIGRATIONS_FILE, "r", encoding="utf-8") as f:
-        sql_script = f.read()
-        cur.executescript(sql_script)
-
-    con.commit()
+    apply_migrations(con)
     con.close()
     print(f"✅ SQLite база создана: {DB_PATH}")
 
@@ -0,0 +1,354 @@
+import datetime
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from data.ingest import TOUR_COLUMNS, TOUR_KEY, mark_seen, upsert_tours
+from data.loader import BASE_URL, HEADERS, get_cheapest_tours, tour_row
+from utils.config import load_config
+from utils.db_pool import get_pool
+from utils.rate_limit import HostRateLimiter
+
+# Выгрузка матрицы направлений: страны × города вылета × диапазоны ночей × окна дат.
+# Окна качаются параллельно (ограниченный пул потоков, один keep-alive Session,
+# rate limit на хост); каждое окно сохраняется вместе с отметкой в harvest_windows
+# одной транзакцией, поэтому прерванный прогон продолжается с того же места.
+#
+#   python -m data.harvester [run_id]    # run_id по умолчанию — сегодняшняя дата
+#   python -m data.harvester --refresh   # только устаревшие окна, применяются лишь изменения
+
+config = load_config()
+HARVEST_CFG = config.get("harvester", {})
+COUNTRIES = HARVEST_CFG.get("countries", [92])
+CITIES = HARVEST_CFG.get("cities", [2, 25])
+NIGHT_RANGES = HARVEST_CFG.get("nights", [[5, 9], [10, 14]])
+WINDOW_DAYS = HARVEST_CFG.get("window_days", 14)
+HORIZON_DAYS = HARVEST_CFG.get("horizon_days", 60)
+WORKERS = HARVEST_CFG.get("workers", 4)
+HOTEL_CATEGORIES = HARVEST_CFG.get("hotel_categories", [])
+RESORTS = HARVEST_CFG.get("resorts", [])
+# инкрементальное обновление: окно перекачивается, если старше max_age_hours,
+# а окна с заездом в ближайшие near_days — если старше near_max_age_hours
+REFRESH_CFG = HARVEST_CFG.get("refresh", {})
+MAX_AGE_HOURS = REFRESH_CFG.get("max_age_hours", 24)
+NEAR_DAYS = REFRESH_CFG.get("near_days", 14)
+NEAR_MAX_AGE_HOURS = REFRESH_CFG.get("near_max_age_hours", 3)
+# повтор 429/5xx: пауза backoff * 2^попытка, но не меньше Retry-After (и не больше RETRY_AFTER_MAX)
+RETRIES = HARVEST_CFG.get("retries", 3)
+BACKOFF = HARVEST_CFG.get("backoff", 1.0)
+RETRY_AFTER_MAX = HARVEST_CFG.get("max_retry_after", 60)
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+limiter = HostRateLimiter(
+    HARVEST_CFG.get("rate_per_sec", 2.0), HARVEST_CFG.get("burst", 4), HARVEST_CFG.get("hosts", {})
+)
+
+
+@dataclass(frozen=True)
+class Window:
+    country_id: int
+    city_id: int
+    nights_from: int
+    nights_to: int
+    date_from: datetime.date
+    date_to: datetime.date
+
+    @property
+    def key(self) -> tuple:
+        return (self.country_id, self.city_id, self.nights_from, self.nights_to,
+                str(self.date_from), str(self.date_to))
+
+
+def date_windows(today: datetime.date, window_days: int = WINDOW_DAYS,
+                 horizon_days: int = HORIZON_DAYS) -> list[tuple[datetime.date, datetime.date]]:
+    """
+    Окна дат заезда на horizon_days вперёд. Границы выровнены по window_days от начала
+    эры, а не от сегодняшнего дня — завтрашний прогон попадёт в те же окна.
+    """
+    start = datetime.date.fromordinal(today.toordinal() // window_days * window_days)
+    end = today + datetime.timedelta(days=horizon_days)
+    windows = []
+    while start <= end:
+        windows.append((start, start + datetime.timedelta(days=window_days - 1)))
+        start += datetime.timedelta(days=window_days)
+    return windows
+
+
+def build_matrix(today: datetime.date | None = None) -> list[Window]:
+    today = today or datetime.date.today()
+    return [
+        Window(country_id, city_id, nights_from, nights_to, date_from, date_to)
+        for country_id in COUNTRIES
+        for city_id in CITIES
+        for nights_from, nights_to in NIGHT_RANGES
+        for date_from, date_to in date_windows(today)
+    ]
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Один Session на все потоки: пул keep-alive соединений. Адаптер повторяет только
+    неудавшиеся соединения (запрос до API не дошёл); 429/5xx повторяет fetch_window
+    через limiter, чтобы повторы тоже укладывались в rate limit.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=RETRIES, connect=RETRIES, read=0, status=0, other=0,
+                          backoff_factor=BACKOFF, allowed_methods=("GET",))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=WORKERS, max_retries=retry)
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def done_windows(run_id: str) -> set[tuple]:
+    with get_pool().read() as con:
+        rows = con.execute("""
+            SELECT country_id, city_id, nights_from, nights_to, date_from, date_to
+            FROM harvest_windows WHERE run_id = ? AND status = 'done'
+        """, (run_id,)).fetchall()
+    return set(rows)
+
+
+def _mark(con, window: Window, run_id: str, status: str, rows: int = 0, error: str | None = None) -> None:
+    con.execute("""
+        INSERT INTO harvest_windows (country_id, city_id, nights_from, nights_to, date_from, date_to,
+                                     run_id, status, rows, error, fetched_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (country_id, city_id, nights_from, nights_to, date_from, date_to) DO UPDATE SET
+            run_id = excluded.run_id, status = excluded.status, rows = excluded.rows,
+            error = excluded.error, fetched_at = excluded.fetched_at
+    """, (*window.key, run_id, status, rows, error))
+
+
+def _retry_delay(resp: requests.Response, attempt: int) -> float:
+    delay = BACKOFF * 2 ** attempt
+    try:
+        delay = max(delay, float(resp.headers.get("Retry-After", "")))
+    except ValueError:
+        pass  # нет заголовка или HTTP-дата — обычный backoff
+    return min(delay, RETRY_AFTER_MAX)
+
+
+def fetch_window(window: Window, today: datetime.date | None = None) -> list[dict]:
+    """
+    Предложения окна. Любой не-200 — исключение (окно отмечается error), 429/5xx
+    сначала повторяются RETRIES раз; каждая попытка проходит через limiter.
+    """
+    today = today or datetime.date.today()
+    for attempt in range(RETRIES + 1):
+        limiter.acquire(BASE_URL)
+        try:
+            tours = get_cheapest_tours(
+                window.country_id, window.city_id, window.nights_from, window.nights_to,
+                date_from=max(window.date_from, today), date_to=window.date_to,
+                hotel_categories=HOTEL_CATEGORIES, resorts=RESORTS, session=get_session(),
+            )
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code not in _RETRY_STATUSES or attempt == RETRIES:
+                raise
+            time.sleep(_retry_delay(e.response, attempt))
+            continue
+        return [tour_row(t, window.country_id, window.city_id) for t in tours]
+
+
+def _harvest_one(window: Window, run_id: str) -> int:
+    try:
+        rows = fetch_window(window)
+    except Exception as e:
+        with get_pool().write() as con:
+            _mark(con, window, run_id, "error", error=str(e)[:500])
+        raise
+    # туры и отметка об окне — одной транзакцией: после сбоя окно либо сохранено целиком, либо нет
+    with get_pool().write() as con:
+        _apply_window(con, window, rows)
+        _mark(con, window, run_id, "done", rows=len(rows))
+    return len(rows)
+
+
+def harvest(run_id: str | None = None, windows: list[Window] | None = None) -> dict:
+    run_id = run_id or str(datetime.date.today())
+    windows = windows if windows is not None else build_matrix()
+    done = done_windows(run_id)
+    pending = [w for w in windows if w.key not in done]
+    print(f"🌍 Прогон {run_id}: окон {len(windows)}, уже готово {len(windows) - len(pending)}, "
+          f"к загрузке {len(pending)}, потоков: {WORKERS}")
+
+    started = time.perf_counter()
+    stats = {"windows": len(pending), "rows": 0, "errors": 0}
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(_harvest_one, w, run_id): w for w in pending}
+        for future in as_completed(futures):
+            w = futures[future]
+            try:
+                stats["rows"] += future.result()
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"⚠️ {w.country_id}/{w.city_id} {w.date_from}…{w.date_to} "
+                      f"{w.nights_from}-{w.nights_to} ночей: {str(e)[:200]}")
+
+    sec = time.perf_counter() - started
+    print(f"✅ Прогон {run_id}: {stats['rows']} туров из {stats['windows']} окон за {sec:.1f} сек, "
+          f"ошибок {stats['errors']}" + (" — перезапустите с тем же run_id" if stats["errors"] else ""))
+    return stats
+
+
+# -------------------------------
+# Инкрементальное обновление
+# -------------------------------
+
+def _utcnow() -> datetime.datetime:
+    # fetched_at пишется CURRENT_TIMESTAMP — это UTC без часового пояса
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def stale_windows(windows: list[Window], today: datetime.date | None = None) -> list[Window]:
+    """Окна, которые пора перекачать: не скачаны, скачаны с ошибкой или устарели."""
+    today = today or datetime.date.today()
+    now = _utcnow()
+    with get_pool().read() as con:
+        fetched = {
+            row[:6]: (row[6], row[7])
+            for row in con.execute("""
+                SELECT country_id, city_id, nights_from, nights_to, date_from, date_to, status, fetched_at
+                FROM harvest_windows
+            """)
+        }
+    stale = []
+    for w in windows:
+        status, fetched_at = fetched.get(w.key, (None, None))
+        if status != "done" or not fetched_at:
+            stale.append(w)
+            continue
+        near = (w.date_from - today).days < NEAR_DAYS
+        max_age = datetime.timedelta(hours=NEAR_MAX_AGE_HOURS if near else MAX_AGE_HOURS)
+        if now - datetime.datetime.fromisoformat(fetched_at) > max_age:
+            stale.append(w)
+    return stale
+
+
+def _stored_offers(con, window: Window) -> dict[tuple, tuple]:
+    """Сохранённые предложения окна: ключ → (id, значения колонок в порядке TOUR_COLUMNS)."""
+    query = f"""
+        SELECT id, {", ".join(TOUR_COLUMNS)} FROM tours
+        WHERE country_id = ? AND city_id = ? AND check_in BETWEEN ? AND ? AND nights BETWEEN ? AND ?
+    """
+    args = [window.country_id, window.city_id, str(window.date_from), str(window.date_to),
+            window.nights_from, window.nights_to]
+    # при фильтрах в конфиге API не вернёт остальные отели — их и не сравниваем
+    if HOTEL_CATEGORIES:
+        query += f" AND hotel_category_id IN ({','.join('?' * len(HOTEL_CATEGORIES))})"
+        args += HOTEL_CATEGORIES
+    if RESORTS:
+        query += f" AND resort_id IN ({','.join('?' * len(RESORTS))})"
+        args += RESORTS
+    key_pos = [TOUR_COLUMNS.index(c) for c in TOUR_KEY]
+    offers = {}
+    for row in con.execute(query, args):
+        values = row[1:]
+        offers[tuple(values[i] for i in key_pos)] = (row[0], values)
+    return offers
+
+
+def diff_offers(stored: dict[tuple, tuple], fresh: list[dict]) -> tuple[list[dict], list[int], list[int]]:
+    """
+    (новые и изменившиеся строки, id неизменных предложений, id пропавших из выдачи).
+    Выдача успешного запроса — полный список предложений окна: пропавшее предложение
+    продано или подорожало, и оставлять его нельзя — sql_filter показал бы его как самое дешёвое.
+    """
+    changed, unchanged, seen = [], [], set()
+    for row in fresh:
+        key = tuple(row.get(c) for c in TOUR_KEY)
+        seen.add(key)
+        old = stored.get(key)
+        if old is not None and all(
+            row.get(c) is None or row.get(c) == v for c, v in zip(TOUR_COLUMNS, old[1])
+        ):
+            unchanged.append(old[0])
+        else:
+            changed.append(row)
+    gone = [id_ for key, (id_, _) in stored.items() if key not in seen]
+    return changed, unchanged, gone
+
+
+def _apply_window(con, window: Window, fresh: list[dict]) -> dict:
+    """Приводит предложения окна к свежей выдаче: пишет изменения, удаляет пропавшие."""
+    changed, unchanged, gone = diff_offers(_stored_offers(con, window), fresh)
+    if changed:
+        upsert_tours(changed, con=con)
+    if unchanged:
+        mark_seen(con, unchanged)
+    if gone:
+        con.executemany("DELETE FROM tours WHERE id = ?", [(id_,) for id_ in gone])
+    return {"changed": len(changed), "deleted": len(gone), "unchanged": len(unchanged)}
+
+
+def _refresh_one(window: Window, run_id: str) -> dict:
+    try:
+        # любой не-200 — исключение: по неудачному ответу ничего не удаляем
+        fresh = fetch_window(window)
+    except Exception as e:
+        with get_pool().write() as con:
+            _mark(con, window, run_id, "error", error=str(e)[:500])
+        raise
+    with get_pool().write() as con:
+        stats = _apply_window(con, window, fresh)
+        _mark(con, window, run_id, "done", rows=len(fresh))
+    return stats
+
+
+def purge_expired(today: datetime.date | None = None) -> int:
+    """Удаляет туры с прошедшей датой заезда и окна, которые целиком в прошлом."""
+    today = str(today or datetime.date.today())
+    with get_pool().write() as con:
+        removed = con.execute("DELETE FROM tours WHERE check_in < ?", (today,)).rowcount
+        con.execute("DELETE FROM harvest_windows WHERE date_to < ?", (today,))
+    return removed
+
+
+def refresh(windows: list[Window] | None = None) -> dict:
+    windows = windows if windows is not None else build_matrix()
+    run_id = f"refresh-{_utcnow():%Y-%m-%dT%H:%M}"
+    expired = purge_expired()
+    stale = stale_windows(windows)
+    print(f"🔄 Обновление: окон {len(windows)}, устарело {len(stale)}, "
+          f"удалено прошедших туров {expired}")
+
+    started = time.perf_counter()
+    stats = {"windows": len(stale), "skipped": len(windows) - len(stale), "expired": expired,
+             "changed": 0, "deleted": 0, "unchanged": 0, "errors": 0}
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {pool.submit(_refresh_one, w, run_id): w for w in stale}
+        for future in as_completed(futures):
+            w = futures[future]
+            try:
+                for k, v in future.result().items():
+                    stats[k] += v
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"⚠️ {w.country_id}/{w.city_id} {w.date_from}…{w.date_to}: {str(e)[:200]}")
+
+    print(f"✅ Обновление за {time.perf_counter() - started:.1f} сек: изменено {stats['changed']}, "
+          f"удалено {stats['deleted']}, без изменений {stats['unchanged']}, "
+          f"пропущено свежих окон {stats['skipped']}, ошибок {stats['errors']}")
+    return stats
+
+
+if __name__ == "__main__":
+    if "--refresh" in sys.argv[1:]:
+        refresh()
+    else:
+        harvest(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,33 @@
+-- Полнотекстовый индекс описаний отелей (bot_service/text_search.py).
+-- unicode61 без учёта регистра и диакритики (кириллица и латиница), префиксные индексы —
+-- под поиск по основам слов ("песча*", "мор*"); ё приводится к е ещё при записи.
+-- Отдельная копия текста, а не external content: иначе rebuild читал бы исходные ё.
+CREATE VIRTUAL TABLE IF NOT EXISTS hotel_search USING fts5(
+    hotel_name,
+    description,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '3 4 5'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_descriptions_search_insert
+AFTER INSERT ON hotel_descriptions
+BEGIN
+    INSERT INTO hotel_search (rowid, hotel_name, description)
+    VALUES (NEW.hotel_api_id, replace(replace(NEW.hotel_name, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(NEW.description, 'ё', 'е'), 'Ё', 'Е'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_descriptions_search_update
+AFTER UPDATE OF hotel_name, description ON hotel_descriptions
+BEGIN
+    DELETE FROM hotel_search WHERE rowid = OLD.hotel_api_id;
+    INSERT INTO hotel_search (rowid, hotel_name, description)
+    VALUES (NEW.hotel_api_id, replace(replace(NEW.hotel_name, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(NEW.description, 'ё', 'е'), 'Ё', 'Е'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_descriptions_search_delete
+AFTER DELETE ON hotel_descriptions
+BEGIN
+    DELETE FROM hotel_search WHERE rowid = OLD.hotel_api_id;
+END;
@@ -0,0 +1,60 @@
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+
+from bot_service.tour_search import build_filter_query
+from utils.db_pool import get_pool
+
+# Прогоняет EXPLAIN QUERY PLAN по корпусу реальных параметров поиска
+# (JSONL, по одному разобранному запросу на строку — см. search.params_log)
+# и показывает формы запросов, которые всё ещё читают tours целиком.
+#
+#   python -m data.index_advisor data/search_params.jsonl
+
+FILTER_KEYS = [
+    "country_id", "city_id", "resort_id", "hotel_category_id", "meal_id",
+    "duration_days", "budget_eur", "check_in_date", "check_in_range", "month",
+    "features", "preferences",
+]
+# "SCAN t" — полный проход по tours: либо по самой таблице, либо по всему индексу
+# (например, idx_tours_price ради ORDER BY) с чтением строк на каждом шаге
+_FULL_SCAN_RE = re.compile(r"^SCAN (t|tours)\b")
+
+
+def query_shape(params: dict) -> tuple[str, ...]:
+    return tuple(k for k in FILTER_KEYS if params.get(k))
+
+
+def explain(con, params: dict) -> list[str]:
+    query, q_params = build_filter_query(params, limit=150)
+    return [row[3] for row in con.execute(f"EXPLAIN QUERY PLAN {query}", q_params)]
+
+
+def advise(corpus_path: str) -> dict:
+    shapes = Counter()
+    scans = defaultdict(list)
+    with open(corpus_path, encoding="utf-8") as f, get_pool().read() as con:
+        for line in f:
+            if not line.strip():
+                continue
+            params = json.loads(line)
+            shape = query_shape(params)
+            shapes[shape] += 1
+            plan = explain(con, params)
+            if any(_FULL_SCAN_RE.match(step) for step in plan) and shape not in scans:
+                scans[shape] = plan
+
+    print(f"Запросов: {sum(shapes.values())}, форм: {len(shapes)}")
+    for shape, count in shapes.most_common():
+        mark = "❌ SCAN" if shape in scans else "✅"
+        print(f"{mark} {count:5d}  {', '.join(shape) or '(без фильтров)'}")
+        for step in scans.get(shape, []):
+            print(f"          {step}")
+    return dict(scans)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m data.index_advisor <params.jsonl>")
+    advise(sys.argv[1])
@@ -0,0 +1,142 @@
+import datetime
+import sqlite3
+import time
+
+from utils.db_pool import get_pool
+
+# Пакетная запись туров и справочников: executemany в одной транзакции пишущего
+# соединения пула и upsert по естественному ключу вместо дублей на каждом прогоне.
+
+TOUR_COLUMNS = (
+    "api_id", "country_id", "city_id", "resort_id", "hotel_name", "nights", "price",
+    "currency", "url", "check_in", "adults", "kids", "hotel_category_id", "meal_id",
+)
+# естественный ключ предложения: отель, дата заезда, ночи, город вылета
+TOUR_KEY = ("api_id", "check_in", "nights", "city_id")
+# check_in_month считаем здесь же, в INSERT: триггер из search_indexes.sql
+# делал бы на каждую строку ещё и UPDATE (он срабатывает, только если месяц не передан)
+_INSERT_COLUMNS = TOUR_COLUMNS + ("check_in_month",)
+
+_UPDATABLE = [c for c in TOUR_COLUMNS if c not in TOUR_KEY]
+# пустые поля (например, у bot_service.db нет hotel_name) не затирают уже известные;
+# WHERE пропускает строки без изменений — без лишних записей и срабатываний триггеров
+# (last_seen неизменных предложений обновляет mark_seen)
+_UPSERT_TAIL = f"""
+    ON CONFLICT ({", ".join(TOUR_KEY)}) DO UPDATE SET
+        {", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in _UPDATABLE)},
+        last_seen = excluded.last_seen
+    WHERE {" OR ".join(f"excluded.{c} IS NOT NULL AND excluded.{c} IS NOT {c}" for c in _UPDATABLE)}
+"""
+UPSERT_TOURS_SQL = f"""
+    INSERT INTO tours ({", ".join(_INSERT_COLUMNS)}, last_seen)
+    VALUES ({", ".join("?" * len(_INSERT_COLUMNS))}, CURRENT_TIMESTAMP)
+    {_UPSERT_TAIL}
+"""
+
+
+def _check_in_month(check_in) -> int | None:
+    try:
+        return datetime.date.fromisoformat(str(check_in)[:10]).month
+    except ValueError:
+        return None
+
+
+def _tour_tuples(rows: list[dict]) -> tuple[list[tuple], int]:
+    """Строки в порядке _INSERT_COLUMNS; без полного ключа upsert невозможен — такие пропускаем."""
+    values, skipped = [], 0
+    for row in rows:
+        if any(row.get(c) is None for c in TOUR_KEY):
+            skipped += 1
+            continue
+        values.append((*(row.get(c) for c in TOUR_COLUMNS), _check_in_month(row["check_in"])))
+    return values, skipped
+
+
+def _report(label: str, rows: int, started: float, **counts) -> dict:
+    sec = time.perf_counter() - started
+    stats = {"rows": rows, "sec": round(sec, 3), "rows_per_sec": int(rows / sec) if sec else rows, **counts}
+    extra = ", ".join(f"{k}: {v}" for k, v in counts.items())
+    print(f"💾 {label}: {rows} строк за {sec:.2f} сек ({stats['rows_per_sec']} строк/сек; {extra})")
+    return stats
+
+
+def upsert_tours(rows: list[dict], con: sqlite3.Connection | None = None) -> dict:
+    """
+    Upsert предложений по (api_id, check_in, nights, city_id): новые вставляются,
+    у существующих обновляются цена и остальные поля. Всё — одной транзакцией.
+    """
+    started = time.perf_counter()
+    values, skipped = _tour_tuples(rows)
+    if con is None:
+        with get_pool().write() as con:
+            changed = _executemany(con, UPSERT_TOURS_SQL, values)
+    else:
+        changed = _executemany(con, UPSERT_TOURS_SQL, values)
+    return _report("Туры", len(values), started, changed=changed, skipped=skipped)
+
+
+def mark_seen(con: sqlite3.Connection, ids: list[int]) -> None:
+    """Предложения снова пришли в выдаче без изменений — обновляем только last_seen."""
+    con.executemany("UPDATE tours SET last_seen = CURRENT_TIMESTAMP WHERE id = ?", [(id_,) for id_ in ids])
+
+
+def _executemany(con: sqlite3.Connection, sql: str, values: list[tuple]) -> int:
+    """Число реально вставленных/изменённых строк (без изменений от триггеров)."""
+    if not values:
+        return 0
+    return con.executemany(sql, values).rowcount
+
+
+def replace_tours(rows: list[dict], country_id: int, city_id: int, date_from, date_to,
+                  nights_from: int, nights_to: int) -> dict:
+    """
+    Полное обновление окна направления (страна + город вылета, даты заезда и ночи запроса
+    cheapestTours): новые данные сначала ложатся во временную staging-таблицу, затем одной
+    транзакцией upsert из неё и удаление предложений окна, которых в выгрузке больше нет.
+    Предложения других дат и ночей выгрузка не покрывает — их не трогаем.
+    Читатели до commit видят старый набор целиком (WAL).
+    """
+    started = time.perf_counter()
+    values, skipped = _tour_tuples(rows)
+    columns = ", ".join(_INSERT_COLUMNS)
+    same_key = " AND ".join(f"s.{c} = tours.{c}" for c in TOUR_KEY)
+    with get_pool().write() as con:
+        con.execute(f"CREATE TEMP TABLE IF NOT EXISTS tours_staging AS SELECT {columns} FROM tours WHERE 0")
+        con.execute(f"CREATE INDEX IF NOT EXISTS temp.idx_tours_staging_key ON tours_staging({', '.join(TOUR_KEY)})")
+        con.execute("DELETE FROM tours_staging")
+        con.executemany(
+            f"INSERT INTO tours_staging ({columns}) VALUES ({', '.join('?' * len(_INSERT_COLUMNS))})", values
+        )
+        # WHERE true — иначе SQLite принимает ON CONFLICT за часть JOIN в SELECT
+        changed = con.execute(
+            f"INSERT INTO tours ({columns}, last_seen) SELECT {columns}, CURRENT_TIMESTAMP FROM tours_staging "
+            f"WHERE true {_UPSERT_TAIL}"
+        ).rowcount
+        # неизменные предложения upsert пропустил — отмечаем, что они снова пришли в выдаче
+        con.execute(f"""
+            UPDATE tours SET last_seen = CURRENT_TIMESTAMP
+            WHERE id IN (SELECT tours.id FROM tours_staging AS s JOIN tours ON {same_key})
+        """)
+        deleted = con.execute(f"""
+            DELETE FROM tours
+            WHERE country_id = ? AND city_id = ?
+              AND check_in BETWEEN ? AND ? AND nights BETWEEN ? AND ?
+              AND NOT EXISTS (SELECT 1 FROM tours_staging AS s WHERE {same_key})
+        """, (country_id, city_id, str(date_from), str(date_to), nights_from, nights_to)).rowcount
+        con.execute("DELETE FROM tours_staging")
+    return _report(f"Туры {country_id}/{city_id} {date_from}…{date_to} (полное обновление)", len(values), started,
+                   changed=changed, deleted=deleted, skipped=skipped)
+
+
+def upsert_directory(table: str, columns: tuple[str, ...], rows: list[tuple]) -> dict:
+    """Справочник по первичному ключу id: неизменённые записи не трогаем (и не увеличиваем reference_version)."""
+    started = time.perf_counter()
+    updatable = [c for c in columns if c != "id"]
+    sql = f"""
+        INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})
+        ON CONFLICT (id) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in updatable)}
+        WHERE {" OR ".join(f"excluded.{c} IS NOT {c}" for c in updatable)}
+    """
+    with get_pool().write() as con:
+        changed = _executemany(con, sql, rows)
+    return _report(table, len(rows), started, changed=changed)
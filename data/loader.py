@@ -1,20 +1,18 @@
+import datetime
+
 import requests
-import sqlite3
 from utils.config import load_config
+from data.ingest import upsert_directory, upsert_tours, replace_tours
 
 config = load_config()
 BASE_URL = config["travelata"]["base_url"]
 API_TOKEN = config["travelata"]["token"]
-DB_PATH = config["database"]["path"]
 
 HEADERS = {
     "Authorization": f"Token {API_TOKEN}",
     "User-Agent": "Mozilla/5.0"
 }
 
-def get_connection():
-    return sqlite3.connect(DB_PATH)
-
 # -------------------------------
 # Справочники
 # -------------------------------
@@ -23,63 +21,49 @@ def save_countries():
     url = f"{BASE_URL}/directory/countries"
     resp = requests.get(url, headers=HEADERS).json()
     data = resp.get("data", [])
-    con = get_connection()
-    cur = con.cursor()
-    for c in data:
-        cur.execute("INSERT OR REPLACE INTO countries (id, name) VALUES (?, ?)", (c["id"], c["name"]))
-    con.commit(); con.close()
+    upsert_directory("countries", ("id", "name"), [(c["id"], c["name"]) for c in data])
     print(f"✅ Загружены страны: {len(data)}")
 
 def save_cities():
     url = f"{BASE_URL}/directory/departureCities"
     resp = requests.get(url, headers=HEADERS).json()
     data = resp.get("data", [])
-    con = get_connection()
-    cur = con.cursor()
-    for c in data:
-        cur.execute("INSERT OR REPLACE INTO cities (id, name) VALUES (?, ?)", (c["id"], c["name"]))
-    con.commit(); con.close()
+    upsert_directory("cities", ("id", "name"), [(c["id"], c["name"]) for c in data])
     print(f"✅ Загружены города вылета: {len(data)}")
 
 def save_resorts():
     url = f"{BASE_URL}/directory/resorts"
     resp = requests.get(url, headers=HEADERS).json()
     data = resp.get("data", [])
-    con = get_connection()
-    cur = con.cursor()
-    for r in data:
-        cur.execute("INSERT OR REPLACE INTO resorts (id, country_id, name) VALUES (?, ?, ?)",
-                    (r["id"], r["countryId"], r["name"]))
-    con.commit(); con.close()
+    upsert_directory("resorts", ("id", "country_id", "name"),
+                     [(r["id"], r["countryId"], r["name"]) for r in data])
     print(f"✅ Загружены курорты: {len(data)}")
 
 def save_hotel_categories():
     url = f"{BASE_URL}/directory/hotelCategories"
     resp = requests.get(url, headers=HEADERS).json()
     data = resp.get("data", [])
-    con = get_connection()
-    cur = con.cursor()
-    for cat in data:
-        cur.execute("INSERT OR REPLACE INTO hotel_categories (id, name) VALUES (?, ?)", (cat["id"], cat["name"]))
-    con.commit(); con.close()
+    upsert_directory("hotel_categories", ("id", "name"), [(cat["id"], cat["name"]) for cat in data])
     print(f"✅ Загружены категории отелей: {len(data)}")
 
 def save_meals():
     url = f"{BASE_URL}/directory/meals"
     resp = requests.get(url, headers=HEADERS).json()
     data = resp.get("data", [])
-    con = get_connection()
-    cur = con.cursor()
-    for m in data:
-        cur.execute("INSERT OR REPLACE INTO meals (id, name) VALUES (?, ?)", (m["id"], m["name"]))
-    con.commit(); con.close()
+    upsert_directory("meals", ("id", "name"), [(m["id"], m["name"]) for m in data])
     print(f"✅ Загружены типы питания: {len(data)}")
 
 # -------------------------------
 # Туровые предложения
 # -------------------------------
 
-def get_cheapest_tours(country_id: int, city_id: int, nights_from=7, nights_to=12, adults=2, kids=0):
+def get_cheapest_tours(country_id: int, city_id: int, nights_from=7, nights_to=12, adults=2, kids=0,
+                       date_from=None, date_to=None, hotel_categories=None, resorts=None, session=None):
+    """
+    Самые дешёвые туры направления. Без дат — ближайшие 30 дней; категории и курорты
+    передаются, только если заданы (иначе — вся страна). session — общий requests.Session.
+    """
+    today = datetime.date.today()
     query = {
         "countries[]": country_id,
         "departureCity": city_id,
@@ -88,52 +72,59 @@ def get_cheapest_tours(country_id: int, city_id: int, nights_from=7, nights_to=1
         "touristGroup[adults]": adults,
         "touristGroup[kids]": kids,
         "touristGroup[infants]": 0,
-        "checkInDateRange[from]": "2025-10-07",
-        "checkInDateRange[to]": "2025-11-06",
-        "hotelCategories[]": [2, 3, 4, 7, 8],  # 2-5*
-        "resorts[]": [2162, 2163, 2159]  # любые курорты страны (из справочника)
+        "checkInDateRange[from]": str(date_from or today),
+        "checkInDateRange[to]": str(date_to or today + datetime.timedelta(days=30)),
+    }
+    if hotel_categories:
+        query["hotelCategories[]"] = list(hotel_categories)
+    if resorts:
+        query["resorts[]"] = list(resorts)
+    resp = (session or requests).get(
+        f"{BASE_URL}/statistic/cheapestTours", params=query, headers=HEADERS, timeout=30
+    )
+    # любой не-200 (429/5xx, но и 401/403 при протухшем токене) — исключение, а не пустая выдача:
+    # иначе data/harvester.py отметит окно скачанным и удалит из tours его предложения
+    resp.raise_for_status()
+    if resp.status_code != 200:
+        raise requests.HTTPError(f"{resp.status_code} for url: {resp.url}", response=resp)
+    return resp.json().get("data", [])
+
+def tour_row(t, country_id, city_id) -> dict:
+    # цена может быть int или {"amount": ..., "currency": ...}
+    if isinstance(t.get("price"), dict):
+        price = t["price"].get("amount")
+        currency = t["price"].get("currency", "RUB")
+    else:
+        price = t.get("price")
+        currency = "RUB"
+
+    return {
+        "api_id": t.get("hotelId"),
+        "country_id": country_id,
+        "city_id": city_id,
+        "resort_id": t.get("resortId"),
+        "hotel_name": t.get("hotelName"),
+        "nights": t.get("nights"),
+        "price": price,
+        "currency": currency,
+        "url": t.get("tourPageUrl"),
+        "check_in": t.get("checkinDate"),
+        "adults": 2,
+        "kids": 0,
+        "hotel_category_id": t.get("hotelCategory"),
+        "meal_id": t.get("mealId"),
     }
-    resp = requests.get(f"{BASE_URL}/statistic/cheapestTours", params=query, headers=HEADERS)
-    if resp.status_code == 200:
-        return resp.json().get("data", [])
-    return []
-
-def save_tours(tours, country_id, city_id):
-    con = get_connection()
-    cur = con.cursor()
-    for t in tours:
-        # цена может быть int или {"amount": ..., "currency": ...}
-        if isinstance(t.get("price"), dict):
-            price = t["price"].get("amount")
-            currency = t["price"].get("currency", "RUB")
-        else:
-            price = t.get("price")
-            currency = "RUB"
-
-        cur.execute("""
-            INSERT INTO tours(api_id, country_id, city_id, resort_id, hotel_name,
-                             nights, price, currency, url, check_in, adults, kids,
-                             hotel_category_id, meal_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            t.get("hotelId"),
-            country_id,
-            city_id,
-            t.get("resortId"),
-            t.get("hotelName"),
-            t.get("nights"),
-            price,
-            currency,
-            t.get("tourPageUrl"),
-            t.get("checkinDate"),
-            2,
-            0,
-            t.get("hotelCategory"),
-            t.get("mealId")
-        ))
-    con.commit()
-    con.close()
-    print(f"💾 Сохранено {len(tours)} туров ({country_id}/{city_id})")
+
+def save_tours(tours, country_id, city_id, replace_window=None):
+    """
+    Upsert предложений направления. replace_window — окно запроса cheapestTours
+    (date_from, date_to, nights_from, nights_to): выгрузка окна полная, и предложения
+    этого окна, которых в ней нет, удаляются из tours.
+    """
+    rows = [tour_row(t, country_id, city_id) for t in tours]
+    if replace_window:
+        return replace_tours(rows, country_id, city_id, **replace_window)
+    return upsert_tours(rows)
 
 def load_and_save_cheapest_tours(country_id, city_id, nights_from=7, nights_to=12):
     tours = get_cheapest_tours(country_id, city_id, nights_from, nights_to)
@@ -143,10 +134,12 @@ def load_and_save_cheapest_tours(country_id, city_id, nights_from=7, nights_to=1
         print(f"⚠️ Нет данных для {country_id}/{city_id}")
 
 # -------------------------------
-# Массовая загрузка популярных направлений
+# Массовая загрузка направлений (матрица — в config.yaml, раздел harvester)
 # -------------------------------
 
 if __name__ == "__main__":
+    from data.harvester import harvest
+
     # Загрузим справочники
     save_countries()
     save_cities()
@@ -154,10 +147,4 @@ if __name__ == "__main__":
     save_hotel_categories()
     save_meals()
 
-    countries = {92: "Турция"}
-    cities = {2: "Москва", 25: "Екатеринбург"}
-
-    for c_id in countries:
-        for city_id in cities:
-            print(f"🔎 Загружаю {countries[c_id]} из {cities[city_id]} (5–14 ночей)")
-            load_and_save_cheapest_tours(c_id, city_id, 5, 14)
\ No newline at end of file
+    harvest()
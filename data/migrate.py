@@ -0,0 +1,92 @@
+import os
+import sqlite3
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_FILE = os.path.join(DATA_DIR, "migrations.sql")
+SEARCH_INDEXES_FILE = os.path.join(DATA_DIR, "search_indexes.sql")
+REFERENCE_VERSION_FILE = os.path.join(DATA_DIR, "reference_version.sql")
+HOTEL_SEARCH_FILE = os.path.join(DATA_DIR, "hotel_search.sql")
+
+
+def _columns(con: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_tour_natural_key(con: sqlite3.Connection) -> None:
+    """
+    Уникальный индекс под upsert в data/ingest.py. Раньше каждый прогон загрузчика
+    дописывал копии — перед созданием индекса оставляем по ключу только самую свежую строку.
+    """
+    if con.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'uq_tours_offer'").fetchone():
+        return
+    removed = con.execute("""
+        DELETE FROM tours
+        WHERE api_id IS NOT NULL AND check_in IS NOT NULL AND nights IS NOT NULL AND city_id IS NOT NULL
+          AND id NOT IN (
+              SELECT MAX(id) FROM tours
+              WHERE api_id IS NOT NULL AND check_in IS NOT NULL AND nights IS NOT NULL AND city_id IS NOT NULL
+              GROUP BY api_id, check_in, nights, city_id
+          )
+    """).rowcount
+    con.execute("CREATE UNIQUE INDEX uq_tours_offer ON tours(api_id, check_in, nights, city_id)")
+    if removed:
+        print(f"🧹 Удалено дублей туров: {removed}")
+
+
+def rebuild_hotel_search(con: sqlite3.Connection) -> int:
+    """Полная переиндексация hotel_search из hotel_descriptions (дальше её поддерживают триггеры)."""
+    con.execute("DELETE FROM hotel_search")
+    return con.execute("""
+        INSERT INTO hotel_search (rowid, hotel_name, description)
+        SELECT hotel_api_id, replace(replace(hotel_name, 'ё', 'е'), 'Ё', 'Е'),
+               replace(replace(description, 'ё', 'е'), 'Ё', 'Е')
+        FROM hotel_descriptions
+    """).rowcount
+
+
+def _add_hotel_search(con: sqlite3.Connection) -> None:
+    """FTS5-индекс описаний; без FTS5 в сборке SQLite поиск работает и без него."""
+    exists = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'hotel_search'").fetchone()
+    try:
+        with open(HOTEL_SEARCH_FILE, "r", encoding="utf-8") as f:
+            con.executescript(f.read())
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Полнотекстовый индекс описаний не создан: {e}")
+        return
+    if not exists:
+        print(f"🔎 Проиндексировано описаний: {rebuild_hotel_search(con)}")
+
+
+def apply_migrations(con: sqlite3.Connection) -> None:
+    """Базовая схема + изменения для уже существующих баз (идемпотентно)."""
+    with open(MIGRATIONS_FILE, "r", encoding="utf-8") as f:
+        con.executescript(f.read())
+
+    # check_in_month: ALTER TABLE ADD COLUMN нельзя написать через IF NOT EXISTS
+    if "check_in_month" not in _columns(con, "tours"):
+        con.execute("ALTER TABLE tours ADD COLUMN check_in_month INTEGER")
+        con.execute("UPDATE tours SET check_in_month = CAST(strftime('%m', check_in) AS INTEGER)")
+
+    # ALTER TABLE не умеет DEFAULT CURRENT_TIMESTAMP — старым строкам ставим время создания
+    if "last_seen" not in _columns(con, "tours"):
+        con.execute("ALTER TABLE tours ADD COLUMN last_seen TIMESTAMP")
+        con.execute("UPDATE tours SET last_seen = created_at")
+
+    _add_tour_natural_key(con)
+
+    with open(SEARCH_INDEXES_FILE, "r", encoding="utf-8") as f:
+        con.executescript(f.read())
+    with open(REFERENCE_VERSION_FILE, "r", encoding="utf-8") as f:
+        con.executescript(f.read())
+    _add_hotel_search(con)
+    # статистика для планировщика, чтобы он выбирал составные индексы
+    con.execute("ANALYZE")
+    con.commit()
+
+
+if __name__ == "__main__":
+    from utils.db_pool import get_pool
+
+    with get_pool(create=True).write() as con:
+        apply_migrations(con)
+    print("✅ Миграции применены")
@@ -47,7 +47,9 @@ CREATE TABLE IF NOT EXISTS tours (
     kids INTEGER DEFAULT 0,
     hotel_category_id INTEGER,     -- категория отеля
     meal_id INTEGER,               -- питание
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    check_in_month INTEGER,        -- месяц заезда (data/ingest.py; иначе — триггер в search_indexes.sql)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- когда предложение последний раз пришло из API
 
     FOREIGN KEY (country_id) REFERENCES countries(id),
     FOREIGN KEY (city_id) REFERENCES cities(id),
@@ -63,6 +65,45 @@ CREATE TABLE IF NOT EXISTS hotel_descriptions (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Признаки отелей из описаний (bot_service/hotel_features.py); NULL — в описании не указано
+CREATE TABLE IF NOT EXISTS hotel_features (
+    hotel_api_id INTEGER PRIMARY KEY,
+    beach_line INTEGER,          -- 1, 2, 3
+    beach_type TEXT,             -- sand / pebble / mixed / platform
+    sea_distance_m INTEGER,
+    airport_km REAL,
+    pools INTEGER,
+    heated_pool INTEGER,
+    kids_pool INTEGER,
+    aquapark INTEGER,
+    kids_club INTEGER,
+    animation INTEGER,
+    adults_only INTEGER,
+    quiet INTEGER,
+    spa INTEGER,
+    wifi INTEGER,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+-- sql_filter join'ит по первичному ключу; эти — под отбор отелей по самым частым пожеланиям
+CREATE INDEX IF NOT EXISTS idx_hotel_features_beach ON hotel_features(beach_line, beach_type);
+CREATE INDEX IF NOT EXISTS idx_hotel_features_kids ON hotel_features(kids_club, aquapark);
+
+-- Окна выгрузки data/harvester.py: что и когда скачано (возобновление прерванного прогона)
+CREATE TABLE IF NOT EXISTS harvest_windows (
+    country_id INTEGER NOT NULL,
+    city_id INTEGER NOT NULL,
+    nights_from INTEGER NOT NULL,
+    nights_to INTEGER NOT NULL,
+    date_from DATE NOT NULL,
+    date_to DATE NOT NULL,
+    run_id TEXT,                   -- прогон, который последним обработал окно
+    status TEXT,                   -- done / error
+    rows INTEGER DEFAULT 0,
+    error TEXT,
+    fetched_at TIMESTAMP,
+    PRIMARY KEY (country_id, city_id, nights_from, nights_to, date_from, date_to)
+);
+
 -- Индексы для ускорения поиска туров
 CREATE INDEX IF NOT EXISTS idx_tours_country ON tours(country_id);
 CREATE INDEX IF NOT EXISTS idx_tours_city    ON tours(city_id);
@@ -0,0 +1,97 @@
+-- Версия справочников: любая запись в них увеличивает счётчик,
+-- и utils.reference подхватывает новые данные без перезапуска бота
+CREATE TABLE IF NOT EXISTS reference_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO reference_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_countries_insert_version
+AFTER INSERT ON countries
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_countries_update_version
+AFTER UPDATE ON countries
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_countries_delete_version
+AFTER DELETE ON countries
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cities_insert_version
+AFTER INSERT ON cities
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cities_update_version
+AFTER UPDATE ON cities
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_cities_delete_version
+AFTER DELETE ON cities
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_resorts_insert_version
+AFTER INSERT ON resorts
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_resorts_update_version
+AFTER UPDATE ON resorts
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_resorts_delete_version
+AFTER DELETE ON resorts
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_categories_insert_version
+AFTER INSERT ON hotel_categories
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_categories_update_version
+AFTER UPDATE ON hotel_categories
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_hotel_categories_delete_version
+AFTER DELETE ON hotel_categories
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_meals_insert_version
+AFTER INSERT ON meals
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_meals_update_version
+AFTER UPDATE ON meals
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_meals_delete_version
+AFTER DELETE ON meals
+BEGIN
+    UPDATE reference_version SET version = version + 1 WHERE id = 1;
+END;
@@ -0,0 +1,33 @@
+-- Месяц заезда храним отдельно: фильтр по strftime('%m', check_in) не может использовать индекс.
+-- data/ingest.py передаёт его прямо в INSERT; триггер — страховка для прочих вставок
+-- (WHEN не пускает его на строки, где месяц уже есть, — лишнего UPDATE на строку нет)
+CREATE TRIGGER IF NOT EXISTS trg_tours_month_insert
+AFTER INSERT ON tours
+WHEN NEW.check_in_month IS NULL AND NEW.check_in IS NOT NULL
+BEGIN
+    UPDATE tours SET check_in_month = CAST(strftime('%m', NEW.check_in) AS INTEGER) WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tours_month_update
+AFTER UPDATE OF check_in ON tours
+BEGIN
+    UPDATE tours SET check_in_month = CAST(strftime('%m', NEW.check_in) AS INTEGER) WHERE id = NEW.id;
+END;
+
+-- Составные индексы под формы запросов sql_filter:
+-- равенства (страна, город) → диапазон дат/месяц → остальные фильтры и цена в индексе,
+-- чтобы отсев по ночам, питанию и категории шёл без чтения строк таблицы
+CREATE INDEX IF NOT EXISTS idx_tours_search_date
+    ON tours(country_id, city_id, check_in, nights, price, meal_id, hotel_category_id, resort_id);
+CREATE INDEX IF NOT EXISTS idx_tours_search_month
+    ON tours(country_id, city_id, check_in_month, price, nights, meal_id, hotel_category_id, resort_id);
+-- без дат: сразу в порядке цены (ORDER BY price без сортировки)
+CREATE INDEX IF NOT EXISTS idx_tours_search_price
+    ON tours(country_id, city_id, price, nights, meal_id, hotel_category_id, resort_id);
+-- город вылета не указан
+CREATE INDEX IF NOT EXISTS idx_tours_country_date
+    ON tours(country_id, check_in, nights, price, meal_id, hotel_category_id, resort_id);
+CREATE INDEX IF NOT EXISTS idx_tours_country_month
+    ON tours(country_id, check_in_month, price, nights, meal_id, hotel_category_id, resort_id);
+CREATE INDEX IF NOT EXISTS idx_tours_country_price
+    ON tours(country_id, price, nights, meal_id, hotel_category_id, resort_id);
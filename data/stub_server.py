@@ -0,0 +1,170 @@
+import argparse
+import datetime
+import json
+import random
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Локальная заглушка Travelata API для проверки загрузчика без токена и квот:
+# /directory/* и /statistic/cheapestTours с детерминированными предложениями,
+# /hotel/<id> — статические страницы отелей для bot_service.parser
+# (каждая --js-every-я страница отдаёт описание только через JavaScript).
+#
+#   python -m data.stub_server --port 8765 [--fail-rate 0.1] [--delay 0.05] [--drift 60] [--js-every 5]
+#   # config.yaml: travelata.base_url: "http://127.0.0.1:8765"
+
+DIRECTORIES = {
+    "countries": [{"id": 92, "name": "Турция"}, {"id": 29, "name": "Египет"}, {"id": 7, "name": "Таиланд"}],
+    "departureCities": [{"id": 2, "name": "Москва"}, {"id": 3, "name": "Санкт-Петербург"},
+                        {"id": 25, "name": "Екатеринбург"}],
+    "resorts": [{"id": 2162, "countryId": 92, "name": "Анталья"}, {"id": 2163, "countryId": 92, "name": "Кемер"},
+                {"id": 2159, "countryId": 92, "name": "Аланья"}, {"id": 500, "countryId": 29, "name": "Хургада"},
+                {"id": 700, "countryId": 7, "name": "Пхукет"}],
+    "hotelCategories": [{"id": 2, "name": "2*"}, {"id": 3, "name": "3*"}, {"id": 4, "name": "4*"},
+                        {"id": 7, "name": "5*"}, {"id": 8, "name": "Apts"}],
+    "meals": [{"id": 1, "name": "Всё включено"}, {"id": 2, "name": "Ультра всё включено"},
+              {"id": 3, "name": "Завтрак"}, {"id": 4, "name": "Завтрак+ужин"}, {"id": 5, "name": "Без питания"}],
+}
+HOTELS_PER_COUNTRY = 40
+OFFERS_PER_DAY = 6
+
+
+def _rng(*parts) -> random.Random:
+    return random.Random(zlib.crc32(repr(parts).encode()))
+
+
+def cheapest_tours(query: dict, drift_sec: float = 0, page_base: str = "https://travelata.ru") -> list[dict]:
+    country_id = int(query["countries[]"][0])
+    city_id = int(query["departureCity"][0])
+    nights_from = int(query.get("nightRange[from]", ["7"])[0])
+    nights_to = int(query.get("nightRange[to]", ["12"])[0])
+    day = datetime.date.fromisoformat(query["checkInDateRange[from]"][0])
+    last = datetime.date.fromisoformat(query["checkInDateRange[to]"][0])
+    categories = {int(c) for c in query.get("hotelCategories[]", [])}
+    resorts = {int(r) for r in query.get("resorts[]", [])}
+    country_resorts = [r["id"] for r in DIRECTORIES["resorts"] if r["countryId"] == country_id] or [0]
+    # --drift: цены меняются раз в drift секунд — для проверки инкрементального обновления
+    epoch = int(time.time() // drift_sec) if drift_sec else 0
+
+    data = []
+    while day <= last:
+        rng = _rng(country_id, city_id, str(day))
+        for hotel in rng.sample(range(HOTELS_PER_COUNTRY), OFFERS_PER_DAY):
+            hotel_id = country_id * 1000 + hotel
+            hrng = _rng(hotel_id)
+            resort_id = hrng.choice(country_resorts)
+            category = hrng.choice([2, 3, 4, 7, 8])
+            if (categories and category not in categories) or (resorts and resort_id not in resorts):
+                continue
+            nights = rng.randint(nights_from, nights_to)
+            price = _rng(hotel_id, city_id, str(day), nights, epoch).randint(300, 2000) * 100
+            data.append({
+                "hotelId": hotel_id,
+                "hotelName": f"Hotel {hotel_id}",
+                "resortId": resort_id,
+                "hotelCategory": category,
+                "mealId": hrng.randint(1, 5),
+                "nights": nights,
+                "checkinDate": str(day),
+                "price": {"amount": price, "currency": "RUB"},
+                "tourPageUrl": f"{page_base}/hotel/{hotel_id}?checkin={day}&nights={nights}",
+            })
+        day += datetime.timedelta(days=1)
+    return data
+
+
+_BEACH = ["Песчаный пляж", "Галечный пляж", "Песчано-галечный пляж", "Пирс"]
+_EXTRAS = ["Бассейн", "Аквапарк", "Анимация", "Детский клуб", "Спа-центр", "Wi-Fi", "Фитнес", "Хамам"]
+
+
+def hotel_page(hotel_id: int, js_only: bool = False) -> str:
+    """Страница отеля с той же разметкой, что и на travelata.ru (.attributes__*, .attrGroup)."""
+    rng = _rng("page", hotel_id)
+    icons = rng.sample(_EXTRAS, 4)
+    body = f"""
+    <div class="attributes">
+      <div class="attributes__text"><p>Hotel {hotel_id} расположен в {rng.randint(1, 20) * 50} м от моря.</p>
+        <p>{rng.choice(_BEACH)}, {", ".join(icons[:2]).lower()} &amp; уютные номера.</p></div>
+      <ul>{"".join(f'<li><span class="attributes__icon-text"> {i} </span></li>' for i in icons)}</ul>
+      <div class="attrGroup"><div class="attrGroupName">Пляж</div>
+        <div class="attrGroupContent"><span>{rng.choice(_BEACH)}</span> <span>Зонтики</span></div></div>
+      <div class="attrGroup"><div class="attrGroupName">Удобства</div>
+        <div class="attrGroupContent">{"<br>".join(rng.sample(_EXTRAS, 3))}</div></div>
+    </div>"""
+    if js_only:
+        body = f"""<div id="app"></div>
+    <script>document.getElementById("app").innerHTML = {json.dumps(body)};</script>"""
+    return f"""<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title>Hotel {hotel_id}</title></head>
+<body><header><nav><a href="/">Travelata</a></nav></header>{body}
+<footer>© Travelata</footer></body></html>"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    fail_rate = 0.0
+    delay = 0.0
+    drift = 0.0
+    js_every = 0
+
+    def _send_html(self, html: str) -> None:
+        body = html.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            return self._send(503, {"error": "stub failure"})
+        if url.path.startswith("/directory/"):
+            name = url.path.rsplit("/", 1)[-1]
+            if name in DIRECTORIES:
+                return self._send(200, {"data": DIRECTORIES[name]})
+        if url.path == "/statistic/cheapestTours":
+            try:
+                page_base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+                return self._send(200, {"data": cheapest_tours(parse_qs(url.query), self.drift, page_base)})
+            except (KeyError, ValueError) as e:
+                return self._send(400, {"error": f"bad query: {e}"})
+        if url.path.startswith("/hotel/") and url.path.rsplit("/", 1)[-1].isdigit():
+            hotel_id = int(url.path.rsplit("/", 1)[-1])
+            return self._send_html(hotel_page(hotel_id, bool(self.js_every) and hotel_id % self.js_every == 0))
+        self._send(404, {"error": "not found"})
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int = 8765, fail_rate: float = 0.0, delay: float = 0.0, drift: float = 0.0,
+          js_every: int = 0) -> ThreadingHTTPServer:
+    StubHandler.fail_rate, StubHandler.delay, StubHandler.drift = fail_rate, delay, drift
+    StubHandler.js_every = js_every
+    return ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заглушка Travelata API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="задержка ответа, сек")
+    parser.add_argument("--drift", type=float, default=0.0, help="цены меняются раз в N секунд")
+    parser.add_argument("--js-every", type=int, default=0, help="каждая N-я страница отеля только через JS")
+    args = parser.parse_args()
+    server = serve(args.port, args.fail_rate, args.delay, args.drift, args.js_every)
+    print(f"🧪 Заглушка Travelata на http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -1,8 +1,14 @@
+import asyncio
+import email.utils
+import importlib.util
 import json
+import random
 import re
+import threading
 import time
 
-import requests
+import httpx
+from llm_service.parse_cache import ParseCache
 from utils.config import load_config
 
 config = load_config()
@@ -11,6 +17,111 @@ API_KEY = config["llm"]["api_key"]
 MODEL = config["llm"]["model"]
 API_URL = "https://openrouter.ai/api/v1/chat/completions"
 
+# Пул keep-alive соединений к OpenRouter, общий для всех эндпоинтов:
+# без него каждый вызов платит за новый TCP+TLS handshake.
+# Все запросы идут на один хост, поэтому лимит пула — это и лимит на хост.
+_http_cfg = config["llm"].get("http", {})
+HTTP2 = _http_cfg.get("http2", True) and importlib.util.find_spec("h2") is not None
+_limits = httpx.Limits(
+    max_connections=_http_cfg.get("max_connections", 20),
+    max_keepalive_connections=_http_cfg.get("max_keepalive", 10),
+    keepalive_expiry=_http_cfg.get("keepalive_expiry", 60),
+)
+_headers = {
+    "Authorization": f"Bearer {API_KEY}",
+    "Content-Type": "application/json",
+}
+http_client = httpx.Client(http2=HTTP2, limits=_limits, headers=_headers, timeout=45)
+_async_client: httpx.AsyncClient | None = None
+
+# Повторы: экспоненциальная пауза с jitter (или Retry-After от сервера),
+# чтобы воркеры под нагрузкой не засыпали и не просыпались синхронно.
+_retry_cfg = config["llm"].get("retry", {})
+RETRY_ATTEMPTS = _retry_cfg.get("attempts", 3)
+RETRY_BASE_DELAY = _retry_cfg.get("base_delay", 0.5)
+RETRY_MAX_DELAY = _retry_cfg.get("max_delay", 8)
+# Retry-After от сервера соблюдаем, но не дольше этого
+RETRY_AFTER_MAX = _retry_cfg.get("max_retry_after", 60)
+RETRY_STATUSES = (404, 429, 500, 502, 503, 504)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(http2=HTTP2, limits=_limits, headers=_headers, timeout=45)
+    return _async_client
+
+
+async def aclose():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    http_client.close()
+
+_parse_cache_cfg = config.get("parse_cache", {})
+parse_cache = ParseCache(
+    max_items=_parse_cache_cfg.get("max_items", 5000),
+    fuzzy=_parse_cache_cfg.get("fuzzy", False),
+    threshold=_parse_cache_cfg.get("fuzzy_threshold", 0.85),
+    ttl_seconds=_parse_cache_cfg.get("ttl_hours", 6) * 3600,
+)
+
+class LLMUnavailableError(RuntimeError):
+    """OpenRouter недоступен: circuit breaker открыт, вызовы сразу отклоняются."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM временно недоступен, повтор через {retry_after:.0f} сек.")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    После failures подряд неудачных попыток размыкается на cooldown секунд:
+    все вызовы в это время падают сразу, без сети и без пауз.
+    По истечении cooldown пропускает вызовы снова; первая же ошибка размыкает заново.
+    """
+
+    def __init__(self, failures: int = 5, cooldown: float = 30):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        remaining = self.retry_after()
+        if remaining > 0:
+            raise LLMUnavailableError(remaining)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive += 1
+            if self._consecutive >= self.failures:
+                self._open_until = time.monotonic() + self.cooldown
+                print(f"[LLM] {self._consecutive} ошибок подряд, breaker открыт на {self.cooldown} сек.")
+
+    def state(self) -> dict:
+        return {
+            "open": self.retry_after() > 0,
+            "retry_after": round(self.retry_after(), 1),
+            "consecutive_failures": self._consecutive,
+        }
+
+
+_breaker_cfg = config["llm"].get("breaker", {})
+breaker = CircuitBreaker(
+    failures=_breaker_cfg.get("failures", 5),
+    cooldown=_breaker_cfg.get("cooldown_sec", 30),
+)
+
 SYSTEM_PROMPT = """
 You are a travel‑assistant model that converts a user's free‑form query into a structured JSON used 
 to find package tours in a database.
@@ -138,37 +249,102 @@ def safe_json_parse(text: str) -> dict:
                 pass
     return {"raw": text}
 
-def call_llm(messages: list[dict], temperature: float = 0.2) -> str:
-    """Общий запрос к OpenRouter — с повтором и паузой при 404."""
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json",
-    }
+def _parse_retry_after(header: str) -> float | None:
+    """Секунды из Retry-After (число или HTTP-дата); None — заголовок не разобрать."""
+    try:
+        return float(header)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(header)
+    except (TypeError, ValueError, IndexError):
+        return None
+    return parsed.timestamp() - time.time()
+
+def _retry_delay(attempt: int, resp: httpx.Response | None) -> float:
+    """Пауза перед следующей попыткой: Retry-After, если сервер его прислал, иначе full jitter."""
+    header = resp.headers.get("Retry-After") if resp is not None else None
+    delay = _parse_retry_after(header) if header else None
+    if delay is not None:
+        return min(max(delay, 0.0), RETRY_AFTER_MAX)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+def _handle_response(resp: httpx.Response | None) -> str | None:
+    """
+    Текст ответа при успехе; None — если попытку стоит повторить.
+    Неудачу breaker получает один раз на вызов (см. _give_up), а не на каждую попытку.
+    """
+    if resp is None:
+        return None
+    if resp.is_success:
+        breaker.record_success()
+        return resp.json()["choices"][0]["message"]["content"]
+    # 404 – обычно rate‑limit или privacy: ждём и повторяем
+    if resp.status_code in RETRY_STATUSES:
+        return None
+    raise RuntimeError(f"LLM error {resp.status_code}: {resp.text}")
+
+def _give_up() -> None:
+    """Все попытки вызова исчерпаны: одна неудача для breaker'а и ошибка вызывающему."""
+    breaker.record_failure()
+    breaker.check()
+    raise RuntimeError(f"LLM сервис не вернул корректный ответ после {RETRY_ATTEMPTS} попыток.")
 
+def call_llm(messages: list[dict], temperature: float = 0.2) -> str:
+    """Общий запрос к OpenRouter — с повтором, backoff и circuit breaker."""
     payload = {"model": MODEL, "messages": messages, "temperature": temperature}
 
-    for attempt in range(3):                               # максимум 3 попытки
-        resp = requests.post(API_URL, headers=headers, json=payload, timeout=45)
-        if resp.ok:
-            j = resp.json()
-            return j["choices"][0]["message"]["content"]
+    for attempt in range(RETRY_ATTEMPTS):
+        breaker.check()
+        try:
+            resp = http_client.post(API_URL, json=payload)
+        except httpx.TransportError as e:
+            print(f"[LLM] сетевая ошибка: {e!r}")
+            resp = None
+        text = _handle_response(resp)
+        if text is not None:
+            return text
+        if attempt + 1 < RETRY_ATTEMPTS and not breaker.retry_after():
+            delay = _retry_delay(attempt, resp)
+            print(f"[LLM] {resp.status_code if resp is not None else 'нет ответа'}, повтор через {delay:.1f} сек.")
+            time.sleep(delay)
+
+    _give_up()
 
-        # 404 – обычно rate‑limit или privacy: ждём и повторяем
-        if resp.status_code in (404, 429, 503):
-            print(f"[LLM] {resp.status_code}, повтор через 3 сек.")
-            time.sleep(3)
-            continue
+async def acall_llm(messages: list[dict], temperature: float = 0.2) -> str:
+    """То же, что call_llm, но не блокирует event loop FastAPI."""
+    payload = {"model": MODEL, "messages": messages, "temperature": temperature}
 
-        raise RuntimeError(f"LLM error {resp.status_code}: {resp.text}")
+    for attempt in range(RETRY_ATTEMPTS):
+        breaker.check()
+        try:
+            resp = await get_async_client().post(API_URL, json=payload)
+        except httpx.TransportError as e:
+            print(f"[LLM] сетевая ошибка: {e!r}")
+            resp = None
+        text = _handle_response(resp)
+        if text is not None:
+            return text
+        if attempt + 1 < RETRY_ATTEMPTS and not breaker.retry_after():
+            delay = _retry_delay(attempt, resp)
+            print(f"[LLM] {resp.status_code if resp is not None else 'нет ответа'}, повтор через {delay:.1f} сек.")
+            await asyncio.sleep(delay)
 
-    raise RuntimeError("LLM сервис не вернул корректный ответ после 3 попыток.")
+    _give_up()
 # ----------------------------------------------------------------------------
 # 1️⃣ парсинг пользовательского запроса → structured JSON
 # ----------------------------------------------------------------------------
-def parse_user_request(query: str) -> dict:
+async def parse_user_request(query: str) -> dict:
+    cached = parse_cache.get(query)
+    if cached is not None:
+        return cached
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": query},
     ]
-    text = call_llm(messages, temperature=0)
-    return safe_json_parse(text)
+    text = await acall_llm(messages, temperature=0)
+    parsed = safe_json_parse(text)
+    if "raw" not in parsed:
+        # нераспарсенный ответ не кэшируем — пусть следующий запрос попробует снова
+        parse_cache.set(query, parsed)
+    return parsed
@@ -1,24 +1,78 @@
+import asyncio
 import json
 import re
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from llm_service.llm_client import parse_user_request, call_llm  # теперь пакет виден
+from llm_service import llm_client
+from llm_service.llm_client import (  # теперь пакет виден
+    parse_user_request, acall_llm, config, parse_cache, safe_json_parse,
+    breaker, LLMUnavailableError,
+)
+from llm_service.score_cache import ScoreCache
+from utils.config import resolve_path
 
 app = FastAPI()
 
+# сколько отелей упаковывать в один prompt в /similarity_batch
+SIMILARITY_CHUNK_SIZE = config.get("llm", {}).get("similarity_chunk_size", 10)
+# сколько отелей объяснять одним prompt'ом и сколько раз переспрашивать недостающие id
+SUMMARIZE_BATCH_SIZE = config.get("llm", {}).get("summarize_batch_size", 5)
+SUMMARIZE_BATCH_RETRIES = config.get("llm", {}).get("summarize_batch_retries", 2)
+# общий лимит одновременных вызовов OpenRouter для /similarity(_batch) и /summarize(_batch):
+# чанки и досчёт по одному отелю встают в очередь, а не уходят сотней запросов сразу.
+# /parse — один вызов на сообщение пользователя, за пачками его не держим
+LLM_CONCURRENCY = config.get("llm", {}).get("concurrency", 8)
+_llm_slots = asyncio.Semaphore(LLM_CONCURRENCY)
+
+_cache_cfg = config.get("score_cache", {})
+score_cache = ScoreCache(
+    resolve_path(_cache_cfg.get("path", "data/similarity_cache.db")),
+    max_items=_cache_cfg.get("max_items", 10000),
+    ttl_seconds=_cache_cfg.get("ttl_hours", 168) * 3600,
+)
+
 class Query(BaseModel):
     query: str
 
+class HotelContext(BaseModel):
+    id: int | str | None = None
+    context: str
+
+class SimilarityBatch(BaseModel):
+    query: str
+    hotels: list[HotelContext]
+
+class SummarizeBatch(BaseModel):
+    query: str
+    hotels: list[dict]
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable(request: Request, exc: LLMUnavailableError):
+    # breaker открыт — отвечаем сразу, клиент деградирует до ранжирования без LLM
+    retry_after = max(int(exc.retry_after), 1)
+    return JSONResponse(
+        status_code=503,
+        content={"error": "llm_unavailable", "retry_after": retry_after},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.aclose()
+
 @app.post("/parse")
-def parse_request(q: Query):
-    parsed = parse_user_request(q.query)
+async def parse_request(q: Query):
+    parsed = await parse_user_request(q.query)
     return parsed
 
-@app.post("/similarity")
-def similarity(req: dict):
-    query = req.get("query", "")
-    context = req.get("context", "")
+async def _llm(messages: list[dict], temperature: float) -> str:
+    # слот берётся на каждый вызов, а не на чанк: досчёт по одному внутри чанка не ждёт сам себя
+    async with _llm_slots:
+        return await acall_llm(messages, temperature=temperature)
+
+async def _score_single(query: str, context: str) -> float | None:
     prompt = (
         "Оцени сходство между двумя текстами от 0 до 1. "
         "Первый текст — описание пожеланий пользователя, "
@@ -27,16 +81,106 @@ def similarity(req: dict):
         "Верни только одно число — коэффициент сходства (0–1)."
     )
     messages = [{"role": "user", "content": prompt}]
-    answer = call_llm(messages, temperature=0)
-    # Пытаемся извлечь число
+    answer = await _llm(messages, temperature=0)
+    return _parse_single_score(answer)
+
+def _parse_single_score(answer: str) -> float | None:
+    """Ровно одно число 0–1 в ответе; иначе None — такую оценку не кэшируем."""
+    numbers = re.findall(r"\d+(?:[.,]\d+)?", answer)
+    if len(numbers) != 1:
+        return None
+    score = float(numbers[0].replace(",", "."))
+    return score if 0.0 <= score <= 1.0 else None
+
+def _parse_scores(answer: str, n: int) -> list[float] | None:
+    """
+    Оценки из JSON-массива ровно из n чисел; None — если ответ не сошёлся.
+    Числа вне массива не подбираем: "1: 0.8, 2: 0.5" — это номера отелей вперемешку с оценками,
+    а массив с цифрами рядом ("[1] 0.3") — скорее метка отеля, чем ответ.
+    """
+    m = re.search(r"\[.*?\]", answer, re.DOTALL)
+    if m and re.search(r"\d", answer[:m.start()] + answer[m.end():]):
+        return None
     try:
-        score = float(re.findall(r"\d\.\d+|\d", answer)[0])
-    except Exception:
-        score = 0.0
+        values = json.loads(m.group(0)) if m else None
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != n:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return None
+    return [min(max(float(v), 0.0), 1.0) for v in values]
+
+async def _score_chunk(query: str, contexts: list[str]) -> list[float | None]:
+    hotels_text = "\n\n".join(f"[{i}] {c}" for i, c in enumerate(contexts, 1))
+    prompt = (
+        "Оцени сходство между пожеланиями пользователя и описанием каждого "
+        "отеля по шкале от 0 до 1.\n\n"
+        f"Пожелания:\n{query}\n\nОтели:\n{hotels_text}\n\n"
+        f"Верни только JSON-массив из {len(contexts)} чисел (0–1) "
+        "в том же порядке, что и отели, без пояснений."
+    )
+    messages = [{"role": "user", "content": prompt}]
+    answer = await _llm(messages, temperature=0)
+    scores = _parse_scores(answer, len(contexts))
+    if scores is None:
+        # модель сбилась с формата — досчитываем чанк по одному отелю
+        print(f"[similarity_batch] некорректный ответ на {len(contexts)} отелей, считаю по одному")
+        scores = await asyncio.gather(*(_score_single(query, c) for c in contexts))
+    return scores
+
+@app.post("/similarity")
+async def similarity(req: dict):
+    query = req.get("query", "")
+    context = req.get("context", "")
+    key = ScoreCache.make_key(query, req.get("hotel_id"), context)
+    # SQLite-кэш (чтение, commit) — в пуле потоков, чтобы не держать event loop
+    score = await asyncio.to_thread(score_cache.get, key)
+    if score is None:
+        score = await _score_single(query, context)
+        if score is not None:
+            await asyncio.to_thread(score_cache.set, key, score)
     return {"score": score}
 
+@app.post("/similarity_batch")
+async def similarity_batch(req: SimilarityBatch):
+    """
+    Оценивает сходство одного набора пожеланий с N отелями.
+    Принимает {"query": "...", "hotels": [{"id": ..., "context": "..."}]},
+    возвращает {"scores": [...]} в том же порядке, что и hotels
+    (null — модель не дала оценку этому отелю).
+    """
+    keys = [ScoreCache.make_key(req.query, h.id, h.context) for h in req.hotels]
+    scores = await asyncio.to_thread(score_cache.get_many, keys)
+
+    # в LLM уходят только отели, которых нет в кэше
+    # чанки уходят параллельно через общий пул соединений
+    missing = [i for i, s in enumerate(scores) if s is None]
+    chunks = [missing[j:j + SIMILARITY_CHUNK_SIZE] for j in range(0, len(missing), SIMILARITY_CHUNK_SIZE)]
+    results = await asyncio.gather(
+        *(_score_chunk(req.query, [req.hotels[i].context for i in chunk]) for chunk in chunks)
+    )
+    fresh = {}
+    for chunk, chunk_scores in zip(chunks, results):
+        for i, score in zip(chunk, chunk_scores):
+            scores[i] = score
+            # неразобранный ответ (None) не кэшируем: следующий запрос спросит модель снова
+            if score is not None:
+                fresh[keys[i]] = score
+    if fresh:
+        await asyncio.to_thread(score_cache.set_many, fresh)
+    return {"scores": scores}
+
+@app.get("/stats")
+def stats():
+    return {
+        "similarity_cache": score_cache.stats(),
+        "parse_cache": parse_cache.stats(),
+        "breaker": breaker.state(),
+    }
+
 @app.post("/summarize")
-def summarize(req: dict):
+async def summarize(req: dict):
     """
     Краткая генерация объяснения выбора: почему именно этот отель.
     Принимает {"query": "...", "hotel": {...}} и возвращает {"summary": "..."}.
@@ -56,8 +200,59 @@ def summarize(req: dict):
     )
 
     messages = [{"role": "user", "content": prompt}]
-    text = call_llm(messages, temperature=0.4)
+    text = await _llm(messages, temperature=0.4)
+    return {"summary": _clean_reason(text)}
 
+def _clean_reason(text: str) -> str:
     # простая очистка результата
-    clean = re.sub(r"(?i)^based on[^\n]*\n?", "", text).strip()
-    return {"summary": clean}
\ No newline at end of file
+    return re.sub(r"(?i)^based on[^\n]*\n?", "", text).strip()
+
+async def _summarize_chunk(user_query: str, hotels: dict[str, dict]) -> dict[str, str]:
+    """Один prompt на несколько отелей; возвращает только корректно разобранные id."""
+    prompt = (
+        "Пользовательский запрос:\n"
+        f"{user_query}\n\n"
+        "Отели (ключ — id отеля):\n"
+        f"{json.dumps(hotels, ensure_ascii=False, indent=2)}\n\n"
+        "Для каждого отеля сравни запрос и отель, напиши 2–3 предложения на русском, "
+        "почему этот вариант соответствует пожеланиям пользователя. "
+        "Не используй списки, не упоминай слово 'пользователь'. "
+        "Верни только JSON-объект вида {\"<id>\": \"текст\"} "
+        f"с ключами {json.dumps(list(hotels), ensure_ascii=False)}."
+    )
+    messages = [{"role": "user", "content": prompt}]
+    data = safe_json_parse(await _llm(messages, temperature=0.4))
+    result = {}
+    for hid in hotels:
+        text = data.get(hid) if isinstance(data, dict) else None
+        if isinstance(text, str) and text.strip():
+            result[hid] = _clean_reason(text)
+    return result
+
+@app.post("/summarize_batch")
+async def summarize_batch(req: SummarizeBatch):
+    """
+    Объяснения выбора сразу для нескольких отелей: запрос и инструкции
+    отправляются один раз на пачку из SUMMARIZE_BATCH_SIZE отелей.
+    Принимает {"query": "...", "hotels": [{"id": ..., ...}]},
+    возвращает {"summaries": {"<id>": "..."}}; если модель вернула битый JSON
+    или пропустила отели, переспрашиваем только про недостающие id.
+    """
+    hotels = {str(h.get("id")): {k: v for k, v in h.items() if k != "id"} for h in req.hotels}
+    ids = list(hotels)
+
+    async def run_chunk(missing):
+        done = {}
+        for attempt in range(1 + SUMMARIZE_BATCH_RETRIES):
+            done.update(await _summarize_chunk(req.query, {hid: hotels[hid] for hid in missing}))
+            missing = [hid for hid in missing if hid not in done]
+            if not missing:
+                break
+            print(f"[summarize_batch] попытка {attempt + 1}: нет ответа для {missing}")
+        return done
+
+    summaries = {}
+    chunks = [ids[i:i + SUMMARIZE_BATCH_SIZE] for i in range(0, len(ids), SUMMARIZE_BATCH_SIZE)]
+    for done in await asyncio.gather(*(run_chunk(c) for c in chunks)):
+        summaries.update(done)
+    return {"summaries": summaries}
\ No newline at end of file
@@ -0,0 +1,160 @@
+import copy
+import datetime
+import difflib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# валюту и звёзды не выкидываем — от них зависит бюджет и категория
+_PUNCT_RE = re.compile(r"[^\w\s€$₽*]", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_CURRENCY_RE = re.compile(r"€|\$|₽|\b(?:евро|eur|usd|долл\w*|руб\w*|р)\b")
+_CURRENCIES = {"€": "eur", "евро": "eur", "eur": "eur", "$": "usd", "usd": "usd", "₽": "rub", "р": "rub"}
+_MONTH_RE = re.compile(
+    r"\b(январ|феврал|март|апрел|ма[йяе]|июн|июл|август|сентябр|октябр|ноябр|декабр|"
+    r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\w*"
+)
+# насколько должны совпадать слова, которыми запросы отличаются ("анталья" ~ "анталия")
+TYPO_RATIO = 0.8
+
+
+def _currencies(key: str) -> set[str]:
+    return {_CURRENCIES.get(c) or ("usd" if c.startswith("долл") else "rub") for c in _CURRENCY_RE.findall(key)}
+
+
+def _months(key: str) -> set[str]:
+    return {m[:3] for m in _MONTH_RE.findall(key)}
+
+
+def _only_typos(a: set[str], b: set[str]) -> bool:
+    """Каждое слово, которого нет в другом запросе, — опечатка какого-то его слова, а не другое слово."""
+    only_a, only_b = a - b, b - a
+    if len(only_a) != len(only_b):
+        return False
+    return all(
+        any(difflib.SequenceMatcher(None, w, other).ratio() >= TYPO_RATIO for other in only_b)
+        for w in only_a
+    )
+
+
+def normalize_query(text: str) -> str:
+    text = text.lower().replace("ё", "е")
+    text = _PUNCT_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def shingles(text: str, n: int = 3) -> set[str]:
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+def _same_request(key: str, other: str, other_words: set[str]) -> bool:
+    return (
+        _DIGITS_RE.findall(key) == _DIGITS_RE.findall(other)
+        and _months(key) == _months(other)
+        and _currencies(key) == _currencies(other)
+        and _only_typos(set(key.split()), other_words)
+    )
+
+
+class ParseCache:
+    """
+    LRU-кэш результатов /parse по нормализованному тексту запроса.
+    Записи живут не дольше ttl_seconds и только до конца дня: в разборе лежат
+    даты, посчитанные от «сегодня».
+    При fuzzy=True ищет похожий запрос по Жаккару символьных 3-грамм
+    (через инвертированный индекс шинглов) и берёт его разбор, только если
+    запросы отличаются опечатками: числа, месяцы и валюта совпадают, а каждое
+    отличающееся слово похоже на слово другого запроса («Анталия» и «Кемер» —
+    разные запросы, хотя 3-граммы у них почти общие).
+    """
+
+    def __init__(self, max_items: int = 5000, fuzzy: bool = False, threshold: float = 0.85,
+                 ttl_seconds: float = 6 * 3600):
+        self.max_items = max_items
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self._items = OrderedDict()      # key -> (parsed, shingles, слова, время записи)
+        self._by_shingle = {}            # shingle -> set(key)
+        self._lock = threading.Lock()
+        self._clock = time.time
+
+    def _fresh(self, created: float) -> bool:
+        now = self._clock()
+        same_day = datetime.date.fromtimestamp(created) == datetime.date.fromtimestamp(now)
+        return same_day and now - created < self.ttl
+
+    def get(self, query: str) -> dict | None:
+        key = normalize_query(query)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and not self._fresh(item[3]):
+                self._forget(key)
+                item = None
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(item[0])
+            if self.fuzzy:
+                match = self._fuzzy_match(key)
+                if match is not None:
+                    self._items.move_to_end(match)
+                    self.hits += 1
+                    self.fuzzy_hits += 1
+                    return copy.deepcopy(self._items[match][0])
+            self.misses += 1
+            return None
+
+    def set(self, query: str, parsed: dict) -> None:
+        key = normalize_query(query)
+        sh = shingles(key)
+        with self._lock:
+            if key in self._items:
+                self._forget(key)
+            self._items[key] = (copy.deepcopy(parsed), sh, set(key.split()), self._clock())
+            for s in sh:
+                self._by_shingle.setdefault(s, set()).add(key)
+            while len(self._items) > self.max_items:
+                self._forget(next(iter(self._items)))
+
+    def _forget(self, key: str) -> None:
+        _, sh, _, _ = self._items.pop(key)
+        for s in sh:
+            keys = self._by_shingle.get(s)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_shingle[s]
+
+    def _fuzzy_match(self, key: str) -> str | None:
+        sh = shingles(key)
+        overlap = {}
+        for s in sh:
+            for k in self._by_shingle.get(s, ()):
+                overlap[k] = overlap.get(k, 0) + 1
+
+        best = None
+        for k, inter in overlap.items():
+            _, other, words, created = self._items[k]
+            score = inter / (len(sh) + len(other) - inter)
+            if score >= self.threshold and self._fresh(created) and _same_request(key, k, words):
+                # при равенстве берём лексикографически меньший ключ — детерминированно
+                if best is None or (score, best[1]) > (best[0], k):
+                    best = (score, k)
+        return best[1] if best else None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "fuzzy_hits": self.fuzzy_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._items),
+        }
@@ -0,0 +1,100 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ScoreCache:
+    """
+    Двухуровневый кэш оценок /similarity: LRU в памяти + SQLite на диске.
+    Ключ — нормализованные пожелания, id отеля и хеш его описания,
+    поэтому изменившееся описание автоматически даёт промах.
+    """
+
+    def __init__(self, path: str, max_items: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        self.max_items = max_items
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._con = sqlite3.connect(path, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("""
+            CREATE TABLE IF NOT EXISTS similarity_scores (
+                key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._con.commit()
+
+    @staticmethod
+    def make_key(preferences: str, hotel_id, context: str) -> str:
+        prefs = sorted({p.strip().lower() for p in preferences.split(",") if p.strip()})
+        digest = hashlib.sha1(context.encode("utf-8")).hexdigest()[:16]
+        return f"{'|'.join(prefs)}#{hotel_id if hotel_id is not None else ''}#{digest}"
+
+    def get(self, key: str) -> float | None:
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                score, created = item
+                if now - created < self.ttl:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return score
+                del self._mem[key]
+
+            row = self._con.execute(
+                "SELECT score, created_at FROM similarity_scores WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: list[str]) -> list[float | None]:
+        return [self.get(k) for k in keys]
+
+    def set_many(self, items: dict[str, float]) -> None:
+        now = time.time()
+        with self._lock:
+            for key, score in items.items():
+                self._remember(key, score, now)
+            self._con.executemany(
+                "INSERT OR REPLACE INTO similarity_scores (key, score, created_at) VALUES (?, ?, ?)",
+                [(k, s, now) for k, s in items.items()],
+            )
+            self._writes += len(items)
+            if self._writes >= 1000:
+                # протухшие записи чистим пачкой, а не на каждой вставке
+                self._con.execute("DELETE FROM similarity_scores WHERE created_at < ?", (now - self.ttl,))
+                self._writes = 0
+            self._con.commit()
+
+    def set(self, key: str, score: float) -> None:
+        self.set_many({key: score})
+
+    def _remember(self, key: str, score: float, created: float) -> None:
+        self._mem[key] = (score, created)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "memory_items": len(self._mem),
+        }
@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+# Модули проекта читают config.yaml при импорте — до них подставляем тестовый конфиг:
+# база, кэши и индексы во временной папке, внешние сервисы на заведомо закрытом порту.
+TMP_DIR = tempfile.mkdtemp(prefix="travel_bot_tests_")
+CONFIG_PATH = os.path.join(TMP_DIR, "config.yaml")
+
+with open(CONFIG_PATH, "w", encoding="utf-8") as f:
+    f.write(f"""
+telegram: {{token: "test"}}
+travelata: {{base_url: "http://127.0.0.1:9", token: "test"}}
+database: {{path: "{TMP_DIR}/travelata.db"}}
+llm: {{api_key: "test", model: "test"}}
+llm_service:
+  url_parse: "http://127.0.0.1:9/parse"
+  url_similarity: "http://127.0.0.1:9/similarity"
+  url_summarize: "http://127.0.0.1:9/summarize"
+score_cache: {{path: "{TMP_DIR}/similarity_cache.db"}}
+embeddings: {{path: "{TMP_DIR}/hotel_vectors.npy"}}
+""")
+os.environ["CONFIG_PATH"] = CONFIG_PATH
+
+import sqlite3  # noqa: E402
+
+import pytest  # noqa: E402
+
+DB_PATH = os.path.join(TMP_DIR, "travelata.db")
+DIRECTORIES = {
+    "countries": [(92, "Турция"), (29, "Египет")],
+    "cities": [(2, "Москва"), (25, "Екатеринбург")],
+    "resorts": [(2162, 92, "Анталья"), (2163, 92, "Кемер"), (500, 29, "Хургада")],
+    "hotel_categories": [(4, "4*"), (7, "5*")],
+    "meals": [(1, "Всё включено"), (3, "Завтрак")],
+}
+
+
+@pytest.fixture(scope="session")
+def reference_db():
+    """База из config.yaml тестов: схема data.migrate и небольшие справочники."""
+    from data.migrate import apply_migrations
+
+    con = sqlite3.connect(DB_PATH)
+    apply_migrations(con)
+    for table, rows in DIRECTORIES.items():
+        con.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({', '.join('?' * len(rows[0]))})", rows)
+    con.commit()
+    con.close()
+    return DB_PATH
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from bot_service import tour_search
+from bot_service.models import Tour
+
+PARAMS = {"preferences": ["вид на море"], "duration_days": 7}
+
+
+def _tour(id_, price, text_score=0.0, **extra):
+    return Tour(id_, f"Hotel {id_}", 7, price, "RUB", "", "2030-06-10", api_id=id_, text_score=text_score, **extra)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Подменяет /similarity_batch: оценки по api_id, вызовы — в calls."""
+    calls = []
+
+    def install(scores):
+        async def fake(pref_text, tours):
+            calls.append([t.api_id for t in tours])
+            return [scores[t.api_id] for t in tours]
+        monkeypatch.setattr(tour_search, "_llm_scores", fake)
+        return calls
+
+    monkeypatch.setattr(tour_search, "_vector_scores", lambda pref_text, tours: None)
+    monkeypatch.setattr(tour_search, "CASCADE_LOG", None)
+    return install
+
+
+def _ids(tours):
+    return [t.api_id for t in tours]
+
+
+def test_zero_budget_skips_llm(llm):
+    calls = llm({1: 0.0, 2: 1.0})
+    tours = [_tour(1, 40000), _tour(2, 90000)]
+    ranked = asyncio.run(tour_search.cascade_rerank(tours, PARAMS, budget_ms=0))
+    assert calls == []
+    assert _ids(ranked) == [1, 2]
+
+
+def test_llm_score_is_blended_with_stage_one(llm):
+    # LLM чуть больше нравится дорогой отель без совпадений по тексту — этого мало,
+    # чтобы обогнать дешёвый с лучшим BM25
+    llm({1: 0.50, 2: 0.55})
+    tours = [_tour(1, 40000, text_score=8.0), _tour(2, 90000)]
+    ranked = asyncio.run(tour_search.cascade_rerank(tours, PARAMS, budget_ms=5000))
+    assert _ids(ranked) == [1, 2]
+
+
+def test_clear_llm_preference_still_wins(llm):
+    llm({1: 0.0, 2: 1.0})
+    tours = [_tour(1, 40000), _tour(2, 45000)]
+    ranked = asyncio.run(tour_search.cascade_rerank(tours, PARAMS, budget_ms=5000))
+    assert _ids(ranked) == [2, 1]
+
+
+def test_vector_score_is_weighted_and_normalized(monkeypatch):
+    tours = [_tour(1, 40000, text_score=5.0), _tour(2, 90000)]
+    # сырые значения индекса любого масштаба дают не больше CHEAP_WEIGHTS["vector"]
+    monkeypatch.setattr(tour_search, "_vector_scores", lambda pref_text, tours: [0.0, 1000.0])
+    scores = tour_search._cheap_scores(tours, {}, "вид на море")
+    weights = tour_search.CHEAP_WEIGHTS
+    assert scores == pytest.approx([weights["price"] + weights["text"], weights["vector"]])
+    assert all(0 <= s <= 1 for s in scores)
+
+
+def test_match_share_of_requested_criteria(monkeypatch):
+    monkeypatch.setattr(tour_search, "_vector_scores", lambda pref_text, tours: None)
+    tours = [_tour(1, 40000, hotel_category_id=4, meal_id=1), _tour(2, 40000, hotel_category_id=4, meal_id=3)]
+    scores = tour_search._cheap_scores(tours, {"hotel_category_id": 4, "meal_id": [1]}, "")
+    weights = tour_search.CHEAP_WEIGHTS
+    assert scores == pytest.approx([weights["price"] + weights["match"], weights["price"] + weights["match"] / 2])
+
+
+def test_cascade_log_is_written_off_the_event_loop(llm, monkeypatch, tmp_path):
+    llm({1: 0.5})
+    path = tmp_path / "cascade.jsonl"
+    writers = []
+    write = tour_search._append_cascade_log
+
+    def recording(line):
+        writers.append(threading.current_thread())
+        write(line)
+
+    monkeypatch.setattr(tour_search, "CASCADE_LOG", str(path))
+    monkeypatch.setattr(tour_search, "_append_cascade_log", recording)
+    asyncio.run(tour_search.cascade_rerank([_tour(1, 40000)], PARAMS, budget_ms=5000))
+    assert writers and writers[0] is not threading.main_thread()
+    assert json.loads(path.read_text(encoding="utf-8"))["stage2"] == "llm"
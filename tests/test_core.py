@@ -0,0 +1,85 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from bot_service import core
+from bot_service.models import Tour
+
+
+@pytest.fixture
+def pipeline(reference_db, monkeypatch):
+    """Подменяет /parse и поиск; возвращает, что в них пришло."""
+    seen = {"parse": [], "find": []}
+
+    async def find_tours(params):
+        seen["find"].append(params)
+        tour = Tour(1, "Sea View", 7, 50000, "RUB", "https://example/1", "2030-06-10")
+        tour.reason = "Тихо и у моря."
+        return [tour]
+
+    def install(parsed):
+        async def parse(query):
+            seen["parse"].append(query)
+            return parsed
+        monkeypatch.setattr(core.llm_api, "parse", parse)
+        return seen
+
+    monkeypatch.setattr(core, "find_tours", find_tours)
+    monkeypatch.setattr(core, "PARAMS_LOG", None)
+    return install
+
+
+def test_simple_query_skips_the_llm(pipeline):
+    seen = pipeline({"error": "не должен вызываться"})
+    reply = asyncio.run(core.process_user_query("Турция из Москвы 7 ночей всё включено"))
+    assert seen["parse"] == []
+    params = seen["find"][0]
+    assert (params["country_id"], params["city_id"], params["meal_id"]) == (92, 2, [1])
+    assert "Sea View" in reply and "Тихо и у моря." in reply
+
+
+def test_complex_query_goes_to_llm_and_ids_are_resolved_once(pipeline):
+    parsed = {"country": "Египет", "departure_city": "Екатеринбург", "preferences": ["песчаный пляж", "романтика"]}
+    seen = pipeline(parsed)
+    asyncio.run(core.process_user_query("Хочу романтичный отдых в Египте где-нибудь у песчаного пляжа"))
+    assert len(seen["parse"]) == 1
+    params = seen["find"][0]
+    assert (params["country_id"], params["city_id"]) == (29, 25)
+    assert params["features"] == ["sand_beach"]
+    assert params["preferences"] == ["романтика"]
+
+
+def test_llm_error_falls_back_to_fast_parse(pipeline):
+    seen = pipeline({"error": "llm_unavailable"})
+    asyncio.run(core.process_user_query("Турция из Москвы, что-нибудь необычное и атмосферное"))
+    assert len(seen["parse"]) == 1
+    assert seen["find"][0]["country_id"] == 92
+
+
+def test_llm_error_without_country_is_reported(pipeline):
+    seen = pipeline({"error": "llm_unavailable"})
+    reply = asyncio.run(core.process_user_query("что-нибудь необычное"))
+    assert reply.startswith("⚠️")
+    assert seen["find"] == []
+
+
+def test_reference_lookups_and_params_log_stay_off_the_event_loop(pipeline, monkeypatch, tmp_path):
+    pipeline({"error": "не должен вызываться"})
+    threads = []
+
+    def tracked(fn):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return fn(*args)
+        return wrapper
+
+    monkeypatch.setattr(core, "fast_parse", tracked(core.fast_parse))
+    monkeypatch.setattr(core, "resolve_reference_ids", tracked(core.resolve_reference_ids))
+    log = tmp_path / "params.jsonl"
+    monkeypatch.setattr(core, "PARAMS_LOG", str(log))
+    asyncio.run(core.process_user_query("Турция из Москвы 7 ночей всё включено"))
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert json.loads(log.read_text(encoding="utf-8"))["country_id"] == 92
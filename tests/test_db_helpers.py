@@ -0,0 +1,47 @@
+import pytest
+
+from utils import db_helpers
+from utils.reference import get_reference, registry
+
+
+@pytest.fixture(autouse=True)
+def reference(reference_db):
+    registry.invalidate()
+    get_reference().memo.clear()
+
+
+def test_resolves_all_ids_in_one_pass():
+    params = db_helpers.resolve_reference_ids({
+        "country": "Турция", "departure_city": "Москва", "resort": "Kemer",
+        "hotel_category": "5 звёзд", "meal": "Всё включено",
+    })
+    assert params["country_id"] == 92
+    assert params["city_id"] == 2
+    assert params["resort_id"] == 2163
+    assert params["hotel_category_id"] == 7
+    assert params["meal_id"] == [1]
+
+
+def test_existing_ids_and_unknown_names_are_left_alone():
+    params = db_helpers.resolve_reference_ids({"country": "Турция", "country_id": 29, "resort": "Сочи"})
+    assert params["country_id"] == 29
+    assert "resort_id" not in params
+
+
+def test_names_are_memoized_on_the_snapshot(monkeypatch):
+    calls = []
+    find = db_helpers._FINDERS["country"]
+    monkeypatch.setitem(db_helpers._FINDERS, "country", lambda ref, text: calls.append(text) or find(ref, text))
+
+    for text in ("Египет", "египет ", "ЕГИПЕТ"):
+        assert db_helpers.resolve_reference_ids({"country": text})["country_id"] == 29
+    assert db_helpers.get_country_id_by_name("Египет") == 29
+    assert calls == ["Египет"]
+
+
+def test_getters_share_the_resolver():
+    assert db_helpers.get_city_id_by_name("Екатеринбург") == 25
+    assert db_helpers.get_meal_ids_by_name("завтрак") == [3]
+    assert db_helpers.get_meal_name_by_id(3) == "завтрак"
+    assert db_helpers.get_hotel_category_name_by_id(4) == "4*"
+    assert db_helpers.get_resort_id_by_name("") is None
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from utils.db_pool import SQLitePool, get_pool
+
+
+def test_missing_database_fails_at_pool_creation(tmp_path):
+    path = str(tmp_path / "missing.db")
+    with pytest.raises(FileNotFoundError, match="data.migrate"):
+        get_pool(path)
+    assert os.listdir(tmp_path) == []
+
+
+def test_create_pool_makes_the_database(tmp_path):
+    path = str(tmp_path / "new.db")
+    pool = get_pool(path, create=True)
+    with pool.write() as con:
+        con.execute("CREATE TABLE t (x)")
+        con.execute("INSERT INTO t VALUES (1)")
+    with pool.read() as con:
+        assert con.execute("SELECT x FROM t").fetchall() == [(1,)]
+        with pytest.raises(Exception):
+            con.execute("INSERT INTO t VALUES (2)")      # читатели — read-only
+    pool.close()
+
+
+def test_reader_never_creates_a_deleted_database(tmp_path):
+    path = str(tmp_path / "gone.db")
+    pool = SQLitePool(path, create=True)
+    with pool.write() as con:
+        con.execute("CREATE TABLE t (x)")
+    pool.close()
+    for name in os.listdir(tmp_path):
+        os.remove(tmp_path / name)
+
+    with pytest.raises(FileNotFoundError):
+        with pool.read():
+            pass
+    assert os.listdir(tmp_path) == []
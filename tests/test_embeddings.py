@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from bot_service import embeddings, tour_search
+from bot_service.embeddings import EmbeddingIndex, HashingEncoder
+from bot_service.models import Tour
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+
+DESCRIPTIONS = [
+    (1, "Sea Breeze", "Песчаный пляж на первой линии, вид на море из номеров"),
+    (2, "Kids World", "Аквапарк с горками, детский клуб и анимация для детей"),
+    (3, "Mountain Lodge", "Горы, лес и тишина, до моря далеко"),
+]
+
+
+def test_encoder_is_normalized_and_matches_word_forms():
+    encoder = HashingEncoder(dim=256)
+    vec = encoder.encode("Пляжем у моря")
+    assert np.linalg.norm(vec) == pytest.approx(1.0, abs=1e-6)
+    # разные формы слова сходятся через общую основу из первых 5 букв
+    assert float(encoder.encode("пляжами") @ encoder.encode("пляжах")) > 0
+    assert not encoder.encode("").any()
+
+
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    pool = get_pool(str(tmp_path / "vectors.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+        con.executemany("INSERT INTO hotel_descriptions (hotel_api_id, hotel_name, description) VALUES (?, ?, ?)",
+                        DESCRIPTIONS)
+    monkeypatch.setattr(embeddings, "get_pool", lambda: pool)
+    path = str(tmp_path / "vectors.npy")
+    assert embeddings.build_index(path, dim=512) == 3
+    yield path
+    pool.close()
+
+
+def test_index_ranks_the_relevant_hotel_first(index_path):
+    index = EmbeddingIndex.load(index_path)
+    scores = index.scores("аквапарк и детский клуб", [1, 2, 3])
+    assert int(np.argmax(scores)) == 1
+    scores = index.scores("песчаный пляж, вид на море", [3, 1, 2])
+    assert int(np.argmax(scores)) == 1
+
+
+def test_unknown_hotels_score_zero(index_path):
+    index = EmbeddingIndex.load(index_path)
+    assert index.scores("море", [404, 1])[0] == 0.0
+
+
+def test_vector_rerank_needs_no_llm(index_path, monkeypatch):
+    monkeypatch.setattr(embeddings, "_index", EmbeddingIndex.load(index_path))
+    monkeypatch.setattr(tour_search, "RERANK_LLM_TOP_N", 0)
+
+    async def no_llm(pref_text, tours):
+        raise AssertionError("LLM не должен вызываться")
+
+    monkeypatch.setattr(tour_search, "_llm_scores", no_llm)
+    tours = [Tour(api_id, name, 7, 50000, "RUB", "", "2030-06-10", api_id=api_id)
+             for api_id, name, _ in DESCRIPTIONS]
+    ranked = asyncio.run(tour_search.rag_rerank(tours, ["аквапарк для детей"], top_k=1, mode="vector"))
+    assert [t.api_id for t in ranked] == [2]
+
+
+def test_missing_index_is_none(monkeypatch):
+    # embeddings.path тестового конфига указывает на несуществующий файл
+    monkeypatch.setattr(embeddings, "_index", None)
+    assert embeddings.get_index() is None
@@ -0,0 +1,34 @@
+import pytest
+
+from bot_service.bench_extract import EDGE_CASES, _PAGE
+from bot_service.extract import extract_bs4, extract_description, extract_lxml
+
+pytest.importorskip("lxml")
+
+
+@pytest.mark.parametrize("name", EDGE_CASES)
+def test_matches_reference_on_edge_cases(name):
+    html = EDGE_CASES[name]
+    assert extract_description(html) == extract_bs4(html)
+
+
+@pytest.mark.parametrize("snippet, expected", [
+    ("a</br>b", "Описание a b отеля"),
+    ("<textarea><b>x</b></textarea>", "Описание x отеля"),
+    ("<![CDATA[zz]]>", "Описание zz отеля"),
+])
+def test_review_cases(snippet, expected):
+    assert extract_description(_PAGE.format(snippet)).split("\n")[0] == expected
+
+
+@pytest.mark.parametrize("snippet", ["<b>жирный</b> текст", "a</br>b", "<textarea>plain</textarea>", "&amp; и &nbsp;"])
+def test_plain_pages_stay_on_lxml(snippet):
+    # title с сущностями в <head> есть почти на каждой странице — это не повод уходить на bs4
+    html = _PAGE.format(snippet)
+    assert extract_lxml(html) == extract_bs4(html)
+
+
+@pytest.mark.parametrize("snippet", ["<textarea><b>x</b></textarea>", "<iframe>&amp;</iframe>"])
+def test_markup_inside_raw_text_tags_is_rejected(snippet):
+    with pytest.raises(ValueError):
+        extract_lxml(_PAGE.format(snippet))
@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from bot_service.fast_parser import fast_parse
+
+
+@pytest.fixture(autouse=True)
+def _reference(reference_db):
+    pass
+
+
+def _year(month: int) -> int:
+    today = datetime.date.today()
+    return today.year if month >= today.month else today.year + 1
+
+
+def test_simple_query_is_parsed_with_full_confidence():
+    params, confidence = fast_parse("Турция из Москвы 7 ночей всё включено до 1000 €")
+    assert confidence == 1.0
+    assert params["country"] == "турция"
+    assert params["departure_city"] == "москва"
+    assert params["duration_days"] == 7
+    assert params["meal"] == "все включено"
+    assert params["budget_eur"] == 1000
+
+
+@pytest.mark.parametrize("query", [
+    "Турция из Москвы в марте не Кемер",
+    "Турция из Москвы 7 ночей кроме Кемера",
+    "Египет из Москвы 10 ночей без Хургады",
+])
+def test_negation_goes_to_llm(query):
+    _, confidence = fast_parse(query)
+    assert confidence == 0.0
+
+
+def test_budget_phrase_is_not_a_negation():
+    params, confidence = fast_parse("Турция из Москвы 7 ночей не дороже 1000 €")
+    assert params["budget_eur"] == 1000
+    assert confidence == 1.0
+
+
+def test_day_range_within_month():
+    params, confidence = fast_parse("Турция из Москвы с 5 по 15 июня")
+    year = _year(6)
+    assert params["check_in_range"] == {"from": f"{year}-06-05", "to": f"{year}-06-15"}
+    assert params["check_in_date"] == ""
+    assert confidence == 1.0
+
+
+def test_day_range_across_months():
+    params, _ = fast_parse("Турция из Москвы с 25 декабря по 5 января")
+    year = _year(12)
+    assert params["check_in_range"] == {"from": f"{year}-12-25", "to": f"{year + 1}-01-05"}
+
+
+def test_invalid_range_is_left_for_llm():
+    params, confidence = fast_parse("Турция из Москвы с 20 по 40 июня")
+    assert params["check_in_date"] == ""
+    assert params["check_in_range"] == {"from": "", "to": ""}
+    assert confidence < 0.8
+
+
+def test_single_day_and_period():
+    params, _ = fast_parse("Турция из Москвы 10 июня")
+    assert params["check_in_date"] == f"{_year(6)}-06-10"
+    params, _ = fast_parse("Турция из Москвы в конце октября")
+    assert params["check_in_range"] == {"from": f"{_year(10)}-10-21", "to": f"{_year(10)}-10-31"}
+
+
+@pytest.mark.parametrize("query", [
+    "Турция из Москвы 2026-13-01",
+    "Турция из Москвы 2026-00-10",
+    "Турция из Москвы 31 июня",
+])
+def test_impossible_date_is_left_for_llm(query):
+    params, confidence = fast_parse(query)
+    assert params["check_in_date"] == ""
+    assert params["month"] == ""
+    assert confidence < 0.8
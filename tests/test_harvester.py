@@ -0,0 +1,189 @@
+import datetime
+import json
+
+import pytest
+import requests
+
+from data import harvester
+from data.loader import get_cheapest_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+
+WINDOW = harvester.Window(92, 2, 5, 9, datetime.date(2030, 6, 1), datetime.date(2030, 6, 14))
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = get_pool(str(tmp_path / "harvest.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+    monkeypatch.setattr(harvester, "get_pool", lambda: pool)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def acquired(monkeypatch):
+    """Сколько раз запрос прошёл через rate limiter; паузы между повторами не ждём."""
+    calls = []
+    monkeypatch.setattr(harvester.limiter, "acquire", lambda url: calls.append(url))
+    monkeypatch.setattr(harvester.time, "sleep", lambda sec: None)
+    return calls
+
+
+def _response(status: int, body: bytes = b'{"data": []}', headers: dict | None = None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers.update(headers or {})
+    resp.url = "http://127.0.0.1:9/statistic/cheapestTours"
+    return resp
+
+
+class _Session:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def _api(monkeypatch, *responses):
+    session = _Session(*responses)
+    monkeypatch.setattr(harvester, "get_session", lambda: session)
+    return session
+
+
+def _tour(hotel_id, price=50000, check_in="2030-06-05"):
+    return {"hotelId": hotel_id, "hotelName": f"Hotel {hotel_id}", "nights": 7, "price": price,
+            "checkinDate": check_in, "resortId": 2162, "hotelCategory": 4, "mealId": 1}
+
+
+def _window_status(pool):
+    with pool.read() as con:
+        return con.execute("SELECT status, rows FROM harvest_windows").fetchone()
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404, 204])
+def test_cheapest_tours_raises_on_any_non_200(status):
+    with pytest.raises(requests.HTTPError):
+        get_cheapest_tours(92, 2, session=_Session(_response(status)))
+
+
+def test_client_error_marks_window_as_error_not_done(pool, acquired, monkeypatch):
+    _api(monkeypatch, _response(401, b'{"error": "token expired"}'))
+    with pytest.raises(requests.HTTPError):
+        harvester._harvest_one(WINDOW, "run")
+    assert _window_status(pool) == ("error", 0)
+    assert harvester.done_windows("run") == set()
+    # 4xx не повторяем
+    assert len(acquired) == 1
+
+
+def test_retries_go_through_the_limiter(pool, acquired, monkeypatch):
+    session = _api(monkeypatch, _response(503), _response(429, headers={"Retry-After": "bad"}),
+                   _response(200, b'{"data": [{"hotelId": 1, "nights": 7, "checkinDate": "2030-06-05"}]}'))
+    assert harvester._harvest_one(WINDOW, "run") == 1
+    assert len(acquired) == 3
+    assert session.responses == []
+    assert _window_status(pool) == ("done", 1)
+
+
+def test_gives_up_after_retries(pool, acquired, monkeypatch):
+    _api(monkeypatch, *[_response(500)] * (harvester.RETRIES + 1))
+    with pytest.raises(requests.HTTPError):
+        harvester._harvest_one(WINDOW, "run")
+    assert len(acquired) == harvester.RETRIES + 1
+    assert _window_status(pool) == ("error", 0)
+
+
+def test_retry_delay_honours_retry_after_up_to_the_cap():
+    assert harvester._retry_delay(_response(429, headers={"Retry-After": "7"}), 0) == 7
+    assert harvester._retry_delay(_response(429), 1) == harvester.BACKOFF * 2
+    assert harvester._retry_delay(_response(429, headers={"Retry-After": "100000"}), 0) == harvester.RETRY_AFTER_MAX
+
+
+def test_adapter_does_not_retry_statuses_on_its_own(monkeypatch):
+    monkeypatch.setattr(harvester, "_session", None)
+    retry = harvester.get_session().get_adapter("http://127.0.0.1").max_retries
+    assert retry.status == 0
+    assert retry.read == 0
+
+
+
+TODAY = datetime.date.today()
+# окно вокруг сегодняшнего дня: в нём есть и прошедшие, и будущие заезды
+CURRENT = harvester.Window(92, 2, 5, 9, TODAY - datetime.timedelta(days=5), TODAY + datetime.timedelta(days=8))
+
+
+def _day(offset: int) -> str:
+    return str(TODAY + datetime.timedelta(days=offset))
+
+
+def _ok(*tours):
+    return _response(200, json.dumps({"data": list(tours)}).encode())
+
+
+def _stored(pool):
+    with pool.read() as con:
+        return con.execute("SELECT api_id, price FROM tours ORDER BY api_id").fetchall()
+
+
+def _offers(*rows):
+    """Сохранённые предложения в формате _stored_offers: ключ → (id, значения TOUR_COLUMNS)."""
+    return {
+        tuple(r.get(c) for c in harvester.TOUR_KEY): (id_, tuple(r.get(c) for c in harvester.TOUR_COLUMNS))
+        for id_, r in enumerate(rows, 1)
+    }
+
+
+def test_diff_offers_drops_offers_missing_from_the_response():
+    first = harvester.tour_row(_tour(1, check_in=_day(3)), 92, 2)
+    second = harvester.tour_row(_tour(2, check_in=_day(4)), 92, 2)
+    stored = _offers(first, second)
+
+    assert harvester.diff_offers(stored, []) == ([], [], [1, 2])
+
+    cheaper = dict(first, price=45000)
+    new = harvester.tour_row(_tour(3, check_in=_day(5)), 92, 2)
+    assert harvester.diff_offers(stored, [cheaper, second, new]) == ([cheaper, new], [2], [])
+
+
+def test_refresh_after_client_error_keeps_offers(pool, acquired, monkeypatch):
+    _api(monkeypatch, _ok(_tour(1, check_in=_day(3)), _tour(2, check_in=_day(4))))
+    harvester._harvest_one(CURRENT, "seed")
+
+    _api(monkeypatch, _response(401))
+    with pytest.raises(requests.HTTPError):
+        harvester._refresh_one(CURRENT, "refresh")
+    assert _stored(pool) == [(1, 50000), (2, 50000)]
+    assert _window_status(pool) == ("error", 0)
+
+
+def _last_seen(pool):
+    with pool.read() as con:
+        return dict(con.execute("SELECT api_id, last_seen FROM tours"))
+
+
+def test_refresh_drops_offers_missing_from_the_window(pool, acquired, monkeypatch):
+    _api(monkeypatch, _ok(_tour(1, check_in=_day(3)), _tour(2, price=30000, check_in=_day(3))))
+    harvester._harvest_one(CURRENT, "seed")
+    with pool.write() as con:
+        con.execute("UPDATE tours SET last_seen = '2000-01-01 00:00:00'")
+
+    _api(monkeypatch, _ok(_tour(1, check_in=_day(3)), _tour(3, price=42000, check_in=_day(4))))
+    assert harvester._refresh_one(CURRENT, "refresh") == {"changed": 1, "deleted": 1, "unchanged": 1}
+    # дешёвый тур 2 пропал из выдачи — его нет и в базе, иначе sql_filter показал бы его вместо тура 1
+    assert _stored(pool) == [(1, 50000), (3, 42000)]
+    assert all(seen > "2000-01-01 00:00:00" for seen in _last_seen(pool).values())
+    assert _window_status(pool) == ("done", 2)
+
+
+def test_refresh_keeps_offers_of_other_windows(pool, acquired, monkeypatch):
+    other = harvester.Window(92, 2, 10, 14, CURRENT.date_from, CURRENT.date_to)
+    _api(monkeypatch, _ok(dict(_tour(1, check_in=_day(3)), nights=12)))
+    harvester._harvest_one(other, "seed")
+
+    _api(monkeypatch, _ok())
+    assert harvester._refresh_one(CURRENT, "refresh") == {"changed": 0, "deleted": 0, "unchanged": 0}
+    assert _stored(pool) == [(1, 50000)]
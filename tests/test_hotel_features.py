@@ -0,0 +1,70 @@
+import pytest
+
+from bot_service.hotel_features import extract_features, map_preferences
+
+
+@pytest.mark.parametrize("preference", [
+    "без анимации",
+    "не первая линия",
+    "не на первой линии",
+    "подальше от аэропорта",
+    "далеко от аэропорта",
+    "анимация не нужна",
+    "без детского клуба",
+])
+def test_negated_preference_is_left_for_rerank(preference):
+    assert map_preferences([preference]) == ([], [preference])
+
+
+@pytest.mark.parametrize("preference, features", [
+    ("первая линия", ["beach_line_1"]),
+    ("недалеко от аэропорта", ["near_airport"]),
+    ("без детей", ["adults_only"]),
+    ("тихий отель", ["quiet"]),
+    ("песчаный пляж", ["sand_beach"]),
+])
+def test_preference_is_mapped(preference, features):
+    assert map_preferences([preference]) == (features, [])
+
+
+def test_negation_keeps_the_rest_of_the_preference_for_rerank():
+    features, rest = map_preferences(["первая линия, без анимации"])
+    assert features == ["beach_line_1"]
+    assert rest == ["первая линия, без анимации"]
+
+
+def test_pacific_is_not_quiet():
+    assert map_preferences(["Тихоокеанский"]) == ([], ["Тихоокеанский"])
+    assert extract_features("Тихоокеанский ресторан")["quiet"] == 0
+    assert extract_features("Тихий район, рядом парк")["quiet"] == 1
+
+
+def test_negated_facilities_are_not_extracted():
+    features = extract_features("Нет анимации. Бассейна нет. Анимация для детей отсутствует.")
+    assert features["animation"] == 0
+    assert features["pools"] == 0
+    features = extract_features("Отель не на первой линии, песчаный пляж")
+    assert features["beach_line"] is None
+    assert features["beach_type"] == "sand"
+
+
+def test_not_only_is_not_a_negation():
+    assert extract_features("Не только спа, но и анимация")["spa"] == 1
+
+
+@pytest.mark.parametrize("description, sea_m", [
+    ("Корпус 2 300 м от моря", 300),
+    ("До моря 1,5 км", 1500),
+    ("450 метров до пляжа", 450),
+    ("300 мест в ресторане, до моря 5 минут", None),
+])
+def test_sea_distance_takes_one_number(description, sea_m):
+    assert extract_features(description)["sea_distance_m"] == sea_m
+
+
+def test_counts_and_flags():
+    features = extract_features("Отель на первой линии, 3 бассейна, анимация, 15 км от аэропорта")
+    assert features["beach_line"] == 1
+    assert features["pools"] == 3
+    assert features["animation"] == 1
+    assert features["airport_km"] == 15.0
@@ -0,0 +1,97 @@
+import pytest
+
+from data import ingest
+from data.ingest import replace_tours, upsert_directory, upsert_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = get_pool(str(tmp_path / "ingest.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+    yield pool
+    pool.close()
+
+
+def _row(api_id, check_in="2025-06-10", price=50000, **extra):
+    return {"api_id": api_id, "country_id": 92, "city_id": 2, "check_in": check_in,
+            "nights": 7, "price": price, **extra}
+
+
+def test_month_is_written_by_the_insert_itself(pool):
+    with pool.write() as con:
+        before = con.total_changes
+        upsert_tours([_row(1), _row(2, "2025-07-01"), _row(3, "2025-12-31")], con=con)
+        # total_changes считает и строки, изменённые триггерами: UPDATE на строку дал бы 6
+        assert con.total_changes - before == 3
+    with pool.read() as con:
+        assert con.execute("SELECT api_id, check_in_month FROM tours ORDER BY api_id").fetchall() == [
+            (1, 6), (2, 7), (3, 12),
+        ]
+
+
+def test_upsert_updates_price_and_skips_unchanged_rows(pool):
+    with pool.write() as con:
+        upsert_tours([_row(1), _row(2)], con=con)
+    with pool.write() as con:
+        stats = upsert_tours([_row(1, price=45000), _row(2), {"api_id": 3}], con=con)
+    assert stats["changed"] == 1
+    assert stats["skipped"] == 1
+    with pool.read() as con:
+        assert con.execute("SELECT price FROM tours WHERE api_id = 1").fetchone() == (45000,)
+        assert con.execute("SELECT COUNT(*) FROM tours").fetchone() == (2,)
+
+
+@pytest.fixture
+def default_pool(pool, monkeypatch):
+    """replace_tours и upsert_directory пишут через get_pool() — подменяем его тестовой базой."""
+    monkeypatch.setattr(ingest, "get_pool", lambda: pool)
+    return pool
+
+
+def test_reloading_the_same_rows_does_not_duplicate(pool):
+    for _ in range(2):
+        with pool.write() as con:
+            upsert_tours([_row(1), _row(2)], con=con)
+    with pool.read() as con:
+        assert con.execute("SELECT COUNT(*) FROM tours").fetchone() == (2,)
+
+
+def test_replace_tours_removes_only_missing_offers_of_the_window(default_pool):
+    with default_pool.write() as con:
+        upsert_tours([
+            _row(1), _row(2), _row(3, city_id=25),
+            # та же страна и город, но другое окно выгрузки: другие даты заезда и ночи
+            _row(5, check_in="2025-07-10"), dict(_row(6), nights=12),
+        ], con=con)
+        con.execute("UPDATE tours SET last_seen = '2000-01-01 00:00:00'")
+    stats = replace_tours([_row(1, price=40000), _row(4), _row(2)], 92, 2,
+                          date_from="2025-06-01", date_to="2025-06-30", nights_from=5, nights_to=9)
+    assert stats["changed"] == 2
+    assert stats["deleted"] == 0
+    stats = replace_tours([_row(1, price=40000), _row(4)], 92, 2,
+                          date_from="2025-06-01", date_to="2025-06-30", nights_from=5, nights_to=9)
+    assert stats["deleted"] == 1
+    with default_pool.read() as con:
+        assert con.execute("SELECT api_id, city_id, price FROM tours ORDER BY api_id").fetchall() == [
+            (1, 2, 40000), (3, 25, 50000), (4, 2, 50000), (5, 2, 50000), (6, 2, 50000),
+        ]
+        seen = dict(con.execute("SELECT api_id, last_seen FROM tours"))
+    stale = "2000-01-01 00:00:00"
+    assert seen[1] > stale and seen[4] > stale and seen[5] == stale
+
+
+def _version(pool):
+    with pool.read() as con:
+        return con.execute("SELECT version FROM reference_version").fetchone()[0]
+
+
+def test_unchanged_directory_rows_do_not_bump_reference_version(default_pool):
+    assert upsert_directory("countries", ("id", "name"), [(92, "Турция"), (29, "Египет")])["changed"] == 2
+    version = _version(default_pool)
+    assert upsert_directory("countries", ("id", "name"), [(92, "Турция"), (29, "Египет")])["changed"] == 0
+    assert _version(default_pool) == version
+    assert upsert_directory("countries", ("id", "name"), [(92, "Türkiye")])["changed"] == 1
+    assert _version(default_pool) == version + 1
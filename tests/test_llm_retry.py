@@ -0,0 +1,70 @@
+import email.utils
+import time
+
+import httpx
+import pytest
+
+from llm_service import llm_client
+from llm_service.llm_client import CircuitBreaker, LLMUnavailableError, _retry_delay
+
+
+def _response(status: int, **headers) -> httpx.Response:
+    return httpx.Response(status, headers=headers, request=httpx.Request("POST", llm_client.API_URL))
+
+
+def test_numeric_retry_after_is_honoured_beyond_backoff_cap():
+    assert _retry_delay(0, _response(429, **{"Retry-After": "30"})) == 30
+    assert _retry_delay(0, _response(429, **{"Retry-After": "100000"})) == llm_client.RETRY_AFTER_MAX
+
+
+def test_http_date_retry_after():
+    header = email.utils.formatdate(time.time() + 20, usegmt=True)
+    assert 15 < _retry_delay(0, _response(503, **{"Retry-After": header})) <= 20
+
+
+@pytest.mark.parametrize("header", ["soon", "Mon, 99 Foo 2024", ""])
+def test_malformed_retry_after_falls_back_to_jitter(header):
+    delay = _retry_delay(2, _response(503, **{"Retry-After": header}))
+    assert 0 <= delay <= min(llm_client.RETRY_MAX_DELAY, llm_client.RETRY_BASE_DELAY * 4)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=2, cooldown=30)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(LLMUnavailableError):
+        breaker.check()
+
+
+@pytest.fixture
+def fresh_breaker(monkeypatch):
+    breaker = CircuitBreaker(failures=5, cooldown=30)
+    monkeypatch.setattr(llm_client, "breaker", breaker)
+    monkeypatch.setattr(llm_client, "_retry_delay", lambda attempt, resp: 0)
+    return breaker
+
+
+def test_one_logical_call_counts_one_failure(fresh_breaker, monkeypatch):
+    calls = []
+
+    def post(url, json):
+        calls.append(url)
+        return _response(503, **{"Retry-After": "garbage"})
+    monkeypatch.setattr(llm_client.http_client, "post", post)
+
+    with pytest.raises(RuntimeError):
+        llm_client.call_llm([{"role": "user", "content": "hi"}])
+    assert len(calls) == llm_client.RETRY_ATTEMPTS
+    assert fresh_breaker.state()["consecutive_failures"] == 1
+
+
+def test_success_after_retry_resets_failures(fresh_breaker, monkeypatch):
+    fresh_breaker.record_failure()
+    answers = iter([_response(503), httpx.Response(
+        200, json={"choices": [{"message": {"content": "ok"}}]},
+        request=httpx.Request("POST", llm_client.API_URL),
+    )])
+    monkeypatch.setattr(llm_client.http_client, "post", lambda url, json: next(answers))
+    assert llm_client.call_llm([{"role": "user", "content": "hi"}]) == "ok"
+    assert fresh_breaker.state()["consecutive_failures"] == 0
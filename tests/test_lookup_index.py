@@ -0,0 +1,43 @@
+import pytest
+
+from utils.lookup_index import LookupIndex, canonical, normalize
+
+RESORTS = LookupIndex({"анталья": 2162, "кемер": 2163, "хургада": 500, "шарм-эль-шейх": 501, "белек": 3})
+MEALS = LookupIndex({"всё включено": 1, "ультра всё включено": 2, "завтрак": 3})
+
+
+def test_normalize_and_canonical():
+    assert normalize("  Шарм-эль-Шейх!! ") == "шарм эль шейх"
+    assert canonical("Хургада") == canonical("Hurghada") == canonical("Khurgada")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Анталья", 2162),         # точное после нормализации
+    ("Antalya", 2162),         # транслитерация
+    ("Hurghada", 500),
+    ("Кемере", 2163),          # название входит в запрос
+    ("шарм", 501),             # запрос входит в название
+    ("Сочи", None),
+    ("", None),
+])
+def test_find(text, expected):
+    assert RESORTS.find(text) == expected
+
+
+def test_partial_prefers_closest_length():
+    index = LookupIndex({"сиде": 1, "сиде центр": 2})
+    assert index.partial("сиде") == [canonical("сиде"), canonical("сиде центр")]
+    assert index.find("Side") == 1
+
+
+def test_find_all_and_related_for_meal_synonyms():
+    assert MEALS.find_all("всё включено") == [1, 2]
+    assert MEALS.find_all("полупансион") == []
+    assert MEALS.find_related("завтрак и ужин") == [3]
+
+
+def test_same_form_resolves_to_one_id_regardless_of_insertion_order():
+    a = LookupIndex({"kemer": 10, "кемер": 20})
+    b = LookupIndex({"кемер": 20, "kemer": 10})
+    assert a.find("Kemer") == b.find("Kemer")
+    assert len(a) == 2
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from llm_service.parse_cache import ParseCache, normalize_query
+
+BASE = "Турция из Москвы, Анталия, в начале октября на 7 ночей до 1000 €"
+
+
+@pytest.fixture
+def cache():
+    cache = ParseCache(fuzzy=True, threshold=0.85)
+    cache.set(BASE, {"resort": "Анталия"})
+    return cache
+
+
+def test_fuzzy_is_off_by_default():
+    cache = ParseCache()
+    cache.set(BASE, {"resort": "Анталия"})
+    assert cache.get(BASE.replace("Анталия", "Анталья")) is None
+    assert cache.get(BASE) == {"resort": "Анталия"}
+
+
+def test_exact_hit_ignores_case_and_punctuation(cache):
+    assert cache.get(BASE.upper().replace(",", "")) == {"resort": "Анталия"}
+    assert normalize_query("Всё  включено!") == "все включено"
+
+
+def test_typo_reuses_parse(cache):
+    assert cache.get(BASE.replace("Анталия", "Анталья")) == {"resort": "Анталия"}
+    assert cache.fuzzy_hits == 1
+
+
+@pytest.mark.parametrize("old, new", [
+    ("Анталия", "Кемер"),
+    ("начале", "конце"),
+    ("октября", "ноября"),
+    ("€", "$"),
+    ("7 ночей", "8 ночей"),
+])
+def test_one_different_token_is_a_different_query(cache, old, new):
+    assert cache.get(BASE.replace(old, new)) is None
+
+
+def test_entries_expire_after_ttl(cache):
+    created = cache._clock()
+    cache._clock = lambda: created + cache.ttl + 1
+    assert cache.get(BASE) is None
+    assert len(cache._items) == 0
+
+
+def test_entries_expire_at_day_change():
+    cache = ParseCache(ttl_seconds=24 * 3600)
+    late_evening = datetime.datetime(2025, 5, 1, 23, 0).timestamp()
+    cache._clock = lambda: late_evening
+    cache.set(BASE, {"resort": "Анталия"})
+    cache._clock = lambda: late_evening + 2 * 3600
+    assert cache.get(BASE) is None
+
+
+def test_lru_eviction():
+    cache = ParseCache(max_items=2)
+    for q in ("a", "b", "c"):
+        cache.set(q, {"q": q})
+    assert cache.get("a") is None and cache.get("c") == {"q": "c"}
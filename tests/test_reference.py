@@ -0,0 +1,60 @@
+import pytest
+
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+from utils.reference import ReferenceRegistry
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = get_pool(str(tmp_path / "reference.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+        con.execute("INSERT INTO countries (id, name) VALUES (92, 'Турция')")
+    yield pool
+    pool.close()
+
+
+def _registry(pool, check_interval):
+    opened = []
+
+    def getter():
+        opened.append(1)
+        return pool
+
+    return ReferenceRegistry(getter, check_interval=check_interval), opened
+
+
+def test_nothing_is_loaded_until_first_use(pool):
+    registry, opened = _registry(pool, check_interval=30)
+    assert opened == []
+    assert registry.get().country.find("Турция") == 92
+    assert len(opened) == 1
+
+
+def test_version_is_checked_once_per_interval(pool):
+    registry, opened = _registry(pool, check_interval=3600)
+    first = registry.get()
+    with pool.write() as con:
+        con.execute("INSERT INTO countries (id, name) VALUES (29, 'Египет')")
+    assert registry.get() is first
+    assert len(opened) == 1
+
+    registry.invalidate()
+    fresh = registry.get()
+    assert fresh is not first
+    assert fresh.country.find("Египет") == 29
+
+
+def test_unchanged_version_keeps_the_snapshot_and_its_memo(pool):
+    registry, _ = _registry(pool, check_interval=0)
+    first = registry.get()
+    first.memo[("country", "турция")] = 92
+    assert registry.get() is first
+
+    with pool.write() as con:
+        con.execute("UPDATE countries SET name = 'Türkiye' WHERE id = 92")
+    fresh = registry.get()
+    assert fresh.version == first.version + 1
+    assert fresh.memo == {}
+    assert fresh.country.find("Турция") is None
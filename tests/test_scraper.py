@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from bot_service import parser
+from data.ingest import upsert_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+from utils.rate_limit import AsyncTokenBucket, HostRateLimiter, TokenBucket
+
+PAGE = '<html><body><div class="attributes__text">Отель у моря</div></body></html>'
+JS_PAGE = "<html><body><div id=app></div><script>render()</script></body></html>"
+
+
+def test_limiter_keeps_one_bucket_per_host_with_overrides():
+    limiter = HostRateLimiter(1.0, 2, {"b.example": {"rate_per_sec": 5, "burst": 10}})
+    a = limiter.bucket("https://a.example/hotel/1")
+    assert limiter.bucket("https://a.example/hotel/2") is a
+    b = limiter.bucket("https://b.example/x")
+    assert b is not a
+    assert (a.rate, a.capacity) == (1.0, 2)
+    assert (b.rate, b.capacity) == (5, 10)
+
+
+def test_token_bucket_allows_a_burst_then_waits():
+    bucket = TokenBucket(rate=5, capacity=3)
+    started = time.perf_counter()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.perf_counter() - started < 0.1
+    bucket.acquire()
+    assert time.perf_counter() - started >= 0.15
+
+
+def test_async_token_bucket_waits_without_blocking_the_loop():
+    async def run():
+        bucket = AsyncTokenBucket(rate=50, capacity=1)
+        ticks = []
+
+        async def ticker():
+            for _ in range(3):
+                ticks.append(1)
+                await asyncio.sleep(0.005)
+
+        started = time.perf_counter()
+        await asyncio.gather(ticker(), *(bucket.acquire() for _ in range(3)))
+        return ticks, time.perf_counter() - started
+
+    ticks, elapsed = asyncio.run(run())
+    assert ticks == [1, 1, 1]
+    assert elapsed >= 0.035
+
+
+class _Browsers:
+    def __init__(self, html):
+        self.html = html
+        self.rendered = []
+
+    async def render(self, url):
+        self.rendered.append(url)
+        return self.html
+
+
+def _fetch(page, browsers, status=200):
+    transport = httpx.MockTransport(lambda request: httpx.Response(status, text=page))
+    stats = {"http": 0, "browser": 0}
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await parser.fetch_description(client, browsers, 1, "https://hotels.example/1", stats)
+
+    return asyncio.run(run()), stats
+
+
+@pytest.fixture(autouse=True)
+def _fast_limiter(monkeypatch):
+    monkeypatch.setattr(parser, "limiter", HostRateLimiter(1000, 1000, bucket_cls=AsyncTokenBucket))
+    monkeypatch.setattr(parser, "SAVE_HTML_DIR", None)
+
+
+def test_plain_http_page_skips_the_browser():
+    browsers = _Browsers(PAGE)
+    desc, stats = _fetch(PAGE, browsers)
+    assert desc == "Отель у моря"
+    assert stats == {"http": 1, "browser": 0}
+    assert browsers.rendered == []
+
+
+@pytest.mark.parametrize("page, status", [(JS_PAGE, 200), (PAGE, 503)])
+def test_browser_only_when_http_has_no_description(page, status):
+    browsers = _Browsers(PAGE)
+    desc, stats = _fetch(page, browsers, status)
+    assert desc == "Отель у моря"
+    assert stats == {"http": 0, "browser": 1}
+    assert browsers.rendered == ["https://hotels.example/1"]
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = get_pool(str(tmp_path / "scraper.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+        upsert_tours([
+            {"api_id": api_id, "hotel_name": f"Hotel {api_id}", "country_id": 92, "city_id": 2,
+             "check_in": check_in, "nights": 7, "price": 50000, "url": f"https://hotels.example/{api_id}"}
+            for api_id, check_in in [(1, "2030-06-10"), (1, "2030-06-11"), (2, "2030-06-10"), (3, "2030-06-10")]
+        ], con=con)
+        con.execute("INSERT INTO hotel_descriptions (hotel_api_id, hotel_name, description) VALUES (2, 'Hotel 2', 'x')")
+    monkeypatch.setattr(parser, "get_pool", lambda: pool)
+    yield pool
+    pool.close()
+
+
+def test_pending_hotels_skips_scraped_and_deduplicates(pool):
+    assert [api_id for api_id, _, _ in parser.pending_hotels()] == [1, 3]
+    assert len(parser.pending_hotels(limit=1)) == 1
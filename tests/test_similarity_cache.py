@@ -0,0 +1,78 @@
+import asyncio
+import threading
+
+import pytest
+
+from llm_service import main
+from llm_service.main import _parse_single_score
+from llm_service.score_cache import ScoreCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ScoreCache(str(tmp_path / "scores.db"))
+    monkeypatch.setattr(main, "score_cache", cache)
+    return cache
+
+
+def _answers(monkeypatch, answer):
+    async def fake_llm(messages, temperature=0.2):
+        return answer
+    monkeypatch.setattr(main, "acall_llm", fake_llm)
+
+
+@pytest.mark.parametrize("answer, expected", [
+    ("0.75", 0.75),
+    ("Коэффициент сходства: 0,4", 0.4),
+    ("1", 1.0),
+    ("не могу оценить", None),
+    ("8/10", None),
+    ("0.3 или 0.5", None),
+    ("7", None),
+])
+def test_parse_single_score(answer, expected):
+    assert _parse_single_score(answer) == expected
+
+
+def test_unparsed_single_score_is_not_cached(cache, monkeypatch):
+    _answers(monkeypatch, "не знаю")
+    result = asyncio.run(main.similarity({"query": "тихий", "hotel_id": 1, "context": "отель"}))
+    assert result == {"score": None}
+    assert cache.get(ScoreCache.make_key("тихий", 1, "отель")) is None
+
+
+def test_batch_caches_only_parsed_scores(cache, monkeypatch):
+    # батч сбился с формата → по одному; первый отель оценён, второй — нет
+    answers = iter(["что-то не то", "0.6", "без понятия"])
+
+    async def fake_llm(messages, temperature=0.2):
+        return next(answers)
+    monkeypatch.setattr(main, "acall_llm", fake_llm)
+
+    req = main.SimilarityBatch(query="тихий", hotels=[
+        main.HotelContext(id=1, context="a"), main.HotelContext(id=2, context="b"),
+    ])
+    assert asyncio.run(main.similarity_batch(req)) == {"scores": [0.6, None]}
+    assert cache.get(ScoreCache.make_key("тихий", 1, "a")) == 0.6
+    assert cache.get(ScoreCache.make_key("тихий", 2, "b")) is None
+
+
+def test_cache_io_runs_off_the_event_loop(cache, monkeypatch):
+    _answers(monkeypatch, "0.4")
+    loop_thread = []
+    cache_threads = []
+    for name in ("get", "get_many", "set", "set_many"):
+        original = getattr(cache, name)
+
+        def spy(*args, _original=original):
+            cache_threads.append(threading.get_ident())
+            return _original(*args)
+        monkeypatch.setattr(cache, name, spy)
+
+    async def run():
+        loop_thread.append(threading.get_ident())
+        await main.similarity_batch(main.SimilarityBatch(query="q", hotels=[main.HotelContext(id=1, context="a")]))
+        await main.similarity({"query": "q", "hotel_id": 2, "context": "b"})
+
+    asyncio.run(run())
+    assert cache_threads and loop_thread[0] not in cache_threads
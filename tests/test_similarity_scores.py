@@ -0,0 +1,52 @@
+import asyncio
+
+from llm_service import main
+from llm_service.main import SimilarityBatch, _parse_scores
+
+
+def test_json_array_of_expected_length():
+    assert _parse_scores("[0.8, 0.5, 0.1]", 3) == [0.8, 0.5, 0.1]
+
+
+def test_array_inside_text_and_values_clamped():
+    assert _parse_scores("Оценки: [1.2, -0.1]", 2) == [1.0, 0.0]
+
+
+def test_wrong_length_is_rejected():
+    assert _parse_scores("[0.8, 0.5]", 3) is None
+
+
+def test_list_labels_are_not_scores():
+    # нумерация отелей не должна превращаться в оценки
+    assert _parse_scores("1: 0.8, 2: 0.5, 3: 0.1", 6) is None
+    assert _parse_scores("1: 0.8, 2: 0.5, 3: 0.1", 3) is None
+    assert _parse_scores("[1] 0.3", 1) is None
+
+
+def test_non_numeric_items_are_rejected():
+    assert _parse_scores('["high", 0.5]', 2) is None
+    assert _parse_scores("[true, 0.5]", 2) is None
+
+
+def test_llm_calls_share_one_concurrency_limit(monkeypatch):
+    active, peak = 0, 0
+
+    async def fake_llm(messages, temperature=0.2):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return "не JSON"  # чанки сбиваются с формата — и досчитываются по одному отелю
+
+    async def run():
+        monkeypatch.setattr(main, "_llm_slots", asyncio.Semaphore(3))
+        req = SimilarityBatch(query="лимит параллельных вызовов",
+                              hotels=[{"id": i, "context": f"Отель {i}"} for i in range(30)])
+        return await asyncio.gather(main.similarity_batch(req), main.summarize({"query": "q", "hotel": {}}))
+
+    monkeypatch.setattr(main, "acall_llm", fake_llm)
+    monkeypatch.setattr(main, "SIMILARITY_CHUNK_SIZE", 5)
+    batch, _ = asyncio.run(run())
+    assert batch["scores"] == [None] * 30
+    assert peak == 3
@@ -0,0 +1,83 @@
+import pytest
+
+from bot_service import tour_search
+from data.ingest import upsert_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+
+
+def _row(api_id, hotel, check_in, price, nights=7, city_id=2):
+    return {"api_id": api_id, "hotel_name": hotel, "country_id": 92, "city_id": city_id,
+            "check_in": check_in, "nights": nights, "price": price}
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = get_pool(str(tmp_path / "filter.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+        upsert_tours([
+            # один отель и дата заезда — разные ночи и города вылета
+            _row(1, "Alpha", "2030-06-10", 60000, nights=7),
+            _row(1, "Alpha", "2030-06-10", 55000, nights=8),
+            _row(1, "Alpha", "2030-06-10", 58000, nights=7, city_id=25),
+            _row(1, "Alpha", "2030-06-12", 70000),
+            _row(2, "Beta", "2030-06-10", 65000),
+            _row(3, "Gamma", "2030-06-10", 80000),
+        ], con=con)
+        con.execute("INSERT INTO hotel_descriptions (hotel_api_id, hotel_name, description) VALUES (1, 'Alpha', ?)",
+                    ("x" * 3000,))
+    monkeypatch.setattr(tour_search, "get_pool", lambda: pool)
+    yield pool
+    pool.close()
+
+
+def test_duplicates_collapse_to_the_cheapest_offer(pool):
+    tours = tour_search.sql_filter({"country_id": 92})
+    assert [(t.hotel_name, t.check_in, t.price) for t in tours] == [
+        ("Alpha", "2030-06-10", 55000),
+        ("Beta", "2030-06-10", 65000),
+        ("Alpha", "2030-06-12", 70000),
+        ("Gamma", "2030-06-10", 80000),
+    ]
+
+
+def test_limit_counts_unique_candidates(pool):
+    tours = tour_search.sql_filter({"country_id": 92}, limit=3)
+    assert len({(t.hotel_name, t.check_in) for t in tours}) == 3
+
+
+def test_descriptions_are_loaded_lazily_and_shared(pool):
+    tours = tour_search.sql_filter({"country_id": 92})
+    assert all(t.description is None for t in tours)
+    tour_search.attach_descriptions(tours, max_chars=100)
+    alpha = [t for t in tours if t.hotel_name == "Alpha"]
+    assert alpha[0].description == "x" * 100
+    # одна строка на отель, а не копия на каждый тур
+    assert alpha[0].description is alpha[1].description
+    assert [t.description for t in tours if t.hotel_name != "Alpha"] == ["", ""]
+
+
+def test_tour_is_a_slotted_record(pool):
+    tour = tour_search.sql_filter({"country_id": 92}, limit=1)[0]
+    assert not hasattr(tour, "__dict__")
+    with pytest.raises(AttributeError):
+        tour.extra = 1
+
+
+def test_duplicates_beyond_the_first_page_are_skipped(pool):
+    with pool.write() as con:
+        # восемь самых дешёвых туров — дубли одного варианта: первая страница (2 × limit) их целиком
+        upsert_tours([_row(4, "Delta", "2030-06-10", 10000 + n, nights=n) for n in range(1, 9)], con=con)
+    tours = tour_search.sql_filter({"country_id": 92}, limit=2)
+    assert [(t.hotel_name, t.price) for t in tours] == [("Delta", 10001), ("Alpha", 55000)]
+
+
+def test_filter_reads_the_price_index_without_sorting_all_matches(pool):
+    # дедупликация в SQL (ROW_NUMBER, GROUP BY) сортировала все подходящие туры до LIMIT
+    query, q_params = tour_search.build_filter_query({"country_id": 92, "city_id": 2}, limit=10)
+    with pool.read() as con:
+        plan = [row[3] for row in con.execute(f"EXPLAIN QUERY PLAN {query}", q_params)]
+    assert any("idx_tours_search_price" in step for step in plan)
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan
+    assert not any(step.startswith(("CO-ROUTINE", "MATERIALIZE")) for step in plan)
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+from llm_service import main
+from llm_service.main import SummarizeBatch
+
+
+def _llm(monkeypatch, answer):
+    """answer(ids запроса, номер вызова) → текст ответа модели; prompt'ы — в calls."""
+    calls = []
+
+    async def fake_llm(messages, temperature=0.2):
+        prompt = messages[-1]["content"]
+        ids = json.loads(re.search(r"с ключами (\[.*?\])", prompt).group(1))
+        calls.append(ids)
+        return answer(ids, len(calls))
+
+    monkeypatch.setattr(main, "acall_llm", fake_llm)
+    return calls
+
+
+def _request(n):
+    return SummarizeBatch(query="тихий отель у моря", hotels=[{"id": i, "hotel": f"Hotel {i}"} for i in range(1, n + 1)])
+
+
+def test_hotels_are_packed_into_chunks(monkeypatch):
+    monkeypatch.setattr(main, "SUMMARIZE_BATCH_SIZE", 2)
+    calls = _llm(monkeypatch, lambda ids, _: json.dumps({i: f"Отель {i} подходит." for i in ids}))
+    result = asyncio.run(main.summarize_batch(_request(5)))
+    assert sorted(calls) == [["1", "2"], ["3", "4"], ["5"]]
+    assert result["summaries"] == {str(i): f"Отель {i} подходит." for i in range(1, 6)}
+
+
+def test_only_missing_ids_are_asked_again(monkeypatch):
+    monkeypatch.setattr(main, "SUMMARIZE_BATCH_SIZE", 5)
+
+    def answer(ids, call):
+        if call == 1:
+            return "Вот ответ: " + json.dumps({"1": "Первый.", "2": "  "}) + " надеюсь, помог"
+        return json.dumps({i: f"Повтор {i}." for i in ids})
+
+    calls = _llm(monkeypatch, answer)
+    result = asyncio.run(main.summarize_batch(_request(3)))
+    assert calls == [["1", "2", "3"], ["2", "3"]]
+    assert result["summaries"] == {"1": "Первый.", "2": "Повтор 2.", "3": "Повтор 3."}
+
+
+def test_gives_up_after_retries(monkeypatch):
+    monkeypatch.setattr(main, "SUMMARIZE_BATCH_RETRIES", 1)
+    calls = _llm(monkeypatch, lambda ids, _: "не JSON")
+    result = asyncio.run(main.summarize_batch(_request(2)))
+    assert len(calls) == 2
+    assert result == {"summaries": {}}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Based on the request\nТихий отель.", "Тихий отель."),
+    ("  Тихий отель.  ", "Тихий отель."),
+])
+def test_reason_is_cleaned(text, expected):
+    assert main._clean_reason(text) == expected
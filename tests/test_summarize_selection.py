@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from bot_service import llm_api, tour_search
+from bot_service.models import Tour
+from utils.rate_limit import AsyncTokenBucket
+
+
+@pytest.fixture(autouse=True)
+def concurrent(reference_db, monkeypatch):
+    async def no_descriptions(tours):
+        for t in tours:
+            t.description = t.description or ""
+        return tours
+
+    monkeypatch.setattr(tour_search, "_attach_descriptions_async", no_descriptions)
+    monkeypatch.setattr(tour_search, "SUMMARY_MODE", "concurrent")
+    monkeypatch.setattr(tour_search, "_summary_slots", asyncio.Semaphore(2))
+    monkeypatch.setattr(tour_search, "_summary_bucket", AsyncTokenBucket(1000, 1000))
+
+
+def _tours(n):
+    # без цифр в названиях: _clean_summary вырезает нумерацию вида "1."
+    return [Tour(i, f"Hotel {'ABCDEFG'[i - 1]}", 7, 50000 + i, "RUB", "", "2030-06-10", hotel_category_id=7, meal_id=1)
+            for i in range(1, n + 1)]
+
+
+def test_runs_concurrently_up_to_the_limit_and_keeps_rank_order(monkeypatch):
+    active, peak = 0, 0
+
+    async def summarize(user_query, hotel):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        # первые по рангу отвечают дольше — порядок ответа не должен зависеть от этого
+        await asyncio.sleep(0.05 if hotel["hotel"] == "Hotel A" else 0.01)
+        active -= 1
+        return f"Про {hotel['hotel']}."
+
+    monkeypatch.setattr(llm_api, "summarize", summarize)
+    tours = asyncio.run(tour_search.summarize_selection_batch(_tours(4), "тихий отель", deadline=5))
+    assert peak == 2
+    assert [t.reason for t in tours] == [f"Про Hotel {c}." for c in "ABCD"]
+
+
+def test_late_and_failed_hotels_get_a_template_reason(monkeypatch):
+    async def summarize(user_query, hotel):
+        if hotel["hotel"] == "Hotel B":
+            await asyncio.sleep(1)
+        if hotel["hotel"] == "Hotel C":
+            raise RuntimeError("boom")
+        return f"Про {hotel['hotel']}."
+
+    monkeypatch.setattr(llm_api, "summarize", summarize)
+    tours = asyncio.run(tour_search.summarize_selection_batch(_tours(3), "тихий отель", deadline=0.1))
+    assert tours[0].reason == "Про Hotel A."
+    assert tours[1].reason == "Категория 5*, питание «всё включено», 50002 RUB за 7 ночей."
+    assert tours[2].reason.startswith("Категория 5*")
+
+
+def test_batch_keeps_summaries_of_requests_that_made_the_deadline(monkeypatch):
+    async def summarize_batch(user_query, hotels, timeout):
+        if hotels[0]["hotel"] == "Hotel C":
+            await asyncio.sleep(1)
+        return {h["id"]: f"Про {h['hotel']}." for h in hotels}
+
+    monkeypatch.setattr(tour_search, "SUMMARY_MODE", "batch")
+    monkeypatch.setattr(tour_search, "SUMMARY_BATCH_SIZE", 2)
+    monkeypatch.setattr(llm_api, "summarize_batch", summarize_batch)
+    tours = asyncio.run(tour_search.summarize_selection_batch(_tours(3), "тихий отель", deadline=0.1))
+    assert [t.reason for t in tours[:2]] == ["Про Hotel A.", "Про Hotel B."]
+    assert tours[2].reason.startswith("Категория 5*")
+
+
+def test_batch_deadline_covers_waiting_for_a_slot(monkeypatch):
+    async def summarize_batch(user_query, hotels, timeout):
+        raise AssertionError("слот занят — до запроса дело не доходит")
+
+    async def run():
+        slots = asyncio.Semaphore(1)
+        monkeypatch.setattr(tour_search, "_summary_slots", slots)
+        await slots.acquire()
+        started = time.perf_counter()
+        tours = await tour_search.summarize_selection_batch(_tours(2), "тихий отель", deadline=0.2)
+        return tours, time.perf_counter() - started
+
+    monkeypatch.setattr(tour_search, "SUMMARY_MODE", "batch")
+    monkeypatch.setattr(llm_api, "summarize_batch", summarize_batch)
+    tours, elapsed = asyncio.run(run())
+    assert elapsed < 0.5
+    assert all(t.reason.startswith("Категория 5*") for t in tours)
@@ -0,0 +1,69 @@
+import pytest
+
+from bot_service import tour_search
+from bot_service.text_search import match_expression
+from data.ingest import upsert_tours
+from data.migrate import apply_migrations
+from utils.db_pool import get_pool
+
+
+def test_match_expression_groups_words_and_preferences():
+    assert match_expression(["вид на море", "романтика"]) == '("вид"* "мор"*) OR ("роман"*)'
+
+
+def test_match_expression_normalizes_and_deduplicates():
+    assert match_expression(["Тёплое море", "теплое МОРЕ"]) == '("тепл"* "мор"*)'
+
+
+@pytest.mark.parametrize("preferences", [[], ["отель", "хороший"], ["и в на"], ['"', "*)"]])
+def test_match_expression_without_words_is_none(preferences):
+    assert match_expression(preferences) is None
+
+
+def test_quotes_cannot_break_the_query():
+    # слова берутся регуляркой \w+, поэтому кавычки и операторы FTS5 в запрос не попадают
+    assert match_expression(['пляж" OR "x', "NEAR(мор)"]) == '("пля"* "or"*) OR ("nea"* "мор"*)'
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = get_pool(str(tmp_path / "search.db"), create=True)
+    with pool.write() as con:
+        apply_migrations(con)
+        upsert_tours([
+            {"api_id": api_id, "hotel_name": name, "country_id": 92, "city_id": 2,
+             "check_in": "2030-06-10", "nights": 7, "price": price}
+            for api_id, name, price in [(1, "Sea View", 70000), (2, "Garden", 50000), (3, "Mountain", 40000)]
+        ], con=con)
+        con.executemany(
+            "INSERT INTO hotel_descriptions (hotel_api_id, hotel_name, description) VALUES (?, ?, ?)",
+            [(1, "Sea View", "Номера с видом на море, песчаный пляж"),
+             (2, "Garden", "Сад и бассейн, до моря 500 м"),
+             (3, "Mountain", "Горы и лес")],
+        )
+    monkeypatch.setattr(tour_search, "get_pool", lambda: pool)
+    yield pool
+    pool.close()
+
+
+def _hotels(params):
+    return [t.hotel_name for t in tour_search.sql_filter({"country_id": 92, **params})]
+
+
+def test_sql_filter_keeps_only_matching_hotels(pool):
+    # слова одного пожелания — через AND: у Garden есть "моря", но нет "вид"
+    assert _hotels({"preferences": ["вид на море"]}) == ["Sea View"]
+    assert sorted(_hotels({"preferences": ["вид на море", "бассейн"]})) == ["Garden", "Sea View"]
+
+
+def test_sql_filter_orders_matches_by_bm25_before_price(pool):
+    # "мор" есть у обоих, "песча" — только у дорогого Sea View
+    assert _hotels({"preferences": ["море", "песчаный"]}) == ["Sea View", "Garden"]
+
+
+def test_sql_filter_falls_back_when_nothing_matches(pool):
+    assert _hotels({"preferences": ["казино"]}) == ["Mountain", "Garden", "Sea View"]
+
+
+def test_sql_filter_without_preferences_orders_by_price(pool):
+    assert _hotels({}) == ["Mountain", "Garden", "Sea View"]
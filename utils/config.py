@@ -1,14 +1,23 @@
 import os, yaml
+from functools import lru_cache
 
-import os, yaml
 
 def load_config(path: str = None) -> dict:
+    """
+    Конфиг читается с диска один раз на путь: модули зовут load_config() при импорте,
+    и все они получают один и тот же dict (его не нужно изменять).
+    """
     config_path = path or os.getenv("CONFIG_PATH", "config.yaml")
 
     if not os.path.isabs(config_path):
         base_dir = os.path.dirname(os.path.dirname(__file__))
         config_path = os.path.join(base_dir, config_path)
 
+    return _read_config(os.path.normpath(config_path))
+
+
+@lru_cache(maxsize=None)
+def _read_config(config_path: str) -> dict:
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config not found: {config_path}")
 
@@ -16,10 +25,14 @@ def load_config(path: str = None) -> dict:
         return yaml.safe_load(f)
 
     
-def get_db_path(cfg):
-    db_path = cfg["database"]["path"]
-    if not os.path.isabs(db_path):
+def resolve_path(path: str) -> str:
+    """Относительные пути считаем от корня проекта и создаём нужную папку."""
+    if not os.path.isabs(path):
         project_root = os.path.dirname(os.path.dirname(__file__))
-        db_path = os.path.join(project_root, db_path)
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    return db_path
\ No newline at end of file
+        path = os.path.join(project_root, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def get_db_path(cfg):
+    return resolve_path(cfg["database"]["path"])
\ No newline at end of file
@@ -1,65 +1,119 @@
-import sqlite3
-from utils.config import load_config, get_db_path
+from utils.reference import ReferenceData, get_reference
 
-config = load_config()
-DB_PATH = get_db_path(config)
+# Единственный путь от названий (из LLM или быстрого разбора) к id справочников.
+# Результаты запоминаются на снимке справочников: повторные "Турция"/"Москва"
+# не ищутся заново, а после обновления справочников memo уходит вместе со старым снимком.
 
+MEMO_SIZE = 10_000
 
-# --- Универсальные функции ---
+# правила для синонимов питания
+MEAL_GROUPS = {
+    "все включено": ["всё включено", "all inclusive", "ультра всё включено"],
+    "ультра все включено": ["ультра всё включено", "ultra all inclusive"],
+    "без алкоголя": ["без алкоголя"],
+    "завтрак": ["завтрак", "breakfast"],
+    "полупансион": ["завтрак+ужин", "завтрак и ужин", "half board"],
+    "полный пансион": ["завтрак, обед, ужин", "full board"],
+    "без питания": ["без питания", "no meals"]
+}
 
-def _load_lookup(table, key="name"):
-    """Загружает маппинг {name.lower(): id} из указанных таблиц."""
-    con = sqlite3.connect(DB_PATH)
-    data = con.execute(f"SELECT LOWER({key}), id FROM {table}").fetchall()
-    con.close()
-    return {k.strip().lower(): v for k, v in data}
 
+# --- Поиск по снимку ---
 
-def _find_in_lookup(lookup: dict, text: str):
-    if not text:
-        return None
-    name = text.lower().strip()
-    # сначала точное совпадение
-    for k, v in lookup.items():
-        if name == k:
-            return v
-    # потом частичные совпадения
-    for k, v in lookup.items():
-        if name in k or k in name:
-            return v
-    return None
-
-# --- Загрузка всех справочников в память при старте ---
-
-CITY_MAP = _load_lookup("cities")
-COUNTRY_MAP = _load_lookup("countries")
-RESORT_MAP = _load_lookup("resorts")
-CATEGORY_MAP = _load_lookup("hotel_categories")
-MEAL_MAP = _load_lookup("meals")
+def _find_category(ref: ReferenceData, category: str) -> int | None:
+    text = category.lower()
+    # добавить короткие синонимы
+    if "5" in text:
+        text = "5"
+    elif "4" in text:
+        text = "4"
+    return ref.category.find(text)
+
+
+def _find_meal_ids(ref: ReferenceData, meal: str) -> tuple[int, ...]:
+    name = meal.lower()
+    ids = []
+    # собираем все варианты — без break, ищем все группы
+    for key, synonyms in MEAL_GROUPS.items():
+        if any(syn in name for syn in synonyms):
+            ids.extend(ref.meal.find_all(key))
+            ids.extend(ref.meal.find_all(synonyms[0]))
+
+    # если ничего не нашли вообще — fallback‑поиск
+    if not ids:
+        ids = ref.meal.find_related(name)
+    return tuple(sorted(set(ids)))
+
+
+_FINDERS = {
+    "city": lambda ref, text: ref.city.find(text),
+    "country": lambda ref, text: ref.country.find(text),
+    "resort": lambda ref, text: ref.resort.find(text),
+    "category": _find_category,
+    "meal": _find_meal_ids,
+}
+
+
+def _resolve(ref: ReferenceData, kind: str, text: str):
+    key = (kind, text.lower().strip())
+    try:
+        return ref.memo[key]
+    except KeyError:
+        pass
+    if len(ref.memo) >= MEMO_SIZE:
+        ref.memo.clear()
+    value = ref.memo[key] = _FINDERS[kind](ref, text)
+    return value
+
+
+# поле запроса → (поле с id, справочник)
+REFERENCE_FIELDS = {
+    "departure_city": ("city_id", "city"),
+    "country": ("country_id", "country"),
+    "resort": ("resort_id", "resort"),
+    "hotel_category": ("hotel_category_id", "category"),
+    "meal": ("meal_id", "meal"),
+}
+
+
+def resolve_reference_ids(params: dict) -> dict:
+    """
+    Проставляет city_id, country_id, resort_id, hotel_category_id и meal_id
+    за один проход по одному снимку справочников. Уже заданные id не трогает.
+    """
+    ref = get_reference()
+    for field, (id_field, kind) in REFERENCE_FIELDS.items():
+        value = params.get(field)
+        if not value or params.get(id_field):
+            continue
+        found = _resolve(ref, kind, value)
+        if found:
+            params[id_field] = list(found) if kind == "meal" else found
+    return params
 
 
 # --- Публичные функции ---
 
 def get_city_id_by_name(city: str) -> int | None:
-    return _find_in_lookup(CITY_MAP, city)
+    return _resolve(get_reference(), "city", city) if city else None
 
 def get_country_id_by_name(country: str) -> int | None:
-    return _find_in_lookup(COUNTRY_MAP, country)
+    return _resolve(get_reference(), "country", country) if country else None
 
 def get_resort_id_by_name(resort: str) -> int | None:
-    return _find_in_lookup(RESORT_MAP, resort)
+    return _resolve(get_reference(), "resort", resort) if resort else None
+
+def get_hotel_category_name_by_id(category_id: int) -> str | None:
+    return get_reference().category.name_of.get(category_id)
+
+def get_meal_name_by_id(meal_id: int) -> str | None:
+    return get_reference().meal.name_of.get(meal_id)
 
 def get_hotel_category_id_by_name(category: str) -> int | None:
     """Находит ID по названию категории, например '5*' или 'четыре звезды'."""
     if not category:
         return None
-    text = category.lower()
-    # добавить короткие синонимы
-    if "5" in text:
-        text = "5"
-    elif "4" in text:
-        text = "4"
-    return _find_in_lookup(CATEGORY_MAP, text)
+    return _resolve(get_reference(), "category", category)
 
 def get_meal_ids_by_name(meal: str) -> list[int]:
     """
@@ -67,42 +121,4 @@ def get_meal_ids_by_name(meal: str) -> list[int]:
     """
     if not meal:
         return []
-
-    name = meal.lower()
-    ids = []
-
-    # правила для синонимов
-    group_map = {
-        "все включено": ["всё включено", "all inclusive", "ультра всё включено"],
-        "ультра все включено": ["ультра всё включено", "ultra all inclusive"],
-        "без алкоголя": ["без алкоголя"],
-        "завтрак": ["завтрак", "breakfast"],
-        "полупансион": ["завтрак+ужин", "завтрак и ужин", "half board"],
-        "полный пансион": ["завтрак, обед, ужин", "full board"],
-        "без питания": ["без питания", "no meals"]
-    }
-
-    # вспомогательная функция для поиска по подстроке
-    def find_like(needle):
-        res = []
-        for k, v in MEAL_MAP.items():
-            if needle in k:
-                res.append(v)
-        return res
-
-    # собираем все варианты
-        # === обновлённая часть ===
-    for key, synonyms in group_map.items():
-        if any(syn in name for syn in synonyms):
-            ids.extend(find_like(key))
-            ids.extend(find_like(synonyms[0]))
-            # без break — ищем все группы
-    # === конец обновлённой части ===
-
-    # если ничего не нашли вообще — fallback‑поиск
-    if not ids:
-        for k, v in MEAL_MAP.items():
-            if name in k or k in name:
-                ids.append(v)
-
-    return list(set(ids))
\ No newline at end of file
+    return list(_resolve(get_reference(), "meal", meal))
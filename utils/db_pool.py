@@ -0,0 +1,146 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils.config import load_config, get_db_path
+
+# Общий пул соединений SQLite для поиска, загрузчиков и парсера.
+# База в WAL-режиме: читатели (read-only соединения) не блокируются
+# писателем, а писатель один и сериализуется через lock.
+
+config = load_config()
+_db_cfg = config.get("database", {})
+POOL_SIZE = _db_cfg.get("pool_size", 8)
+CACHE_MB = _db_cfg.get("cache_mb", 64)
+MMAP_MB = _db_cfg.get("mmap_mb", 256)
+STATEMENT_CACHE = _db_cfg.get("statement_cache", 256)
+
+
+class SQLitePool:
+    """
+    Файл базы должен существовать: создаёт его только пул с create=True
+    (миграции, init_db), иначе опечатка в database.path дала бы пустую базу
+    и "no such table" где-то посреди обработки запроса.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, create: bool = False):
+        self.path = path
+        self.size = size
+        self.create = create
+        if not create:
+            self._check_exists()
+        self._idle = queue.LifoQueue()     # LIFO — самые «тёплые» соединения идут первыми
+        self._created = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._writer = None
+
+    def _tune(self, con: sqlite3.Connection) -> sqlite3.Connection:
+        con.execute(f"PRAGMA cache_size = -{CACHE_MB * 1024}")
+        con.execute(f"PRAGMA mmap_size = {MMAP_MB * 1024 * 1024}")
+        con.execute("PRAGMA temp_store = MEMORY")
+        con.execute("PRAGMA busy_timeout = 5000")
+        return con
+
+    def _check_exists(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(
+                f"База SQLite не найдена: {self.path} (database.path); создайте её: python -m data.migrate"
+            )
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            if not self.create:
+                self._check_exists()
+            con = sqlite3.connect(self.path, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+            con.execute("PRAGMA journal_mode = WAL")
+            con.execute("PRAGMA synchronous = NORMAL")
+            self._writer = self._tune(con)
+        return self._writer
+
+    def _new_reader(self) -> sqlite3.Connection:
+        # читатель базу не создаёт никогда, даже у пула с create=True
+        self._check_exists()
+        if self._writer is None:
+            # писатель переводит базу в WAL (read-only соединение этого не умеет)
+            try:
+                with self._write_lock:
+                    self._get_writer()
+            except sqlite3.OperationalError:
+                pass
+        con = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True,
+            check_same_thread=False, cached_statements=STATEMENT_CACHE,
+        )
+        return self._tune(con)
+
+    @contextmanager
+    def read(self):
+        """Read-only соединение из пула; после использования возвращается обратно."""
+        try:
+            con = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    con = self._new_reader()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                con = self._idle.get()
+        try:
+            yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            self._idle.put(con)
+
+    @contextmanager
+    def write(self):
+        """Единственное пишущее соединение: commit при успехе, rollback при ошибке."""
+        with self._write_lock:
+            con = self._get_writer()
+            try:
+                yield con
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str | None = None, create: bool = False) -> SQLitePool:
+    """
+    Пул на файл базы; по умолчанию — database.path из config.yaml.
+    Без create=True отсутствующий файл — FileNotFoundError сразу, а не пустая база.
+    """
+    path = path or get_db_path(config)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = SQLitePool(path, create=create)
+        elif create:
+            pool.create = True
+        return pool
@@ -0,0 +1,135 @@
+import re
+from collections import defaultdict
+
+# Индекс справочника {название: id} для поиска без линейных проходов:
+# точное совпадение → совпадение после нормализации и транслитерации
+# ("Antalya" = "Анталья", "Hurghada" = "Хургада", ё = е) → частичное
+# совпадение через инвертированный индекс n-грамм.
+
+_CYR_TO_LAT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "i", "ь": "", "э": "e", "ю": "iu",
+    "я": "ia",
+}
+_TRANSLIT = str.maketrans(_CYR_TO_LAT)
+# сводим разные латинские написания к одному: kh/h, gh/g, y/i, j/i, w/v, c/k
+_LATIN_SQUASH = [
+    (re.compile(r"kh"), "h"), (re.compile(r"gh"), "g"), (re.compile(r"ph"), "f"),
+    (re.compile(r"[yj]"), "i"), (re.compile(r"w"), "v"), (re.compile(r"c(?!h)"), "k"),
+    (re.compile(r"(\w)\1+"), r"\1"),
+]
+_PUNCT_RE = re.compile(r"[^\w*+]+")
+
+GRAM = 3
+
+
+def normalize(text: str) -> str:
+    """Нижний регистр, ё → е, пунктуация и лишние пробелы → один пробел."""
+    text = (text or "").lower().replace("ё", "е")
+    return _PUNCT_RE.sub(" ", text).strip()
+
+
+def canonical(text: str) -> str:
+    """Нормализованная латинская форма: одинакова для кириллического и латинского написания."""
+    text = normalize(text).translate(_TRANSLIT)
+    for pattern, repl in _LATIN_SQUASH:
+        text = pattern.sub(repl, text)
+    return text
+
+
+def _grams(text: str, n: int) -> set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class LookupIndex:
+    """
+    Строится один раз из {название: id}; поиск — хеш-таблицы и пересечение
+    коротких списков n-грамм вместо прохода по всему справочнику.
+    """
+
+    def __init__(self, mapping: dict):
+        self.mapping = dict(mapping)
+        self.exact = {}
+        self.canon = {}
+        self.name_of = {}
+        self._postings = {n: defaultdict(set) for n in range(1, GRAM + 1)}
+        self._starts = defaultdict(set)
+        self._short = []
+        self._ids = defaultdict(list)
+
+        # сортировка по имени — чтобы при одинаковых формах побеждал всегда один и тот же id
+        for name, id_ in sorted(mapping.items()):
+            key = normalize(name)
+            self.exact.setdefault(key, id_)
+            self.name_of.setdefault(id_, name)
+            form = canonical(name)
+            self.canon.setdefault(form, id_)
+            self._ids[form].append(id_)
+            for n in self._postings:
+                for g in _grams(form, n):
+                    self._postings[n][g].add(form)
+            if len(form) < GRAM:
+                self._short.append(form)
+            else:
+                self._starts[form[:GRAM]].add(form)
+
+    def __len__(self) -> int:
+        return len(self.name_of)
+
+    def _containing(self, form: str) -> set[str]:
+        """Ключи, в которые form входит подстрокой."""
+        n = min(GRAM, len(form))
+        grams = _grams(form, n)
+        if not grams:
+            return set()
+        postings = sorted((self._postings[n].get(g, set()) for g in grams), key=len)
+        found = set(postings[0]).intersection(*postings[1:])
+        return {k for k in found if form in k}
+
+    def _contained(self, form: str) -> set[str]:
+        """Ключи, которые сами входят подстрокой в form."""
+        found = {k for k in self._short if k and k in form}
+        for i in range(len(form) - GRAM + 1):
+            for k in self._starts.get(form[i:i + GRAM], ()):
+                if form.startswith(k, i):
+                    found.add(k)
+        return found
+
+    def partial(self, text: str) -> list[str]:
+        """Частичные совпадения, лучшие первыми: ближе по длине, затем с начала слова, затем по алфавиту."""
+        form = canonical(text)
+        if not form:
+            return []
+        found = self._containing(form) | self._contained(form)
+        return sorted(found, key=lambda k: (
+            abs(len(k) - len(form)), not (k.startswith(form) or form.startswith(k)), k,
+        ))
+
+    def find(self, text: str) -> int | None:
+        if not text:
+            return None
+        key = normalize(text)
+        if key in self.exact:
+            return self.exact[key]
+        form = canonical(text)
+        if form in self.canon:
+            return self.canon[form]
+        best = self.partial(text)
+        return self.canon[best[0]] if best else None
+
+    def find_all(self, text: str) -> list[int]:
+        """id всех записей, в названии которых есть text (для групп синонимов питания)."""
+        form = canonical(text)
+        if not form:
+            return []
+        return sorted({id_ for k in self._containing(form) for id_ in self._ids[k]})
+
+    def find_related(self, text: str) -> list[int]:
+        """id всех записей, где text входит в название или название входит в text."""
+        form = canonical(text)
+        if not form:
+            return []
+        keys = self._containing(form) | self._contained(form)
+        return sorted({id_ for k in keys for id_ in self._ids[k]})
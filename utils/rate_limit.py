@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket для asyncio: rate токенов в секунду, не больше capacity про запас.
+    Ожидающие корутины обслуживаются по очереди.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class TokenBucket:
+    """То же для потоков: acquire() блокирует текущий поток, пока не появится токен."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                time.sleep((tokens - self._tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """
+    Отдельный bucket на каждый хост: вежливость к каждому API/сайту по отдельности.
+    bucket_cls=AsyncTokenBucket — для корутин (await limiter.bucket(url).acquire()).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, per_host: dict | None = None,
+                 bucket_cls=TokenBucket):
+        self.rate = rate
+        self.bucket_cls = bucket_cls
+        self.capacity = capacity
+        # {"api-gateway.travelata.ru": {"rate_per_sec": 2, "burst": 4}, ...}
+        self.per_host = per_host or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                cfg = self.per_host.get(host, {})
+                self._buckets[host] = self.bucket_cls(
+                    cfg.get("rate_per_sec", self.rate), cfg.get("burst", self.capacity)
+                )
+            return self._buckets[host]
+
+    def acquire(self, url: str) -> None:
+        self.bucket(url).acquire()
@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from utils.config import load_config
+from utils.db_pool import get_pool
+from utils.lookup_index import LookupIndex
+
+# Справочники (города, страны, курорты, категории, питание) в памяти.
+# Загружаются при первом обращении, а не при импорте; раз в check_interval_sec
+# сверяется reference_version (её увеличивают триггеры, см. data/reference_version.sql),
+# и после обновления справочников data.loader индексы пересобираются без перезапуска.
+
+config = load_config()
+CHECK_INTERVAL = config.get("reference", {}).get("check_interval_sec", 30)
+
+TABLES = {
+    "city": "cities",
+    "country": "countries",
+    "resort": "resorts",
+    "category": "hotel_categories",
+    "meal": "meals",
+}
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Неизменяемый снимок справочников; новый снимок подменяет старый целиком."""
+    version: int | None
+    city: LookupIndex
+    country: LookupIndex
+    resort: LookupIndex
+    category: LookupIndex
+    meal: LookupIndex
+    # результаты разрешения названий (utils.db_helpers) — живут ровно столько же, сколько снимок
+    memo: dict = field(default_factory=dict, compare=False, repr=False)
+
+
+def _read_version(con: sqlite3.Connection) -> int | None:
+    try:
+        row = con.execute("SELECT version FROM reference_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        # база без миграции reference_version — грузим один раз, без отслеживания
+        return None
+    return row[0] if row else None
+
+
+class ReferenceRegistry:
+    def __init__(self, pool_getter=get_pool, check_interval: float = CHECK_INTERVAL):
+        self._pool_getter = pool_getter
+        self.check_interval = check_interval
+        self._data = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _load(self, con: sqlite3.Connection, version: int | None) -> ReferenceData:
+        indexes = {}
+        for kind, table in TABLES.items():
+            rows = con.execute(f"SELECT LOWER(name), id FROM {table}").fetchall()
+            indexes[kind] = LookupIndex({k.strip().lower(): v for k, v in rows if k})
+        return ReferenceData(version=version, **indexes)
+
+    def get(self) -> ReferenceData:
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return data
+        with self._lock:
+            # другой поток мог уже обновить снимок, пока мы ждали lock
+            if self._data is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._data
+            with self._pool_getter().read() as con:
+                version = _read_version(con)
+                if self._data is None or (version is not None and version != self._data.version):
+                    started = time.perf_counter()
+                    fresh = self._load(con, version)
+                    if self._data is not None:
+                        print(f"🔄 Справочники обновлены (версия {version}) "
+                              f"за {(time.perf_counter() - started) * 1000:.0f} мс")
+                    self._data = fresh
+            self._checked_at = time.monotonic()
+            return self._data
+
+    def invalidate(self) -> None:
+        """Следующий get() перечитает версию сразу, не дожидаясь check_interval."""
+        # не 0.0: monotonic() отсчитывается от загрузки системы и бывает меньше check_interval
+        self._checked_at = float("-inf")
+
+
+registry = ReferenceRegistry()
+
+
+def get_reference() -> ReferenceData:
+    return registry.get()